@@ -1,13 +1,23 @@
 """defines a colorama log"""
 # coding: utf-8
+from __future__ import annotations
 import sys
 import os
-import traceback
-from typing import Optional
+from typing import Any, Iterator, Optional
 from cpylog.utils import (
-    ipython_info, properties, properties2,
-    get_frame_file_from_frame)  # get_default_session
+    ipython_info, properties, properties2, properties3,
+    get_frame_file_from_frame, accepts_kwarg)  # get_default_session
 from cpylog.warning_redirector import WarningRedirector
+from cpylog.format_utils import (
+    LineFormatter, DEFAULT_FORMAT, level_filename_fmt_to_template,
+    template_to_level_filename_fmt)
+from cpylog.context import (
+    BoundLogger, LogContext, contextualize, get_current_context, _CONTEXT)
+from cpylog.escalation import EscalationPolicy, TRIGGER_METHODS
+from cpylog.exception_utils import (
+    get_traceback_key, get_traceback_fields, format_exception, truncate_middle,
+    MAX_TRACEBACK_KEYS)
+from cpylog.tail_utils import follow
 
 __version__ = '1.6.1'  # 1.6.1 is latest released
 __desc__ = 'cpylog'
@@ -33,6 +43,28 @@ USE_HTML = ipython_info() is not None
 # PYTHONIOENCODING UTF-8
 IS_PYCHARM = os.getenv("PYCHARM_HOSTED") != None
 
+# the message types that are written for each level
+#   note that 'error' only writes exception/critical messages
+ENABLED_TYPES = {
+    'debug': {'DEBUG', 'INFO', 'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL'},
+    'info': {'INFO', 'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL'},
+    'warning': {'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL'},
+    'error': {'EXCEPTION', 'CRITICAL'},
+    'critical': {'EXCEPTION', 'CRITICAL'},
+}
+
+# the level methods that are swapped with _noop when they are suppressed
+LEVEL_METHODS = {
+    'debug': 'DEBUG',
+    'info': 'INFO',
+    'warning': 'WARNING',
+    'error': 'ERROR',
+}
+# the other methods that are swapped with _noop when the log is disabled
+DISABLED_METHODS = ('exception', 'critical')
+# the message types in level order (see FileLogger.add_file)
+ROUTE_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+
 USE_COLORAMA = IS_PYCHARM or (IS_TERMINAL and not USE_HTML)
 if USE_COLORAMA:
     # You're running in a real terminal
@@ -52,6 +84,14 @@ else:
     from cpylog.screen_utils import write_screen as _write
 
 
+# checked for each written message (see SimpleLogger.contextualize)
+_get_context = _CONTEXT.get
+
+
+def _noop(msg, *args) -> None:
+    """a suppressed message"""
+
+
 class SimpleLogger:
     """
     Simple logger object. In future might be changed to use Python logging module.
@@ -63,6 +103,9 @@ class SimpleLogger:
       - 'critical'
     'debug' prints all messages.  'info' removes only 'debug' messages, etc.
 
+    Named child loggers (``log.get_child('solver')``) share the outputs
+    of the parent and inherit its level unless they set their own.
+
     .. note:: Logging module is currently not supported because I don't
       know how to repoint the log file if the program is called a second
       time.  Poor logging can result in:\n
@@ -73,7 +116,8 @@ class SimpleLogger:
 
     """
     def __init__(self, level: str='debug', encoding: str='utf-8',
-                 nlevels: int=1, log_func=None) -> None:
+                 nlevels: int=1, log_func=None,
+                 fmt: str=DEFAULT_FORMAT) -> None:
         """
         Creates a SimpleLogger
 
@@ -95,6 +139,15 @@ class SimpleLogger:
                 the line number corresponding to the filename
             msg: str
                 the message to log
+            func: str (optional keyword)
+                the qualified name of the calling function; only passed
+                if the log_func takes a func (or **kwargs) argument
+            fields: dict (optional keyword)
+                the context fields (see ``bind``); only passed if the
+                log_func takes a fields (or **kwargs) argument
+        fmt : str; default=DEFAULT_FORMAT
+            the line template for the screen/file/HTML output
+            (see ``cpylog.format_utils``)
 
         Example
         -------
@@ -115,36 +168,519 @@ class SimpleLogger:
             log_func = self.stdout_logging
         assert level in ('info', 'debug', 'warning', 'error', 'critical'), 'logging level=%r' % level
         #assert encoding in ['utf-8', 'latin-1', 'ascii'], encoding
+
+        # child loggers (see get_child)
+        self.name = ''
+        self._parent: Optional[SimpleLogger] = None
+        self._children: dict[str, SimpleLogger] = {}
+        self._root = self
+
+        # the level is lowered after an error (see set_escalation);
+        # only used on the root, so the children share the escalation
+        self._escalation: Optional[EscalationPolicy] = None
+        self._escalated_level: Optional[str] = None
+
+        # log may be enabled/disabled (useful for multiprocessing)
+        self._active = True
+
         self.level = level
-        self.log_func = log_func
+        # the screen output (stdout_logging or the log_func argument)
+        self._stream_log_func = log_func
+        self.loggers = [log_func]
+        # extra outputs (see add_sink)
+        self._sinks = []
+        self._set_log_func(log_func)
         self.encoding = encoding
         self._nlevels = nlevels
         assert nlevels >= 1, nlevels
 
-        # log may be enabled/disabled (useful for multiprocessing)
-        self._active = True
+        # traceback hash -> number of times it was logged (see log_exception)
+        self._traceback_counts: dict[int, int] = {}
+
+        # summarizes numpy arrays in the message args (see set_array_format)
+        self._array_formatter = None
 
         # log format may be modified to clean up printout
-        # should still be of the form:
-        #  '%-s %s\n'
-        self._level_filename_fmt = ' %-28s %s\n'
+        self.set_format(fmt)
         assert isinstance(encoding, str), type(encoding)
 
+    @property
+    def log_func(self):
+        """the function that writes the messages to all the outputs"""
+        return self._log_func
+
+    @log_func.setter
+    def log_func(self, log_func) -> None:
+        """
+        Replaces the screen output (e.g., with a GUI function).  The
+        file and the sinks (see ``add_sink``) are still written.
+        """
+        self._stream_log_func = log_func
+        self._set_outputs()
+
+    def _set_log_func(self, log_func) -> None:
+        """sets the function that writes the messages to all the outputs"""
+        # checked once here, so the 4-argument log_func still works
+        old_log_func = getattr(self, '_log_func', None)
+        self._log_func = log_func
+        self._pass_func = accepts_kwarg(log_func, 'func')
+        self._pass_fields = accepts_kwarg(log_func, 'fields')
+
+        # the children share the outputs
+        for child in self._children.values():
+            if child._stream_log_func == old_log_func:
+                child._stream_log_func = log_func
+                child._set_outputs()
+
+    @property
+    def level(self) -> str:
+        """the level of logging (inherited from the parent for a child)"""
+        return self._level
+
+    @level.setter
+    def level(self, level: Optional[str]) -> None:
+        self.set_level(level)
+
+    def set_level(self, level: Optional[str]) -> None:
+        """
+        Sets the level of logging
+
+        Parameters
+        ----------
+        level : str / None
+            level of logging: 'info', 'debug', 'warning', 'error', or 'critical'
+            None: use the level of the parent (only for a child logger)
+
+        """
+        if level is None:
+            assert self._parent is not None, 'the level of a logger without a parent must be set'
+        else:
+            assert level in ENABLED_TYPES, 'logging level=%r' % level
+        self._own_level = level
+        self._update_level()
+
+    def _update_level(self) -> None:
+        """
+        Resolves the level and swaps the suppressed level methods
+        (e.g., debug) with a no-op, so checking the level of a message
+        doesn't depend on the depth of the logger.  All the level methods
+        are no-ops for a disabled log.  The children are updated (for the
+        inherited level and the escalation of the root).
+        """
+        root = self._root
+        level = self._own_level if self._own_level is not None else self._parent.level
+        escalated_level = root._escalated_level
+        if (escalated_level is not None and
+                len(ENABLED_TYPES[escalated_level]) > len(ENABLED_TYPES[level])):
+            level = escalated_level
+        self._level = level
+        self._enabled_types = ENABLED_TYPES[level]
+        if self._active:
+            for method_name, typ in LEVEL_METHODS.items():
+                if typ in self._enabled_types:
+                    self.__dict__.pop(method_name, None)
+                else:
+                    self.__dict__[method_name] = _noop
+            for method_name in DISABLED_METHODS:
+                self.__dict__.pop(method_name, None)
+        else:
+            for method_name in LEVEL_METHODS:
+                self.__dict__[method_name] = _noop
+            for method_name in DISABLED_METHODS:
+                self.__dict__[method_name] = _noop
+
+        policy = root._escalation
+        if policy is not None and escalated_level is None and self._active:
+            # the trigger is found by the error methods
+            for method_name, typ in TRIGGER_METHODS.items():
+                if typ in policy.trigger_types and typ in self._enabled_types:
+                    self.__dict__[method_name] = self._make_trigger(typ)
+
+        for child in self._children.values():
+            child._update_level()
+
+    def get_child(self, suffix: str) -> SimpleLogger:
+        """
+        Gets a named child logger, which shares the outputs of this log
+
+        Parameters
+        ----------
+        suffix : str
+            the name of the child (e.g., 'solver' or 'solver.linear')
+
+        Returns
+        -------
+        log : SimpleLogger
+            the child logger; the same object is returned for the same name.
+            The level is inherited unless set_level is called on the child.
+
+        """
+        log = self
+        for name in suffix.split('.'):
+            try:
+                log = log._children[name]
+                continue
+            except KeyError:
+                pass
+            child = SimpleLogger(level=log.level, encoding=log.encoding,
+                                 nlevels=log._nlevels, log_func=log._log_func,
+                                 fmt=log._formatter.fmt)
+            child.name = f'{log.name}.{name}' if log.name else name
+            child._parent = log
+            child._root = log._root
+            child._formatter = log._formatter
+            if child._root._escalated_level is not None:
+                child._msg_typ_unescalated = None
+                child.msg_typ = child._msg_typ_escalated
+            child.set_level(None)
+            log._children[name] = child
+            log = child
+        return log
+
+    # for standard logging compatibility
+    getChild = get_child
+
+    def bind(self, **fields) -> BoundLogger:
+        """
+        Gets a log that adds context fields to each message
+
+        Parameters
+        ----------
+        **fields : dict
+            the fields (e.g., case='A12', iter=3)
+
+        Returns
+        -------
+        log : BoundLogger
+            has debug/info/warning/error/exception/critical methods and
+            shares the outputs/level of this log
+
+        Example
+        -------
+        >>> blog = log.bind(case='A12', iter=3)
+        >>> blog.info('converged')
+        INFO:    file.py:2                    [case=A12 iter=3] converged
+
+        The '[case=A12 iter=3] ' prefix is rendered once here.  A
+        log_func that takes a ``fields`` argument gets the fields as a
+        dict instead of the prefix.
+
+        """
+        return BoundLogger(self, get_current_context(fields))
+
+    def contextualize(self, **fields):
+        """
+        Adds context fields to every message in a block for the current
+        thread/asyncio task (see ``cpylog.context.contextualize``)
+
+        Example
+        -------
+        >>> with log.contextualize(worker=2):
+        ...     log.info('started')
+        INFO:    file.py:2                    [worker=2] started
+
+        """
+        return contextualize(**fields)
+
+    def add_sink(self, sink) -> None:
+        """
+        Adds an output in addition to the screen/file
+
+        Parameters
+        ----------
+        sink : function
+            called like a log_func: sink(typ, filename, lineno, msg[, func=func])
+            (e.g., ``cpylog.network.UDPSink``)
+
+        """
+        self._sinks.append(sink)
+        self._set_outputs()
+
+    def remove_sink(self, sink) -> None:
+        """removes an output that was added by ``add_sink``"""
+        self._sinks.remove(sink)
+        self._set_outputs()
+
+    def _set_outputs(self) -> None:
+        """sets the log_func based on the outputs"""
+        loggers = [self._stream_log_func] + self._sinks
+        self.loggers = loggers
+        if len(loggers) == 1:
+            self._set_log_func(loggers[0])
+        else:
+            self._set_loggers()
+
+    def set_format(self, fmt: str=DEFAULT_FORMAT) -> None:
+        """
+        Sets the line template for the screen/file/HTML output
+
+        Parameters
+        ----------
+        fmt : str; default=DEFAULT_FORMAT
+            fields: level, label, file, line, location, func, time, pid, thread, msg
+            (see ``cpylog.format_utils``)
+
+        """
+        # the template is compiled here, so a custom format costs the
+        # same as the default format
+        old_formatter = getattr(self, '_formatter', None)
+        self._formatter = LineFormatter(fmt)
+        for child in self._children.values():
+            if child._formatter is old_formatter:
+                child.set_format(fmt)
+
+    @property
+    def _level_filename_fmt(self) -> str:
+        """
+        the old '%' format of the filename:lineno and msg columns
+        (e.g., ' %-28s %s\\n'); set_format is used for other layouts
+        """
+        return template_to_level_filename_fmt(self._formatter.fmt)
+
+    @_level_filename_fmt.setter
+    def _level_filename_fmt(self, level_filename_fmt: str) -> None:
+        # the label column isn't part of the old format
+        self.set_format(level_filename_fmt_to_template(level_filename_fmt))
+
+    def set_array_format(self, threshold: Optional[int]=100, mode: str='summary',
+                         edgeitems: int=3) -> None:
+        """
+        Summarizes large numpy arrays that are passed as message args
+        (e.g., ``log.debug('x = %s', x)``).  The summary is only made for
+        a message that's written and numpy isn't imported.
+
+        Parameters
+        ----------
+        threshold : int / None; default=100
+            arrays with more than this many values are summarized
+            None: turn off the array formatting
+        mode : str; default='summary'
+            'summary' : array(shape=(1000000,), dtype=float64, min=0, max=1, nan=0)
+            'truncate' : the repr with edgeitems values on each end
+        edgeitems : int; default=3
+            the number of values on each end for mode='truncate'
+
+        """
+        if threshold is None:
+            self._array_formatter = None
+            return
+        from cpylog.array_utils import ArrayFormatter
+        self._array_formatter = ArrayFormatter(threshold=threshold, mode=mode,
+                                               edgeitems=edgeitems)
+
+    def _format_args(self, msg: str, args: tuple) -> str:
+        """
+        formats ``msg % args`` after the level check; a single dict
+        argument is used for a '%(name)s' message like the logging module
+        """
+        if len(args) == 1 and isinstance(args[0], dict) and args[0]:
+            args = args[0]
+        if self._array_formatter is not None:
+            return self._array_formatter.format(msg, args)
+        return msg % args
+
     def set_enabled(self, enabled: bool) -> None:
         """temporarily enable/disable logging"""
         assert isinstance(enabled, bool), enabled
         self._active = enabled
+        self._update_level()
+
+    def set_escalation(self, trigger: Optional[str]='error', level: str='debug',
+                       duration: Optional[float]=None,
+                       nrecords: Optional[int]=None) -> None:
+        """
+        Temporarily lowers the level after an error, so the context of
+        the failure is logged (e.g., run at 'info' and switch to 'debug'
+        for 60 seconds after the first error).
+
+        Parameters
+        ----------
+        trigger : str / None; default='error'
+            the level that starts the escalation: 'warning', 'error' or 'critical'
+            None: turn off the escalation (and end an active escalation)
+        level : str; default='debug'
+            the level while escalated
+        duration : float; default=None
+            the number of seconds to stay escalated
+        nrecords : int; default=None
+            the number of messages to write while escalated
+            (the first of duration/nrecords ends the escalation)
+
+        The escalation is triggered by the error methods of this log and
+        its children (e.g., ``log.error`` and ``log_exc``).  Those methods
+        are swapped and ``msg_typ`` is only swapped while escalated, so
+        the messages don't check the time otherwise.  The escalation is
+        kept on the root log, so the log and all its children share the
+        trigger, the level and the count.
+
+        """
+        root = self._root
+        if root._escalated_level is not None:
+            root._end_escalation()
+        for log in root._iter_tree():
+            for method_name in TRIGGER_METHODS:
+                log.__dict__.pop(method_name, None)
+        if trigger is None:
+            root._escalation = None
+        else:
+            root._escalation = EscalationPolicy(
+                trigger=trigger, level=level, duration=duration, nrecords=nrecords)
+        root._update_level()
+
+    def _iter_tree(self) -> Iterator[SimpleLogger]:
+        """yields this log and all of its children"""
+        yield self
+        for child in self._children.values():
+            yield from child._iter_tree()
+
+    def _make_trigger(self, typ: str):
+        """makes an error method that starts the escalation"""
+        def trigger(msg: str, *args) -> None:
+            # nframe=3: 0: properties, 1: msg_typ, 2: trigger, 3: caller
+            assert msg is not None, msg
+            if args:
+                msg = self._format_args(msg, args)
+            self.msg_typ(typ, msg)
+            self._escalate()
+        return trigger
+
+    def _escalate(self) -> None:
+        """lowers the level of the tree until the escalation is done"""
+        root = self._root
+        policy = root._escalation
+        policy.start()
+        if root._escalated_level is not None:
+            return
+        policy.nescalations += 1
+        root._escalated_level = policy.level
+        for log in root._iter_tree():
+            # sampling may also swap msg_typ
+            log._msg_typ_unescalated = log.__dict__.get('msg_typ')
+            log.msg_typ = log._msg_typ_escalated
+        root._update_level()
+
+    def _end_escalation(self) -> None:
+        """restores the level of the tree"""
+        root = self._root
+        root._escalated_level = None
+        for log in root._iter_tree():
+            msg_typ = log._msg_typ_unescalated
+            if msg_typ is None:
+                log.__dict__.pop('msg_typ', None)
+            else:
+                log.msg_typ = msg_typ
+        root._update_level()
+
+    def _check_escalation(self, typ: str) -> None:
+        """
+        Starts the escalation after a message that doesn't come from the
+        error methods (e.g., ``CpylogLogger.error``)
+        """
+        root = self._root
+        policy = root._escalation
+        if (policy is not None and root._escalated_level is None and
+                typ in policy.trigger_types and self._active):
+            self._escalate()
+
+    def _msg_typ_escalated(self, typ: str, msg: str, nframe: int=3,
+                           context: Optional[LogContext]=None,
+                           location: Optional[tuple[str, int, str]]=None) -> None:
+        """``msg_typ`` while escalated (see ``set_escalation``)"""
+        policy = self._root._escalation
+        if typ in policy.trigger_types:
+            policy.start()
+        elif policy.is_done():
+            self._end_escalation()
+            if not self.is_enabled_for(typ):
+                return
+        msg_typ = self._msg_typ_unescalated
+        if msg_typ is None:
+            SimpleLogger.msg_typ(self, typ, msg, nframe=nframe + 1, context=context,
+                                 location=location)
+        else:
+            msg_typ(typ, msg, nframe=nframe + 1, context=context, location=location)
+
+    def set_sampling(self, every: Optional[int]=None, rate: Optional[float]=None,
+                     types: tuple[str, ...]=('DEBUG', ), seed: Optional[int]=None) -> None:
+        """
+        Only writes some of the messages (e.g., debug messages in a loop).
+        The sampling rate is added to the message (e.g., '[sampled 1/100] ').
+
+        Parameters
+        ----------
+        every : int; default=None
+            keep every Nth message of each type
+        rate : float; default=None
+            the probability of keeping a message (0 < rate <= 1)
+        types : tuple[str]; default=('DEBUG', )
+            the message types that are sampled
+        seed : int; default=None
+            the random seed for rate
+
+        If every and rate are None, sampling is turned off.
+
+        """
+        if self._root._escalated_level is not None:
+            # both swap msg_typ
+            self._end_escalation()
+        if every is None and rate is None:
+            self._samplers = {}
+            self.__dict__.pop('msg_typ', None)
+            return
+        from cpylog.sampling import Sampler
+        self._samplers = {typ: Sampler(every=every, rate=rate, seed=seed)
+                          for typ in types}
+        # the sampler is only checked when sampling is on
+        self.msg_typ = self._msg_typ_sampled
+
+    def sample(self, every: Optional[int]=None, rate: Optional[float]=None,
+               seed: Optional[int]=None):
+        """
+        Gets a logger that samples the messages from a single call site
+
+        Parameters
+        ----------
+        every : int; default=None
+            keep every Nth message
+        rate : float; default=None
+            the probability of keeping a message (0 < rate <= 1)
+        seed : int; default=None
+            the random seed for rate
+
+        Returns
+        -------
+        sampled_log : SampledLogger
+            has debug/info/warning methods
+
+        Example
+        -------
+        >>> sample = log.sample(every=1000)
+        >>> for i in range(1_000_000):
+        ...     sample.debug(f'i={i}')
+
+        """
+        from cpylog.sampling import Sampler, SampledLogger
+        return SampledLogger(self, Sampler(every=every, rate=rate, seed=seed))
+
+    def is_enabled_for(self, typ: str) -> bool:
+        """
+        Is a message type (e.g., 'DEBUG') written at the current level?
+        Unknown types are written (e.g., from another logging module).
+        """
+        if not self._active:
+            return False
+        return typ in self._enabled_types or typ not in ENABLED_TYPES['debug']
 
     def enable(self) -> None:
-        """activates the logger"""
-        self._active = True
+        """activates the logger (restores the level methods)"""
+        self.set_enabled(True)
 
     def disable(self) -> None:
-        """deactivates the logger"""
-        self._active = False
+        """deactivates the logger (the level methods are swapped with a no-op)"""
+        self.set_enabled(False)
 
     def stdout_logging(self, typ: str, filename: str, lineno: int,
-                       msg: str) -> None:
+                       msg: str, func: str='') -> None:
         """
         Default logging function. Takes a text and outputs to stdout.
 
@@ -158,18 +694,14 @@ class SimpleLogger:
             line number
         msg : str
             message to be displayed
+        func : str; default=''
+            the calling function
 
-        Message will have format 'typ: msg'
+        Message will have format set by ``set_format``
 
         """
-        # max length of 'INFO', 'DEBUG', 'WARNING', etc.
-        name = '%-8s' % (typ + ':')
-        if isinstance(lineno, list):
-            filename_lineno = '/'.join([f'{filenamei}:{linenoi}'
-                                        for filenamei, linenoi in zip(filename, lineno)])
-        else:
-            filename_lineno = f'{filename}:{lineno}'
-        msg2 = self._level_filename_fmt % (filename_lineno, msg)
+        # the level and filename:lineno columns are cached
+        line = self._formatter.format(typ, filename, lineno, msg, func)
 
         #from .html_utils import str_to_html
         #try:
@@ -178,10 +710,12 @@ class SimpleLogger:
             #print(typ, filename, lineno, msg2, type(msg2))
             #raise
 
-        _write(typ, name, msg2, self.encoding)
+        _write(typ, '', line, self.encoding)
         #sys.stdout.flush()
 
-    def msg_typ(self, typ: str, msg: str, nframe: int=3) -> None:
+    def msg_typ(self, typ: str, msg: str, nframe: int=3,
+                context: Optional[LogContext]=None,
+                location: Optional[tuple[str, int, str]]=None) -> None:
         """
         Log message of a given type
 
@@ -194,14 +728,100 @@ class SimpleLogger:
         nframe : int; default=3
             the number of log levels to jump
             should be 3+
+        context : LogContext; default=None
+            the bound context fields (see ``bind``);
+            None: the fields from ``contextualize``
+        location : (filename, lineno, func); default=None
+            the location of the message (e.g., from a stdlib LogRecord);
+            None: look up the frame (see nframe)
 
         """
         if not self._active:
             return
+        if context is None:
+            context = _get_context()
+        if context is not None:
+            self._msg_typ_context(typ, msg, context, nframe=nframe+1, location=location)
+            return
+        if location is not None:
+            filename, lineno, func = location
+            if self._pass_func:
+                self._log_func(typ, filename, lineno, msg, func=func)
+            else:
+                self._log_func(typ, filename, lineno, msg)
+            return
+        if self._pass_func:
+            lineno, filename, func = properties3(nframe=nframe, dframe=self._nlevels-1)
+            self._log_func(typ, filename, lineno, msg, func=func)
+            return
         lineno, filename = properties2(nframe=nframe, dframe=self._nlevels-1)
-        self.log_func(typ, filename, lineno, msg)
+        self._log_func(typ, filename, lineno, msg)
         #self.log_func(typ, '   fname=%-25s lineNo=%-4s   %s\n' % (fn, lineno, msg))
 
+    def _set_loggers(self) -> None:
+        """
+        Writes to all the ``loggers`` from a single ``msg_typ``, so the
+        frame is only looked up once (honoring nlevels) for the screen,
+        the file and the sinks.
+        """
+        self._loggers = tuple((log_func, accepts_kwarg(log_func, 'func'),
+                               accepts_kwarg(log_func, 'fields'))
+                              for log_func in self.loggers)
+        self._set_log_func(self._log_loggers)
+
+    def _log_loggers(self, typ: str, filename: str, lineno: int, msg: str,
+                     func: str='') -> None:
+        """sends a message to each of the ``loggers``"""
+        for log_func, pass_func, unused_pass_fields in self._loggers:
+            if pass_func:
+                log_func(typ, filename, lineno, msg, func=func)
+            else:
+                log_func(typ, filename, lineno, msg)
+
+    def _msg_typ_context(self, typ: str, msg: str, context: LogContext,
+                         nframe: int, location: Optional[tuple[str, int, str]]=None) -> None:
+        """
+        Writes a message with context fields (see ``bind``).  The text
+        outputs get the pre-rendered prefix and the outputs that take a
+        ``fields`` argument get the fields.
+        """
+        if location is None:
+            lineno, filename, func = properties3(nframe=nframe, dframe=self._nlevels-1)
+        else:
+            filename, lineno, func = location
+        log_func = self._log_func
+        if getattr(log_func, '__func__', None) is SimpleLogger._log_loggers:
+            # a child shares the outputs of the parent
+            outputs = log_func.__self__._loggers
+        else:
+            outputs = ((log_func, self._pass_func, self._pass_fields), )
+
+        text_msg = f'{context.prefix}{msg}'
+        for log_func, pass_func, pass_fields in outputs:
+            if pass_fields:
+                if pass_func:
+                    log_func(typ, filename, lineno, msg, func=func, fields=context.fields)
+                else:
+                    log_func(typ, filename, lineno, msg, fields=context.fields)
+            elif pass_func:
+                log_func(typ, filename, lineno, text_msg, func=func)
+            else:
+                log_func(typ, filename, lineno, text_msg)
+
+    def _msg_typ_sampled(self, typ: str, msg: str, nframe: int=3,
+                         context: Optional[LogContext]=None,
+                         location: Optional[tuple[str, int, str]]=None) -> None:
+        """``msg_typ`` with sampling (see ``set_sampling``)"""
+        if not self._active:
+            return
+        sampler = self._samplers.get(typ)
+        if sampler is not None:
+            if not sampler():
+                return
+            msg = f'{sampler.label}{msg}'
+        SimpleLogger.msg_typ(self, typ, msg, nframe=nframe + 1, context=context,
+                             location=location)
+
     def simple_msg(self, msg: str, typ: Optional[str]=None) -> None:
         """
         Log message directly without any altering.
@@ -221,9 +841,9 @@ class SimpleLogger:
         filename = os.path.basename(frame_file)
 
         assert msg is not None, msg
-        self.log_func(typ, filename, lineno, msg)
+        self._log_func(typ, filename, lineno, msg)
 
-    def debug(self, msg: str) -> None:
+    def debug(self, msg: str, *args) -> None:
         """
         Log DEBUG message
 
@@ -231,13 +851,15 @@ class SimpleLogger:
         ----------
         msg : str
             message to be logged
+        *args : tuple
+            formatted as ``msg % args`` only if the message is written
 
         """
-        if self.level != 'debug':
-            return
+        if args:
+            msg = self._format_args(msg, args)
         self.msg_typ('DEBUG', msg)
 
-    def info(self, msg: str) -> None:
+    def info(self, msg: str, *args) -> None:
         """
         Log INFO message
 
@@ -245,14 +867,16 @@ class SimpleLogger:
         ----------
         msg : str
             message to be logged
+        *args : tuple
+            formatted as ``msg % args`` only if the message is written
 
         """
-        if self.level not in ('debug', 'info'):
-            return
         assert msg is not None, msg
+        if args:
+            msg = self._format_args(msg, args)
         self.msg_typ('INFO', msg)
 
-    def warning(self, msg: str) -> None:
+    def warning(self, msg: str, *args) -> None:
         """
         Log WARNING message
 
@@ -260,14 +884,16 @@ class SimpleLogger:
         ----------
         msg : str
             message to be logged
+        *args : tuple
+            formatted as ``msg % args`` only if the message is written
 
         """
-        if self.level in {'error', 'critical'}:
-            return
         assert msg is not None, msg
+        if args:
+            msg = self._format_args(msg, args)
         self.msg_typ('WARNING', msg)
 
-    def error(self, msg: str) -> None:
+    def error(self, msg: str, *args) -> None:
         """
         Log ERROR message
 
@@ -275,14 +901,16 @@ class SimpleLogger:
         ----------
         msg : str
             message to be logged
+        *args : tuple
+            formatted as ``msg % args`` only if the message is written
 
         """
-        if self.level in {'error', 'critical'}:
-            return
         assert msg is not None, msg
+        if args:
+            msg = self._format_args(msg, args)
         self.msg_typ('ERROR', msg)
 
-    def exception(self, msg: str) -> None:
+    def exception(self, msg: str, *args) -> None:
         """
         Log EXCEPTION message
 
@@ -290,12 +918,16 @@ class SimpleLogger:
         ----------
         msg : str
             message to be logged
+        *args : tuple
+            formatted as ``msg % args`` only if the message is written
 
         """
         assert msg is not None, msg
+        if args:
+            msg = self._format_args(msg, args)
         self.msg_typ('EXCEPTION', msg)
 
-    def critical(self, msg: str) -> None:
+    def critical(self, msg: str, *args) -> None:
         """
         Log CRITICAL message
 
@@ -303,9 +935,13 @@ class SimpleLogger:
         ----------
         msg : str
             message to be logged
+        *args : tuple
+            formatted as ``msg % args`` only if the message is written
 
         """
         assert msg is not None, msg
+        if args:
+            msg = self._format_args(msg, args)
         self.msg_typ('CRITICAL', msg)
 
     #def __enter__(self):
@@ -317,10 +953,36 @@ class SimpleLogger:
             #print("ending...")
         #return True
 
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Drops the swapped level methods (the escalation triggers are
+        closures), so the log can be pickled (e.g., for multiprocessing)
+        """
+        state = self.__dict__.copy()
+        for method_name in (*LEVEL_METHODS, *DISABLED_METHODS, *TRIGGER_METHODS):
+            state.pop(method_name, None)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """restores the swapped level methods once the tree is restored"""
+        self.__dict__.update(state)
+        # a parent may be restored before/after its children
+        root = self._root
+        if _is_restored(root):
+            root._update_level()
+
     def __repr__(self):
+        if self.name:
+            return f'SimpleLogger(name={self.name!r}, level={self.level!r}, encoding={self.encoding!r})'
         return f'SimpleLogger(level={self.level!r}, encoding={self.encoding!r})'
 
 
+def _is_restored(log: SimpleLogger) -> bool:
+    """has the state of the log and its children been unpickled?"""
+    return '_children' in log.__dict__ and all(
+        _is_restored(child) for child in log._children.values())
+
+
 def properties(nframe: int=3) -> tuple[int, str]:
     """
     Gets frame information
@@ -349,6 +1011,82 @@ def properties(nframe: int=3) -> tuple[int, str]:
         return frame.f_lineno, active_file[:-1]
     return frame.f_lineno, active_file
 
+class NullLogger:
+    """
+    A log that doesn't write anything (e.g., for a library call with
+    ``log=None``).  The level methods are the shared ``_noop``, so a
+    message costs the same as an empty function call.
+
+    Use the ``NULL_LOGGER`` instance (or ``get_logger(level='off')``)
+    instead of making a new one.
+    """
+    __slots__ = ()
+    name = ''
+    level = 'off'
+    _active = False
+
+    debug = staticmethod(_noop)
+    info = staticmethod(_noop)
+    warning = staticmethod(_noop)
+    error = staticmethod(_noop)
+    exception = staticmethod(_noop)
+    critical = staticmethod(_noop)
+
+    def msg_typ(self, typ: str, msg: str, nframe: int=3,
+                context: Optional[LogContext]=None,
+                location: Optional[tuple[str, int, str]]=None) -> None:
+        """nothing is written"""
+
+    def simple_msg(self, msg: str, typ: Optional[str]=None) -> None:
+        """nothing is written"""
+
+    def is_enabled_for(self, typ: str) -> bool:
+        """no message type is written"""
+        return False
+
+    def set_level(self, level: Optional[str]) -> None:
+        """the level can't be changed"""
+
+    def set_enabled(self, enabled: bool) -> None:
+        """the log is always disabled"""
+
+    def enable(self) -> None:
+        """the log is always disabled"""
+
+    def disable(self) -> None:
+        """the log is always disabled"""
+
+    def add_sink(self, sink) -> None:
+        """nothing is sent to a sink"""
+
+    def remove_sink(self, sink) -> None:
+        """nothing is sent to a sink"""
+
+    def get_child(self, suffix: str) -> NullLogger:
+        """the children are also null"""
+        return self
+
+    def bind(self, **fields) -> NullLogger:
+        """the fields aren't used"""
+        return self
+
+    def sample(self, every: Optional[int]=None, rate: Optional[float]=None,
+               seed: Optional[int]=None) -> NullLogger:
+        """nothing is sampled"""
+        return self
+
+    def contextualize(self, **fields):
+        """the fields aren't used"""
+        from contextlib import nullcontext
+        return nullcontext()
+
+    def __repr__(self) -> str:
+        return 'NullLogger()'
+
+
+NULL_LOGGER = NullLogger()
+
+
 def get_logger(log: Optional[SimpleLogger]=None,
                level: Optional[str | bool]='debug',
                encoding: str='utf-8',
@@ -369,6 +1107,7 @@ def get_logger(log: Optional[SimpleLogger]=None,
            False: logs info/warning/error messages ('info' level)
            None:  logs warning/error messages ('warning level')
            str:   one of: 'debug', 'info', 'warning', 'error', 'critical'
+           'off': NULL_LOGGER (nothing is written)
     encoding : str; default='utf-8'
         the unicode encoding method
     nlevels : int; default=1
@@ -384,6 +1123,8 @@ def get_logger(log: Optional[SimpleLogger]=None,
         # if not isinstance(log, (str, bool)):
         return log
 
+    if level == 'off':
+        return NULL_LOGGER
     if isinstance(level, str):
         log = SimpleLogger(level=level, encoding=encoding, nlevels=nlevels)
     elif level is None:
@@ -415,7 +1156,9 @@ class FileLogger(SimpleLogger):
                  filename: Optional[str]=None,
                  mode: str='w',
                  include_stream: bool=True,
-                 log_func=None):
+                 log_func=None,
+                 fmt: str=DEFAULT_FORMAT,
+                 raw: bool=False):
         """
                 Parameters
         ----------
@@ -441,6 +1184,18 @@ class FileLogger(SimpleLogger):
                 the line number corresponding to the filename
             msg: str
                 the message to log
+            func: str (optional keyword)
+                the qualified name of the calling function; only passed
+                if the log_func takes a func (or **kwargs) argument
+        fmt : str; default=DEFAULT_FORMAT
+            the line template for the screen/file output
+            (see ``cpylog.format_utils``)
+        raw : bool; default=False
+            write the encoded lines to the file descriptor with O_APPEND
+            (os.write) instead of a text file; a batch of lines (see
+            ``set_flush``) is encoded and written once, so processes that
+            append to the same file don't mix their lines
+            (see ``cpylog.fd_utils``)
 
         Example
         -------
@@ -456,34 +1211,211 @@ class FileLogger(SimpleLogger):
         >>> log2.info('log func message')
         log func message
 
+        The screen (log_func) and file outputs share a single frame
+        lookup and get the same filename/lineno.
+
         """
         SimpleLogger.__init__(self, level=level, encoding=encoding,
-                              nlevels=nlevels, log_func=None)
+                              nlevels=nlevels, log_func=log_func, fmt=fmt)
 
         self.include_stream = include_stream
-        self.loggers = []
         self._file = None
         self._filename = filename
+        # the files that get a range of levels (see add_file)
+        #   [(types, file), ...]
+        self._routes: list[tuple[frozenset[str], Any]] = []
+
+        # flush the file every N messages (see set_flush)
+        self._flush_every = 1
+        self._nunflushed = 0
+        # flushes the log on a crash (see install_crash_handler)
+        self._crash_handler = None
+        # written by __exit__ (see add_summary)
+        self._summary = None
 
         is_file_logger = filename is not None
         assert include_stream or is_file_logger, 'a print stream or file must be included'
         if filename is not None:
             dirname = os.path.dirname(os.path.abspath(filename))
             assert os.path.exists(dirname), dirname
+            self._file = _open_log_file(filename, mode, encoding, raw)
+        self._set_outputs()
 
-        if include_stream and is_file_logger:
-            self.loggers.append(self.log_func)
-            self._file = open(filename, mode, encoding=encoding)
-            self.loggers.append(self.file_logging)
-            self.msg_typ = self.msg_typ_file
-        elif is_file_logger:
-            #print(f'only using a file; include_stream={include_stream} is_file_logger={is_file_logger} filename={filename}')
-            self._file = open(filename, mode, encoding=encoding)
-            self.log_func = self.file_logging
-        #else:
-            #print(f'only using a streamer; include_stream={include_stream} is_file_logger={is_file_logger} filename={filename}')
-        #self.debug(str(self))
+    def add_file(self, filename: str, min_level: str='debug', max_level: str='critical',
+                 mode: str='w', raw: bool=False) -> None:
+        """
+        Writes the messages in a range of levels to another file
+        (e.g., errors.log).  The frame is looked up and the line is
+        formatted once for all the files.
+
+        Parameters
+        ----------
+        filename : str
+            the file to write
+        min_level : str; default='debug'
+            the lowest level that's written:
+            'debug', 'info', 'warning', 'error', 'exception', 'critical'
+        max_level : str; default='critical'
+            the highest level that's written
+        mode : str; default='w'
+            'w': overwrite the file; 'a': append to the file
+        raw : bool; default=False
+            write to the file descriptor (see ``FileLogger(raw=True)``)
+
+        The level of the log still applies (e.g., a 'debug' file of an
+        'info' log doesn't get debug messages).  Other message types
+        (e.g., from another logging module) aren't written.
+
+        Example
+        -------
+        >>> log = FileLogger(level='debug', filename='debug.log', include_stream=False)
+        >>> log.add_file('errors.log', min_level='error')
+
+        """
+        min_index = ROUTE_LEVELS.index(min_level.upper())
+        max_index = ROUTE_LEVELS.index(max_level.upper())
+        assert min_index <= max_index, f'min_level={min_level!r} max_level={max_level!r}'
+        dirname = os.path.dirname(os.path.abspath(filename))
+        assert os.path.exists(dirname), dirname
+        types = frozenset(ROUTE_LEVELS[min_index:max_index + 1])
+        self._routes.append((types, _open_log_file(filename, mode, self.encoding, raw)))
+        self._set_outputs()
+
+    def set_include_stream(self, include_stream: bool) -> None:
+        """turns the screen output on/off"""
+        assert include_stream or self._file is not None or self._routes, \
+            'a print stream or file must be included'
+        self.include_stream = include_stream
+        self._set_outputs()
+
+    def set_flush(self, flush: bool | int=True) -> None:
+        """
+        Sets how often the file is flushed
+
+        Parameters
+        ----------
+        flush : bool / int; default=True
+            True:  flush after every message
+            False: let the file buffer decide
+            int:   flush every N messages
+
+        """
+        if flush is True:
+            flush_every = 1
+        elif flush is False:
+            flush_every = sys.maxsize
+        else:
+            assert isinstance(flush, int) and flush >= 1, f'flush={flush!r}'
+            flush_every = flush
+        self._flush_every = flush_every
+        self._flush_files()
 
+    def _flush_files(self) -> None:
+        """flushes the file and the files of add_file"""
+        if self._file is not None:
+            self._file.flush()
+        for unused_types, route_file in self._routes:
+            route_file.flush()
+        self._nunflushed = 0
+
+    def flush(self) -> None:
+        """flushes the files and the sinks (e.g., a TCPSink)"""
+        self._flush_files()
+        for sink in self._sinks:
+            if hasattr(sink, 'flush'):
+                sink.flush()
+
+    def install_crash_handler(self, excepthook: bool=True, threads: bool=True,
+                              signals: Optional[tuple[int, ...]]=None,
+                              fault_handler: bool=True):
+        """
+        Flushes the log on an unhandled exception, at exit and on a
+        fatal signal, so the file may be buffered (see set_flush)
+        without losing the last messages.  The handler is removed by
+        ``__exit__``.
+
+        Parameters
+        ----------
+        excepthook : bool; default=True
+            log the unhandled exceptions of the main thread (sys.excepthook)
+        threads : bool; default=True
+            log the unhandled exceptions of the other threads (threading.excepthook)
+        signals : tuple[int]; default=None -> (signal.SIGTERM, )
+            the signals that flush the log; () for none
+        fault_handler : bool; default=True
+            write the traceback of a hard crash (e.g., a segfault) to the
+            file (faulthandler)
+
+        Returns
+        -------
+        crash_handler : CrashHandler
+            call ``crash_handler.uninstall()`` to remove it
+
+        """
+        from cpylog.crash_utils import CrashHandler
+        if self._crash_handler is not None:
+            self._crash_handler.uninstall()
+        self._crash_handler = CrashHandler(
+            self, excepthook=excepthook, threads=threads, signals=signals,
+            fault_handler=fault_handler).install()
+        return self._crash_handler
+
+    def add_summary(self, types: tuple[str, ...]=('WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL'),
+                    max_sites: int=1000, max_messages: int=1000):
+        """
+        Counts the messages, so a summary (the counts per type, the
+        warning/error call sites and the first occurrence of each
+        distinct warning/error) is written by ``__exit__``
+
+        Parameters
+        ----------
+        types : tuple[str]; default=('WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+            the message types that are counted per call site/message
+        max_sites : int; default=1000
+            the number of call sites that are counted
+        max_messages : int; default=1000
+            the number of distinct messages that are kept
+
+        Returns
+        -------
+        summary : LogSummary
+            ``summary.write(log)`` writes the summary on demand
+
+        """
+        from cpylog.summary_utils import LogSummary
+        if self._summary is not None:
+            self.remove_sink(self._summary)
+        self._summary = LogSummary(types=types, max_sites=max_sites,
+                                   max_messages=max_messages)
+        self.add_sink(self._summary)
+        return self._summary
+
+    def msg_typ_file(self, typ: str, msg: str, nframe: int=3) -> None:
+        """
+        Deprecated; use ``msg_typ``, which writes to the screen and the
+        file with a single frame lookup
+        """
+        import warnings
+        warnings.warn('FileLogger.msg_typ_file is deprecated; use msg_typ',
+                      DeprecationWarning, stacklevel=2)
+        # one more frame for msg_typ_file
+        self.msg_typ(typ, msg, nframe=nframe + 1)
+
+    def _set_outputs(self) -> None:
+        """sets the log_func based on the screen/file outputs"""
+        loggers = []
+        if self.include_stream:
+            loggers.append(self._stream_log_func)
+        if self._routes:
+            loggers.append(self._file_logging_routed)
+        elif self._file is not None:
+            loggers.append(self.file_logging)
+        loggers.extend(self._sinks)
+        self.loggers = loggers
+        if len(loggers) == 1:
+            self._set_log_func(loggers[0])
+        else:
+            self._set_loggers()
 
     def __repr__(self) -> str:
         msg = (f'FileLogger(level={self.level!r}, filename={self._filename}, '
@@ -494,33 +1426,40 @@ class FileLogger(SimpleLogger):
         #print('del...')
         if self._file is not None:
             self._file.close()
+        for unused_types, route_file in getattr(self, '_routes', ()):
+            route_file.close()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exct_type, exce_value, traceback):
-        if self._file is not None:
-            #print(f'closing {self._filename}')
-            self._file.close()
+        try:
+            if self._summary is not None and (self._file is None or not self._file.closed):
+                self._summary.write(self)
+        finally:
+            # the files and sinks are closed even if a sink fails
+            if self._crash_handler is not None:
+                self._crash_handler.uninstall()
+                self._crash_handler = None
+            if self._file is not None:
+                #print(f'closing {self._filename}')
+                self._file.close()
+            for unused_types, route_file in self._routes:
+                route_file.close()
+            for sink in self._sinks:
+                if hasattr(sink, 'close'):
+                    sink.close()
+
+            # a later message only goes to the screen and the open sinks
+            self._file = None
+            self._routes = []
+            self._sinks = [sink for sink in self._sinks if not hasattr(sink, 'close')]
+            self._summary = None
+            self._set_outputs()
         #print(f'cleanup {self._filename}')
 
-    def msg_typ_file(self, typ: str, msg: str) -> None:
-        """
-        Log message of a given type
-
-        Parameters
-        ----------
-        typ : str
-            type of a message (e.g. INFO)
-        msg : str
-            message to be logged
-
-        """
-        lineno, filename = properties()
-        for log_func in self.loggers:
-            log_func(typ, filename, lineno, msg)
-
-    def file_logging(self, typ: str, filename: str, lineno: int, msg: str) -> None:
+    def file_logging(self, typ: str, filename: str, lineno: int, msg: str,
+                     func: str='') -> None:
         """
         Default logging function. Takes a text and outputs to stdout.
 
@@ -534,26 +1473,50 @@ class FileLogger(SimpleLogger):
             line number
         msg : str
             message to be displayed
+        func : str; default=''
+            the calling function
 
-        Message will have format 'typ: msg'
+        Message will have format set by ``set_format``
 
         """
-        # max length of 'INFO', 'DEBUG', 'WARNING', etc.
-        name = '%-8s' % (typ + ':')
-        #filename_n = '%s:%s' % (filename, lineno)
-        #msg2 = ' %-28s %s\n' % (filename_n, msg)
-
-        #print('file name=%r msg=%r' % (name, msg))
-        filename_lineno = f'{filename}:{lineno}'
-        msg2 = self._level_filename_fmt % (filename_lineno, msg)
-        self._file.write((name + msg2) if typ else msg2)
-        self._file.flush()
-
-def log_exc(log: SimpleLogger, limit=None, chain: bool=True):
+        # shares the cached columns with stdout_logging
+        self._file.write(self._formatter.format(typ, filename, lineno, msg, func))
+        self._nunflushed += 1
+        if self._nunflushed >= self._flush_every:
+            self._file.flush()
+            self._nunflushed = 0
+
+    def _file_logging_routed(self, typ: str, filename: str, lineno: int, msg: str,
+                             func: str='') -> None:
+        """``file_logging`` that also writes the line to the files of add_file"""
+        line = self._formatter.format(typ, filename, lineno, msg, func)
+        if self._file is not None:
+            self._file.write(line)
+        for types, route_file in self._routes:
+            if typ in types:
+                route_file.write(line)
+        self._nunflushed += 1
+        if self._nunflushed >= self._flush_every:
+            self._flush_files()
+
+
+def _open_log_file(filename: str, mode: str, encoding: str, raw: bool):
+    """opens a text file or an FdWriter (raw=True)"""
+    if raw:
+        from cpylog.fd_utils import FdWriter
+        return FdWriter(filename, mode, encoding=encoding)
+    return open(filename, mode, encoding=encoding)
+
+def log_exc(log: SimpleLogger, limit=None, chain: bool=True,
+            max_chars: Optional[int]=None, dedupe: bool=False,
+            structured: bool=False):
     """Shorthand for 'log_exception(log, *sys.exc_info(), limit)'."""
-    log_exception(log, *sys.exc_info(), limit=limit, chain=chain)
+    log_exception(log, *sys.exc_info(), limit=limit, chain=chain,
+                  max_chars=max_chars, dedupe=dedupe, structured=structured)
 
-def log_exception(log: SimpleLogger, etype, value, tb, limit=None, chain: bool=True):
+def log_exception(log: SimpleLogger, etype, value, tb, limit=None, chain: bool=True,
+                  max_chars: Optional[int]=None, dedupe: bool=False,
+                  structured: bool=False):
     """Print exception up to 'limit' stack trace entries from 'tb' to 'log'.
 
     This differs from print_tb() in the following ways:
@@ -565,12 +1528,54 @@ def log_exception(log: SimpleLogger, etype, value, tb, limit=None, chain: bool=T
           caret on the next line indicating the approximate position
           of the error.
 
+    Parameters
+    ----------
+    limit : int; default=None
+        the number of frames to log (negative: the last frames)
+    chain : bool; default=True
+        log the chained exceptions (__cause__/__context__)
+    max_chars : int; default=None
+        limits the size of the message by removing the middle
+    dedupe : bool; default=False
+        an identical traceback (same type and frames) that was already
+        logged is logged as a single line with a repeat counter
+    structured : bool; default=False
+        the outputs that take a ``fields`` argument (e.g., a JSON sink)
+        also get the type/message/frames as fields['exception']
+        (see ``get_traceback_fields``); the text outputs get the text
+
     """
-    lines = []
-    for line in traceback.TracebackException(
-            type(value), value, tb, limit=limit).format(chain=chain):
-        lines.append(line)
-    log.error('\n' + ''.join(lines))
+    # skip the traceback work if the message won't be written
+    # (e.g., a BoundLogger doesn't have a level)
+    is_enabled_for = getattr(log, 'is_enabled_for', None)
+    if is_enabled_for is not None and not is_enabled_for('ERROR'):
+        return
+
+    # a BoundLogger shares the counts of its log
+    counts = getattr(getattr(log, 'log', log), '_traceback_counts', None)
+    if dedupe and counts is not None:
+        key = get_traceback_key(etype, tb)
+        count = counts.get(key, 0) + 1
+        if count == 1 and len(counts) > MAX_TRACEBACK_KEYS:
+            counts.clear()
+        counts[key] = count
+        if count > 1:
+            log.error(f'{etype.__name__}: {value} '
+                      f'(same traceback as before; repeated {count} times)')
+            return
+
+    msg = format_exception(type(value), value, tb, limit=limit, chain=chain)
+    if max_chars is not None:
+        msg = truncate_middle(msg, max_chars)
+    if structured:
+        # the exception is only a field; the text prefix is unchanged
+        context = getattr(log, 'context', None) or _get_context()
+        fields = {} if context is None else context.fields
+        exc_context = LogContext(
+            {**fields, 'exception': get_traceback_fields(etype, value, tb, limit=limit)},
+            prefix='' if context is None else context.prefix)
+        log = BoundLogger(getattr(log, 'log', log), exc_context)
+    log.error('\n' + msg)
 
 
 if __name__ == '__main__':  # pragma: no cover
@@ -0,0 +1,45 @@
+"""
+cpylog command line
+
+python -m cpylog collect [--host HOST] [--port PORT] [--format {text,color,json}]
+                         [--output OUTPUT] [--delay DELAY] [--no-udp] [--no-tcp]
+"""
+from __future__ import annotations
+import argparse
+from typing import Optional
+
+
+def main(argv: Optional[list[str]]=None) -> None:
+    """runs the cpylog command line"""
+    from cpylog.collector import Collector, DEFAULT_PORT, OUTPUT_FORMATS
+    parser = argparse.ArgumentParser(prog='python -m cpylog')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    collect = subparsers.add_parser(
+        'collect', help='merges the messages from cpylog.network sinks')
+    collect.add_argument('--host', default='', help="the interface (default='' -> all)")
+    collect.add_argument('--port', type=int, default=DEFAULT_PORT,
+                         help=f'the UDP/TCP port (default={DEFAULT_PORT})')
+    collect.add_argument('--format', dest='output_format', default='text',
+                         choices=sorted(OUTPUT_FORMATS), help='the output format')
+    collect.add_argument('--output', default=None, help='the output file (default=stdout)')
+    collect.add_argument('--delay', type=float, default=0.5,
+                         help='the time that messages are held for sorting (default=0.5)')
+    collect.add_argument('--no-udp', dest='udp', action='store_false', help="don't listen for UDP")
+    collect.add_argument('--no-tcp', dest='tcp', action='store_false', help="don't listen for TCP")
+    args = parser.parse_args(argv)
+
+    if args.command == 'collect':
+        stream = None if args.output is None else open(args.output, 'a', encoding='utf-8')
+        try:
+            collector = Collector(host=args.host, port=args.port, udp=args.udp, tcp=args.tcp,
+                                  delay=args.delay, output_format=args.output_format,
+                                  stream=stream)
+            collector.serve_forever()
+        finally:
+            if stream is not None:
+                stream.close()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
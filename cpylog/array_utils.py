@@ -0,0 +1,105 @@
+"""
+Summarizes large NumPy arrays in messages (see ``SimpleLogger.set_array_format``).
+
+defines:
+  - ArrayFormatter(threshold=100, mode='summary', edgeitems=3)
+
+The arrays must be passed as arguments (not in an f-string), so the
+summary is only made for a message that's written:
+
+>>> log.set_array_format(threshold=100)
+>>> log.debug('x = %s', x)
+DEBUG:   file.py:2                    x = array(shape=(1000000,), dtype=float64, min=-4.8, max=5.1, nan=0)
+
+NumPy is never imported by cpylog.  If NumPy wasn't imported by the
+caller, a value can't be an array.
+"""
+from __future__ import annotations
+import sys
+from typing import Any
+
+ARRAY_MODES = {'summary', 'truncate'}
+
+
+class ArrayFormatter:
+    """
+    Renders the arrays in the message arguments that are larger than a
+    threshold as:
+      - summary:  array(shape=(1000, 3), dtype=float64, min=0, max=1, nan=2)
+      - truncate: the repr with only the first/last edgeitems values
+    Other arguments are unchanged.
+    """
+    def __init__(self, threshold: int=100, mode: str='summary',
+                 edgeitems: int=3) -> None:
+        """
+        Creates an ArrayFormatter
+
+        Parameters
+        ----------
+        threshold : int; default=100
+            arrays with more than this many values are summarized
+        mode : str; default='summary'
+            'summary' : shape/dtype/min/max/nan-count
+            'truncate' : the repr with edgeitems values on each end
+        edgeitems : int; default=3
+            the number of values on each end for mode='truncate'
+
+        """
+        assert mode in ARRAY_MODES, f'mode={mode!r} must be in {sorted(ARRAY_MODES)}'
+        assert threshold >= 0, f'threshold={threshold!r}'
+        assert edgeitems >= 1, f'edgeitems={edgeitems!r}'
+        self.threshold = threshold
+        self.mode = mode
+        self.edgeitems = edgeitems
+
+    def format(self, msg: str, args: tuple[Any, ...] | dict[str, Any]) -> str:
+        """
+        formats the message like ``msg % args``; args may be a dict
+        for a '%(name)s' message
+        """
+        numpy = sys.modules.get('numpy')
+        if numpy is not None:
+            ndarray = numpy.ndarray
+            if isinstance(args, dict):
+                args = {key: self.format_array(arg) if isinstance(arg, ndarray) else arg
+                        for key, arg in args.items()}
+            else:
+                args = tuple(self.format_array(arg) if isinstance(arg, ndarray) else arg
+                             for arg in args)
+        return msg % args
+
+    def format_array(self, array: Any) -> Any:
+        """summarizes a large array; a small array is unchanged"""
+        if array.size <= self.threshold:
+            return array
+        if self.mode == 'truncate':
+            return _truncate(array, self.edgeitems)
+        return _summarize(array)
+
+    def __repr__(self) -> str:
+        return (f'ArrayFormatter(threshold={self.threshold}, mode={self.mode!r}, '
+                f'edgeitems={self.edgeitems})')
+
+
+def _summarize(array: Any) -> str:
+    """array(shape=(1000, 3), dtype=float64, min=0, max=1, nan=2)"""
+    import numpy as np  # already imported by the caller
+    kind = array.dtype.kind
+    fields = [f'shape={array.shape}', f'dtype={array.dtype}']
+    if kind in 'fc':
+        nnan = int(np.count_nonzero(np.isnan(array)))
+        if kind == 'f' and nnan < array.size:
+            fields.append(f'min={np.nanmin(array):g}')
+            fields.append(f'max={np.nanmax(array):g}')
+        fields.append(f'nan={nnan}')
+    elif kind in 'biu':
+        fields.append(f'min={array.min()}')
+        fields.append(f'max={array.max()}')
+    return f'array({", ".join(fields)})'
+
+
+def _truncate(array: Any, edgeitems: int) -> str:
+    """the repr with edgeitems values on each end"""
+    import numpy as np  # already imported by the caller
+    with np.printoptions(threshold=0, edgeitems=edgeitems):
+        return repr(array)
@@ -0,0 +1,173 @@
+"""
+Delivers the messages to a GUI in batches, so a burst of messages
+doesn't repaint the GUI for every line.
+
+defines:
+  - BatchedLogFunc(callback, interval=0.1, max_records=1000, notify=None)
+
+The messages are kept as compact records (``cpylog.record.LogRecord``)
+until they're delivered as a list.
+
+Example (Qt)
+------------
+>>> def append_records(records):
+...     text = ''.join(f'{record.typ}: {record.message}\n' for record in records)
+...     window.append_text(text)
+>>> batch = BatchedLogFunc(append_records)
+>>> log = SimpleLogger(level='debug', log_func=batch)
+>>> timer = QTimer()
+>>> timer.timeout.connect(batch.deliver)  # runs on the GUI thread
+>>> timer.start(100)
+
+Example (tkinter)
+-----------------
+>>> batch = BatchedLogFunc(
+...     text_widget_append,
+...     notify=lambda delay: root.after(int(1000 * delay), batch.deliver))
+"""
+from __future__ import annotations
+import time
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+from cpylog.record import LogRecord, LEVEL_CODES, get_level_code
+
+
+class BatchedLogFunc:
+    """
+    A log_func that collects the messages and calls
+    ``callback(records)`` with a list of them.
+
+    There are two ways to deliver the messages:
+      - notify=None:
+          ``callback`` is called by the log call (i.e., on the logging
+          thread) when ``max_records`` are waiting or ``interval``
+          seconds have passed since the last delivery.  ``flush``
+          delivers the rest.  A GUI main loop may also call ``deliver``
+          from a timer.
+      - notify=func:
+          ``notify(delay)`` is called (on the logging thread) once per
+          batch and should schedule ``deliver`` on the GUI thread after
+          delay seconds (e.g., ``root.after``), so ``callback`` is only
+          called on the GUI thread.
+
+    Appending a message is thread-safe and doesn't block on the
+    callback.
+    """
+    def __init__(self, callback: Callable[[list[LogRecord]], None],
+                 interval: float=0.1, max_records: int=1000,
+                 notify: Optional[Callable[[float], None]]=None) -> None:
+        """
+        Creates a BatchedLogFunc
+
+        Parameters
+        ----------
+        callback : func(records)
+            gets a list of LogRecords
+            (typ, filename, lineno, message, func, time)
+        interval : float; default=0.1
+            the minimum time between deliveries in seconds
+            (e.g., 0.1 is at most 10 repaints per second)
+        max_records : int; default=1000
+            deliver early when this many messages are waiting
+        notify : func(delay); default=None
+            schedules ``deliver`` on the GUI thread after delay seconds
+
+        """
+        assert interval >= 0., f'interval={interval!r}'
+        assert max_records >= 1, f'max_records={max_records!r}'
+        self.callback = callback
+        self.interval = interval
+        self.max_records = max_records
+        self.notify = notify
+
+        # deque.append/popleft are atomic, so the log call doesn't lock
+        self._records: deque[LogRecord] = deque()
+        self._last_delivery = time.monotonic()
+        self._lock = threading.Lock()
+        # a deliver was scheduled by notify
+        self._scheduled = False
+        self._deliver_lock = threading.Lock()
+
+    def __call__(self, typ: str, filename: str, lineno: int, msg: str,
+                 func: str='') -> None:
+        """collects a message (the log_func)"""
+        try:
+            levelno = LEVEL_CODES[typ]
+        except KeyError:
+            levelno = get_level_code(typ)
+        records = self._records
+        records.append(LogRecord(levelno, time.time_ns(), filename, lineno, msg, func))
+        nrecords = len(records)
+
+        if self.notify is None:
+            if (nrecords >= self.max_records or
+                    time.monotonic() - self._last_delivery >= self.interval):
+                self.deliver()
+            return
+
+        if nrecords >= self.max_records:
+            # a scheduled deliver may be waiting; deliver the full batch now
+            self._notify(0.)
+        elif not self._scheduled:
+            delay = self._last_delivery + self.interval - time.monotonic()
+            self._notify(max(delay, 0.))
+
+    def _notify(self, delay: float) -> None:
+        with self._lock:
+            if self._scheduled and delay > 0.:
+                return
+            self._scheduled = True
+        self.notify(delay)
+
+    def __len__(self) -> int:
+        """the number of waiting messages"""
+        return len(self._records)
+
+    def drain(self) -> list[LogRecord]:
+        """gets the waiting messages without calling the callback"""
+        records = self._records
+        popleft = records.popleft
+        # messages that are added while draining wait for the next batch
+        return [popleft() for unused_i in range(len(records))]
+
+    def deliver(self, blocking: bool=False) -> int:
+        """
+        Calls the callback with the waiting messages
+
+        Parameters
+        ----------
+        blocking : bool; default=False
+            wait if another thread is delivering
+
+        Returns
+        -------
+        nrecords : int
+            the number of messages that were delivered
+
+        """
+        # another thread is already delivering
+        if not self._deliver_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            with self._lock:
+                self._scheduled = False
+            self._last_delivery = time.monotonic()
+            records = self.drain()
+            if records:
+                self.callback(records)
+        finally:
+            self._deliver_lock.release()
+        return len(records)
+
+    def flush(self) -> None:
+        """delivers the waiting messages"""
+        self.deliver(blocking=True)
+
+    # called by FileLogger.__exit__ for a sink
+    close = flush
+
+    def __repr__(self) -> str:
+        return (f'BatchedLogFunc(interval={self.interval}, max_records={self.max_records}, '
+                f'nwaiting={len(self._records)})')
@@ -0,0 +1,249 @@
+"""
+Collects the messages from the network sinks (``cpylog.network``) of
+many processes/nodes into one log.
+
+defines:
+  - Collector(host='', port=9020, udp=True, tcp=True, delay=0.5)
+  - format_record(record, output_format='text')
+
+The messages are ordered by their timestamp.  A message is held for
+``delay`` seconds, so a message from a slow node can be put before
+newer messages from a fast node.
+
+Command line::
+
+    python -m cpylog collect --port 9020 --format color
+    python -m cpylog collect --port 9020 --format json --output cluster.jsonl
+"""
+from __future__ import annotations
+import sys
+import json
+import time
+import heapq
+import socket
+import selectors
+from itertools import count
+from typing import Optional, TextIO
+
+from cpylog.network import NetRecord, unpack_records
+from cpylog.context import render_prefix
+
+OUTPUT_FORMATS = {'text', 'color', 'json'}
+DEFAULT_PORT = 9020
+# the maximum size of a UDP datagram
+_MAX_DATAGRAM = 65535
+
+
+def _get_colors() -> Optional[dict[str, str]]:
+    """gets the colorama colors; None if colorama isn't installed"""
+    try:
+        from cpylog.colorama_utils import RED, GREEN, CYAN, YELLOW
+    except ImportError:
+        return None
+    return {'DEBUG': CYAN, 'INFO': GREEN, 'WARNING': YELLOW, '': RED}
+
+
+def format_record(record: NetRecord, output_format: str='text',
+                  colors: Optional[dict[str, str]]=None) -> str:
+    """
+    Formats a message from the network
+
+    Parameters
+    ----------
+    record : NetRecord
+        the message
+    output_format : str; default='text'
+        text:  '12:00:00.123 node1[4321] INFO:    file.py:10   [case=A12] msg'
+        color: text with colorama colors
+        json:  a JSON line (with the context fields as 'fields')
+    colors : dict[str, str]; default=None
+        the colors for output_format='color'
+
+    Returns
+    -------
+    line : str
+        the line ending with '\\n'
+
+    """
+    if output_format == 'json':
+        return json.dumps(record._asdict()) + '\n'
+
+    msec = int(record.time * 1000) % 1000
+    time_str = time.strftime('%H:%M:%S', time.localtime(record.time))
+    label = f'{record.typ}:' if record.typ else ''
+    location = f'{record.filename}:{record.lineno}'
+    line = (f'{time_str}.{msec:03d} {record.source}[{record.pid}] '
+            f'{label:<8} {location:<28} {render_prefix(record.fields)}{record.msg}\n')
+    if colors is not None:
+        line = colors.get(record.typ, colors['']) + line
+    return line
+
+
+class Collector:
+    """
+    Receives messages from UDPSink/TCPSink and writes them in timestamp
+    order.
+
+    Example
+    -------
+    >>> collector = Collector(port=9020, output_format='color')
+    >>> collector.serve_forever()
+    """
+    def __init__(self, host: str='', port: int=DEFAULT_PORT,
+                 udp: bool=True, tcp: bool=True, delay: float=0.5,
+                 output_format: str='text', stream: Optional[TextIO]=None) -> None:
+        """
+        Creates a Collector
+
+        Parameters
+        ----------
+        host : str; default=''
+            the interface to listen on ('' is all interfaces)
+        port : int; default=9020
+            the port for UDP and TCP (0 picks a free port)
+        udp / tcp : bool; default=True
+            listen for UDPSink / TCPSink messages
+        delay : float; default=0.5
+            the time that a message is held for sorting in seconds
+        output_format : str; default='text'
+            'text', 'color' or 'json'
+        stream : file; default=None -> sys.stdout
+            the output
+
+        """
+        assert udp or tcp, 'udp and/or tcp must be True'
+        assert output_format in OUTPUT_FORMATS, f'output_format={output_format!r}'
+        self.delay = delay
+        self.output_format = output_format
+        self.stream = sys.stdout if stream is None else stream
+        self.colors = _get_colors() if output_format == 'color' else None
+        self.nrecords = 0
+
+        self._selector = selectors.DefaultSelector()
+        # (time, seq, record); seq keeps the order of equal times
+        self._heap: list[tuple[float, int, NetRecord]] = []
+        self._seq = count()
+
+        self.udp_port: Optional[int] = None
+        self.tcp_port: Optional[int] = None
+        if udp:
+            udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            udp_sock.bind((host, port))
+            udp_sock.setblocking(False)
+            self.udp_port = udp_sock.getsockname()[1]
+            self._selector.register(udp_sock, selectors.EVENT_READ, self._read_udp)
+        if tcp:
+            tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            tcp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            tcp_sock.bind((host, port))
+            tcp_sock.listen()
+            tcp_sock.setblocking(False)
+            self.tcp_port = tcp_sock.getsockname()[1]
+            self._selector.register(tcp_sock, selectors.EVENT_READ, self._accept)
+
+    def _read_udp(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                data = sock.recv(_MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            records = unpack_records(data)[0]
+            self._push(records)
+
+    def _accept(self, sock: socket.socket) -> None:
+        try:
+            conn = sock.accept()[0]
+        except (BlockingIOError, InterruptedError):
+            return
+        conn.setblocking(False)
+        # the connection keeps the data from an incomplete frame
+        self._selector.register(conn, selectors.EVENT_READ, _Connection(self))
+
+    def _push(self, records: list[NetRecord]) -> None:
+        for record in records:
+            heapq.heappush(self._heap, (record.time, next(self._seq), record))
+
+    def poll(self, timeout: float=0.1) -> int:
+        """
+        Receives messages and writes the ones older than delay
+
+        Parameters
+        ----------
+        timeout : float; default=0.1
+            the maximum time to wait for messages in seconds
+
+        Returns
+        -------
+        nwritten : int
+            the number of messages written
+
+        """
+        for key, unused_events in self._selector.select(timeout):
+            key.data(key.fileobj)
+        return self._write(time.time() - self.delay)
+
+    def drain(self) -> int:
+        """writes all the received messages"""
+        return self._write(float('inf'))
+
+    def _write(self, max_time: float) -> int:
+        heap = self._heap
+        lines = []
+        while heap and heap[0][0] <= max_time:
+            record = heapq.heappop(heap)[2]
+            lines.append(format_record(record, self.output_format, self.colors))
+        if lines:
+            self.stream.write(''.join(lines))
+            self.stream.flush()
+            self.nrecords += len(lines)
+        return len(lines)
+
+    def serve_forever(self, poll_interval: float=0.1) -> None:
+        """writes messages until Ctrl+C"""
+        try:
+            while True:
+                self.poll(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.drain()
+            self.close()
+
+    def close(self) -> None:
+        """closes the sockets"""
+        for key in list(self._selector.get_map().values()):
+            self._selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self._selector.close()
+
+    def __enter__(self) -> Collector:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.drain()
+        self.close()
+
+    def __repr__(self) -> str:
+        return (f'Collector(udp_port={self.udp_port}, tcp_port={self.tcp_port}, '
+                f'delay={self.delay}, output_format={self.output_format!r})')
+
+
+class _Connection:
+    """reads frames from a TCPSink connection"""
+    def __init__(self, collector: Collector) -> None:
+        self.collector = collector
+        self.data = b''
+
+    def __call__(self, conn: socket.socket) -> None:
+        try:
+            data = conn.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.collector._selector.unregister(conn)
+            conn.close()
+            return
+        records, self.data = unpack_records(self.data + data)
+        self.collector._push(records)
@@ -0,0 +1,306 @@
+"""
+Reloads the configuration of a live log from a TOML/JSON file.
+
+defines:
+  - load_config(filename)
+  - apply_config(log, config)
+  - ConfigWatcher(filename, log, interval=1.0)
+  - install_reload_signal(filename, log, signum=signal.SIGUSR1)
+
+Example config (TOML)::
+
+    level = "info"           # debug, info, warning, error, critical
+    fmt = "{label:<8} {location:<28} {msg}"
+    include_stream = true    # FileLogger: write to the screen
+    flush = true             # FileLogger: true, false, or every N messages
+
+    [loggers.solver]         # log.get_child('solver')
+    level = "debug"
+
+    [loggers."solver.linear"]
+    level = "inherit"        # use the parent level
+
+The same structure may be used in a JSON file.  The config is checked
+before anything is changed, so a bad file doesn't leave the log partially
+configured.  The levels are applied by swapping the level methods of the
+log, so messages never check the config.
+
+Only the levels, the format, the screen output and the flush policy are
+reloaded.  The files, routes and sinks (e.g., a UDPSink) are set up in the
+code (e.g., FileLogger, add_sink), so they aren't part of the config.
+"""
+from __future__ import annotations
+import os
+import json
+import threading
+from typing import Any, Optional, TYPE_CHECKING
+
+from cpylog.format_utils import LineFormatter
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import SimpleLogger
+
+LEVELS = {'debug', 'info', 'warning', 'error', 'critical'}
+ROOT_KEYS = {'level', 'fmt', 'include_stream', 'flush', 'loggers'}
+CHILD_KEYS = {'level'}
+
+
+def load_config(filename: str) -> dict[str, Any]:
+    """
+    Loads a config file
+
+    Parameters
+    ----------
+    filename : str
+        a *.toml or *.json file
+
+    Returns
+    -------
+    config : dict
+        the checked config
+
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.toml':
+        try:
+            import tomllib  # Python 3.11+
+        except ImportError:  # pragma: no cover
+            import tomli as tomllib  # type: ignore
+        with open(filename, 'rb') as toml_file:
+            config = tomllib.load(toml_file)
+    elif ext == '.json':
+        with open(filename, 'r') as json_file:
+            config = json.load(json_file)
+    else:
+        raise ValueError(f'config file={filename!r} must be a *.toml or *.json file')
+    check_config(config)
+    return config
+
+
+def check_config(config: dict[str, Any]) -> None:
+    """checks a config; raises a ValueError"""
+    if not isinstance(config, dict):
+        raise ValueError(f'config must be a dict; config={config!r}')
+    _check_keys(config, ROOT_KEYS, 'config')
+    if 'level' in config and config['level'] not in LEVELS:
+        raise ValueError(f'level={config["level"]!r} must be in {sorted(LEVELS)}')
+    if 'fmt' in config:
+        fmt = config['fmt']
+        if not isinstance(fmt, str):
+            raise ValueError(f'fmt={fmt!r} must be a str')
+        # raises a ValueError for an invalid field
+        LineFormatter(fmt)
+    if 'include_stream' in config and not isinstance(config['include_stream'], bool):
+        raise ValueError(f'include_stream={config["include_stream"]!r} must be a bool')
+    if 'flush' in config:
+        flush = config['flush']
+        if not (isinstance(flush, bool) or isinstance(flush, int) and flush >= 1):
+            raise ValueError(f'flush={flush!r} must be a bool or an int >= 1')
+
+    loggers = config.get('loggers', {})
+    if not isinstance(loggers, dict):
+        raise ValueError(f'loggers must be a table; loggers={loggers!r}')
+    for name, child_config in loggers.items():
+        _check_keys(child_config, CHILD_KEYS, f'loggers.{name}')
+        level = child_config.get('level', 'inherit')
+        if level not in LEVELS and level != 'inherit':
+            raise ValueError(f'loggers.{name}.level={level!r} must be in '
+                             f'{sorted(LEVELS)} or "inherit"')
+
+
+def _check_keys(config: dict[str, Any], allowed_keys: set[str], name: str) -> None:
+    """checks for misspelled keys"""
+    if not isinstance(config, dict):
+        raise ValueError(f'{name} must be a table; {name}={config!r}')
+    bad_keys = set(config) - allowed_keys
+    if bad_keys:
+        raise ValueError(f'{name} has invalid keys={sorted(bad_keys)}; '
+                         f'allowed={sorted(allowed_keys)}')
+
+
+def apply_config(log: SimpleLogger, config: dict[str, Any]) -> None:
+    """
+    Applies a config to a live log
+
+    Parameters
+    ----------
+    log : SimpleLogger / FileLogger
+        the log to update
+    config : dict
+        the config (see ``cpylog.config``)
+
+    The whole config is checked against the log before anything is
+    changed (a ValueError is raised), so the log isn't left partially
+    configured.
+
+    """
+    check_config(config)
+    _check_log(log, config)
+
+    if 'fmt' in config:
+        log.set_format(config['fmt'])
+    if 'include_stream' in config:
+        log.set_include_stream(config['include_stream'])
+    if 'flush' in config:
+        log.set_flush(config['flush'])
+    if 'level' in config:
+        log.set_level(config['level'])
+    for name, child_config in config.get('loggers', {}).items():
+        level = child_config.get('level', 'inherit')
+        log.get_child(name).set_level(None if level == 'inherit' else level)
+
+
+def _check_log(log: SimpleLogger, config: dict[str, Any]) -> None:
+    """checks the parts of a config that depend on the log"""
+    is_file_logger = hasattr(log, 'set_flush')
+    if ('include_stream' in config or 'flush' in config) and not is_file_logger:
+        raise ValueError('include_stream/flush require a FileLogger')
+    if config.get('include_stream') is False and log._file is None and not log._routes:
+        raise ValueError('include_stream=False requires a FileLogger with a file')
+
+
+class ConfigWatcher:
+    """
+    Polls the modification time of a config file in a background thread
+    and applies the config when it changes.
+
+    Example
+    -------
+    >>> watcher = ConfigWatcher('cpylog.toml', log, interval=5.0)
+    >>> watcher.start()
+    ...
+    >>> watcher.stop()
+    """
+    def __init__(self, filename: str, log: SimpleLogger,
+                 interval: float=1.0) -> None:
+        """
+        Creates a ConfigWatcher
+
+        Parameters
+        ----------
+        filename : str
+            a *.toml or *.json file
+        log : SimpleLogger / FileLogger
+            the log to update
+        interval : float; default=1.0
+            the time between checks in seconds
+
+        """
+        self.filename = filename
+        self.log = log
+        self.interval = interval
+        self._mtime: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """
+        Applies the config if the file changed
+
+        Returns
+        -------
+        is_updated : bool
+            was the config applied
+
+        """
+        try:
+            mtime = os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        reload_config(self.filename, self.log)
+        return True
+
+    def start(self) -> ConfigWatcher:
+        """applies the config and starts the background thread"""
+        self.check()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='cpylog-config', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """stops the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def __enter__(self) -> ConfigWatcher:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def __repr__(self) -> str:
+        return f'ConfigWatcher(filename={self.filename!r}, interval={self.interval})'
+
+
+def reload_config(filename: str, log: SimpleLogger) -> bool:
+    """
+    Loads and applies a config file.  A bad config is logged as a
+    critical message (so the level doesn't hide it) instead of raising,
+    so a long job isn't stopped.
+
+    Returns
+    -------
+    is_updated : bool
+        was the config applied
+
+    """
+    try:
+        config = load_config(filename)
+        apply_config(log, config)
+    except Exception as error:
+        log.critical(f'failed to reload config={filename!r}\n{type(error).__name__}: {error}')
+        return False
+    log.info(f'reloaded config={filename!r}')
+    return True
+
+
+def install_reload_signal(filename: str, log: SimpleLogger, signum: Optional[int]=None):
+    """
+    Reloads the config when the process gets a signal
+    (e.g., ``kill -USR1 <pid>``).  The signal handler only sets a flag;
+    the config is loaded and logged by a background thread, so the
+    handler doesn't write to the log in the middle of another message.
+
+    Parameters
+    ----------
+    filename : str
+        a *.toml or *.json file
+    log : SimpleLogger / FileLogger
+        the log to update
+    signum : int; default=None -> signal.SIGUSR1
+        the signal (not available on Windows)
+
+    Returns
+    -------
+    old_handler : function
+        the previous signal handler
+
+    """
+    import signal
+    if signum is None:
+        if not hasattr(signal, 'SIGUSR1'):
+            raise RuntimeError('SIGUSR1 is not supported on this platform; '
+                               'use ConfigWatcher')
+        signum = signal.SIGUSR1
+
+    reload_event = threading.Event()
+    def reload_loop():
+        while True:
+            reload_event.wait()
+            reload_event.clear()
+            reload_config(filename, log)
+    threading.Thread(target=reload_loop, name='cpylog-config-signal', daemon=True).start()
+
+    def handler(unused_signum, unused_frame):
+        reload_event.set()
+    return signal.signal(signum, handler)
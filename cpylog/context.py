@@ -0,0 +1,166 @@
+"""
+Context fields (e.g., the case id, iteration or worker id) that are
+added to every message.
+
+defines:
+  - LogContext(fields)
+  - BoundLogger(log, context)
+  - contextualize(**fields)
+  - get_context()
+
+Example
+-------
+>>> blog = log.bind(case='A12', iter=3)
+>>> blog.info('converged')
+INFO:    file.py:2                    [case=A12 iter=3] converged
+
+# every message in the block (including the ones from log) has the fields
+>>> with log.contextualize(worker=2):
+...     log.info('started')
+INFO:    file.py:5                    [worker=2] started
+
+The prefix is rendered once when the fields are bound.  Text outputs
+(the screen/file) get the prefix in front of the message.  A log_func
+or sink that takes a ``fields`` keyword argument gets the message
+without the prefix and the fields as a dict.
+
+``contextualize`` uses ``contextvars``, so the fields are local to the
+thread/asyncio task.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional, TYPE_CHECKING
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import SimpleLogger
+
+# the fields from contextualize for the current thread/task
+_CONTEXT: ContextVar[Optional[LogContext]] = ContextVar('cpylog_context', default=None)
+
+
+class LogContext:
+    """the bound fields and the pre-rendered message prefix"""
+    __slots__ = ('fields', 'prefix')
+
+    def __init__(self, fields: dict[str, Any], prefix: Optional[str]=None) -> None:
+        """
+        prefix : str; default=None -> rendered from the fields
+            the prefix of a text output (e.g., without a field that's only
+            for the structured outputs)
+        """
+        self.fields = fields
+        self.prefix = render_prefix(fields) if prefix is None else prefix
+
+    def merge(self, fields: dict[str, Any]) -> LogContext:
+        """gets a new context with more fields (the new fields win)"""
+        return LogContext({**self.fields, **fields})
+
+    def __repr__(self) -> str:
+        return f'LogContext(fields={self.fields!r})'
+
+
+def render_prefix(fields: dict[str, Any]) -> str:
+    """renders the fields as '[case=A12 iter=3] '"""
+    if not fields:
+        return ''
+    return '[' + ' '.join(f'{key}={value}' for key, value in fields.items()) + '] '
+
+
+def get_current_context(fields: dict[str, Any]) -> LogContext:
+    """gets the context from contextualize with more fields"""
+    context = _CONTEXT.get()
+    return LogContext(fields) if context is None else context.merge(fields)
+
+
+def get_context() -> dict[str, Any]:
+    """gets the fields from contextualize for the current thread/task"""
+    context = _CONTEXT.get()
+    return {} if context is None else dict(context.fields)
+
+
+@contextmanager
+def contextualize(**fields: Any) -> Iterator[LogContext]:
+    """
+    Adds fields to every message in a block (for the current thread/task)
+
+    Example
+    -------
+    >>> with contextualize(case='A12'):
+    ...     log.info('started')
+    INFO:    file.py:2                    [case=A12] started
+
+    """
+    token = _CONTEXT.set(get_current_context(fields))
+    try:
+        yield _CONTEXT.get()
+    finally:
+        _CONTEXT.reset(token)
+
+
+class BoundLogger:
+    """
+    A log with context fields (see ``SimpleLogger.bind``).
+
+    The fields are immutable, so a BoundLogger may be shared between
+    threads.  The level check is the same as for the log and the
+    messages go through ``log.msg_typ``, so the sampling/escalation of
+    the log apply.
+    """
+    __slots__ = ('log', 'context')
+
+    def __init__(self, log: SimpleLogger, context: LogContext) -> None:
+        self.log = log
+        self.context = context
+
+    @property
+    def fields(self) -> dict[str, Any]:
+        """the bound fields"""
+        return self.context.fields
+
+    def bind(self, **fields: Any) -> BoundLogger:
+        """gets a BoundLogger with more fields"""
+        return BoundLogger(self.log, self.context.merge(fields))
+
+    def is_enabled_for(self, typ: str) -> bool:
+        """Is a message type (e.g., 'DEBUG') written by the log?"""
+        return self.log.is_enabled_for(typ)
+
+    def _msg_typ(self, typ: str, msg: str, args: tuple) -> None:
+        """
+        nframe=4:
+          0: properties3, 1: msg_typ, 2: _msg_typ, 3: debug, 4: caller
+        """
+        log = self.log
+        if not log._active or typ not in log._enabled_types:
+            return
+        if args:
+            msg = log._format_args(msg, args)
+        log.msg_typ(typ, msg, nframe=4, context=self.context)
+        log._check_escalation(typ)
+
+    def debug(self, msg: str, *args) -> None:
+        """Log DEBUG message"""
+        self._msg_typ('DEBUG', msg, args)
+
+    def info(self, msg: str, *args) -> None:
+        """Log INFO message"""
+        self._msg_typ('INFO', msg, args)
+
+    def warning(self, msg: str, *args) -> None:
+        """Log WARNING message"""
+        self._msg_typ('WARNING', msg, args)
+
+    def error(self, msg: str, *args) -> None:
+        """Log ERROR message"""
+        self._msg_typ('ERROR', msg, args)
+
+    def exception(self, msg: str, *args) -> None:
+        """Log EXCEPTION message"""
+        self._msg_typ('EXCEPTION', msg, args)
+
+    def critical(self, msg: str, *args) -> None:
+        """Log CRITICAL message"""
+        self._msg_typ('CRITICAL', msg, args)
+
+    def __repr__(self) -> str:
+        return f'BoundLogger(log={self.log!r}, fields={self.context.fields!r})'
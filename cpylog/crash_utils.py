@@ -0,0 +1,188 @@
+"""
+Flushes a FileLogger when the program crashes, so a buffered log
+(e.g., ``log.set_flush(False)``) doesn't lose the last messages.
+
+defines:
+  - CrashHandler(log, excepthook=True, threads=True, signals=None,
+                 fault_handler=True)
+
+Example
+-------
+>>> with FileLogger(level='debug', filename='run.log') as log:
+...     log.set_flush(False)
+...     log.install_crash_handler()
+...     run()
+
+The handler:
+ - logs an unhandled exception (``sys.excepthook`` and
+   ``threading.excepthook``) as a critical message with the traceback
+   and flushes; the previous hook is also called if the log is disabled
+   or doesn't write to the screen
+ - flushes at exit (``atexit``)
+ - flushes on a fatal signal (SIGTERM by default; e.g., a job that's
+   killed) and then re-sends the signal to the previous handler
+ - writes the Python traceback of a hard crash (e.g., a segfault) to
+   the log file with ``faulthandler``.  The messages that are still in
+   the file buffer can't be written after a hard crash.
+"""
+from __future__ import annotations
+import os
+import sys
+import atexit
+import signal
+import threading
+import faulthandler
+from typing import Optional, TYPE_CHECKING
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import FileLogger
+
+
+def _get_default_signals() -> tuple[int, ...]:
+    """the signals that end the program (e.g., kill <pid>)"""
+    return (signal.SIGTERM, )
+
+
+class CrashHandler:
+    """
+    Flushes a log on an unhandled exception, at exit and on a fatal
+    signal (see ``FileLogger.install_crash_handler``)
+    """
+    def __init__(self, log: FileLogger, excepthook: bool=True, threads: bool=True,
+                 signals: Optional[tuple[int, ...]]=None,
+                 fault_handler: bool=True) -> None:
+        """
+        Creates a CrashHandler
+
+        Parameters
+        ----------
+        log : FileLogger
+            the log to flush
+        excepthook : bool; default=True
+            log the unhandled exceptions of the main thread
+        threads : bool; default=True
+            log the unhandled exceptions of the other threads
+        signals : tuple[int]; default=None -> (signal.SIGTERM, )
+            the signals that flush the log; () for none
+        fault_handler : bool; default=True
+            write the traceback of a hard crash to the log file
+
+        """
+        self.log = log
+        self.excepthook = excepthook
+        self.threads = threads
+        self.signals = _get_default_signals() if signals is None else tuple(signals)
+        self.fault_handler = fault_handler
+
+        self.installed = False
+        self._old_excepthook = None
+        self._old_threading_excepthook = None
+        self._old_signal_handlers: dict[int, object] = {}
+        self._fault_handler_enabled = False
+
+    def install(self) -> CrashHandler:
+        """installs the hooks"""
+        assert not self.installed, 'the CrashHandler is already installed'
+        if self.excepthook:
+            self._old_excepthook = sys.excepthook
+            sys.excepthook = self._excepthook
+        if self.threads:
+            self._old_threading_excepthook = threading.excepthook
+            threading.excepthook = self._threading_excepthook
+        atexit.register(self.flush)
+
+        # signal handlers can only be set by the main thread
+        if threading.current_thread() is threading.main_thread():
+            for signum in self.signals:
+                self._old_signal_handlers[signum] = signal.signal(signum, self._signal_handler)
+
+        log_file = self.log._file
+        if self.fault_handler and log_file is not None:
+            self._fault_handler_enabled = faulthandler.is_enabled()
+            log_file.flush()
+            faulthandler.enable(file=log_file)
+        self.installed = True
+        return self
+
+    def uninstall(self) -> None:
+        """restores the previous hooks"""
+        if not self.installed:
+            return
+        if sys.excepthook == self._excepthook:
+            sys.excepthook = self._old_excepthook
+        if threading.excepthook == self._threading_excepthook:
+            threading.excepthook = self._old_threading_excepthook
+        atexit.unregister(self.flush)
+
+        for signum, old_handler in self._old_signal_handlers.items():
+            if signal.getsignal(signum) == self._signal_handler:
+                signal.signal(signum, old_handler)
+        self._old_signal_handlers = {}
+
+        if self.fault_handler and self.log._file is not None:
+            # faulthandler can't write to the file after it's closed
+            faulthandler.disable()
+            if self._fault_handler_enabled:
+                faulthandler.enable(file=sys.__stderr__)
+        self.installed = False
+
+    def flush(self) -> None:
+        """flushes the log; the file may already be closed"""
+        try:
+            self.log.flush()
+        except (ValueError, OSError, RuntimeError):
+            # ValueError: the file is closed
+            # RuntimeError: a reentrant flush (a signal during a write)
+            pass
+
+    def _log_exception(self, msg: str, etype, value, tb) -> bool:
+        """
+        Logs the traceback as a critical message, which is written at
+        every level (an error would be hidden at level='critical').
+
+        Returns
+        -------
+        is_written : bool
+            False if the log is disabled
+        """
+        log = self.log
+        if not log.is_enabled_for('CRITICAL'):
+            return False
+        from cpylog.exception_utils import format_exception
+        log.critical(f'{msg}\n' + format_exception(etype, value, tb).rstrip('\n'))
+        self.flush()
+        return True
+
+    def _excepthook(self, etype, value, tb) -> None:
+        """logs an unhandled exception of the main thread"""
+        is_written = self._log_exception(
+            f'unhandled exception: {etype.__name__}: {value}', etype, value, tb)
+        if not is_written or not self.log.include_stream:
+            # the screen still gets the traceback
+            self._old_excepthook(etype, value, tb)
+
+    def _threading_excepthook(self, args) -> None:
+        """logs an unhandled exception of a thread"""
+        if args.exc_type is SystemExit:
+            return
+        thread_name = args.thread.name if args.thread is not None else '?'
+        is_written = self._log_exception(
+            f'unhandled exception in thread {thread_name!r}',
+            args.exc_type, args.exc_value, args.exc_traceback)
+        if not is_written or not self.log.include_stream:
+            self._old_threading_excepthook(args)
+
+    def _signal_handler(self, signum: int, frame) -> None:
+        """flushes the log and re-sends the signal to the previous handler"""
+        try:
+            self.log.critical(f'received signal {signal.Signals(signum).name}')
+        except RuntimeError:
+            # the signal came during a write
+            pass
+        self.flush()
+        old_handler = self._old_signal_handlers.pop(signum, signal.SIG_DFL)
+        signal.signal(signum, old_handler if old_handler is not None else signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+    def __repr__(self) -> str:
+        return (f'CrashHandler(excepthook={self.excepthook}, threads={self.threads}, '
+                f'signals={self.signals}, fault_handler={self.fault_handler})')
@@ -0,0 +1,93 @@
+"""
+Temporarily lowers the level of a log after an error
+(see ``SimpleLogger.set_escalation``).
+
+defines:
+  - EscalationPolicy(trigger='error', level='debug', duration=None, nrecords=None)
+
+Example
+-------
+>>> log = FileLogger(level='info', filename='run.log')
+>>> log.set_escalation(trigger='error', level='debug', duration=60.)
+>>> log.error('singular matrix')   # the next 60 seconds are at debug level
+>>> log.debug('K[3, 3] = 0.0')     # written
+
+The trigger is found by swapping the error methods of the log (e.g.,
+``log.error``) and the escalation is ended by swapping ``msg_typ``, so
+the messages only check the time/count while the log is escalated.
+"""
+from __future__ import annotations
+import sys
+import time
+from typing import Optional
+
+# the message types that trigger an escalation
+TRIGGER_TYPES = {
+    'warning': frozenset({'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL'}),
+    'error': frozenset({'ERROR', 'EXCEPTION', 'CRITICAL'}),
+    'critical': frozenset({'EXCEPTION', 'CRITICAL'}),
+}
+
+# the methods that are swapped to find a trigger
+TRIGGER_METHODS = {
+    'warning': 'WARNING',
+    'error': 'ERROR',
+    'exception': 'EXCEPTION',
+    'critical': 'CRITICAL',
+}
+
+
+class EscalationPolicy:
+    """
+    When to lower the level of a log (trigger) and for how long
+    (duration and/or nrecords).  Another trigger while escalated
+    restarts the duration/count.
+    """
+    def __init__(self, trigger: str='error', level: str='debug',
+                 duration: Optional[float]=None, nrecords: Optional[int]=None) -> None:
+        """
+        Creates an EscalationPolicy
+
+        Parameters
+        ----------
+        trigger : str; default='error'
+            the level that starts the escalation: 'warning', 'error' or 'critical'
+        level : str; default='debug'
+            the level while escalated
+        duration : float; default=None
+            the number of seconds to stay escalated
+        nrecords : int; default=None
+            the number of messages to write while escalated
+            (the first of duration/nrecords ends the escalation)
+
+        """
+        assert trigger in TRIGGER_TYPES, f'trigger={trigger!r} must be in {sorted(TRIGGER_TYPES)}'
+        assert level in {'debug', 'info', 'warning'}, f'level={level!r}'
+        assert duration is not None or nrecords is not None, 'duration and/or nrecords must be set'
+        assert duration is None or duration > 0., f'duration={duration!r}'
+        assert nrecords is None or nrecords >= 1, f'nrecords={nrecords!r}'
+        self.trigger = trigger
+        self.trigger_types = TRIGGER_TYPES[trigger]
+        self.level = level
+        self.duration = duration
+        self.nrecords = nrecords
+
+        # the number of times the log was escalated
+        self.nescalations = 0
+        self._deadline = 0.
+        self._remaining = 0
+
+    def start(self) -> None:
+        """starts/restarts an escalation"""
+        self._deadline = (float('inf') if self.duration is None else
+                          time.monotonic() + self.duration)
+        self._remaining = sys.maxsize if self.nrecords is None else self.nrecords
+
+    def is_done(self) -> bool:
+        """counts a message; is the escalation over?"""
+        self._remaining -= 1
+        return self._remaining < 0 or time.monotonic() > self._deadline
+
+    def __repr__(self) -> str:
+        return (f'EscalationPolicy(trigger={self.trigger!r}, level={self.level!r}, '
+                f'duration={self.duration}, nrecords={self.nrecords})')
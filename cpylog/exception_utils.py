@@ -0,0 +1,67 @@
+"""
+defines:
+  - get_traceback_key(etype, tb)
+  - get_traceback_fields(etype, value, tb, limit=None)
+  - format_exception(etype, value, tb, limit=None, chain=True)
+  - truncate_middle(msg, max_chars)
+"""
+
+# the number of distinct tracebacks that are counted before the
+# repeat counter is reset
+MAX_TRACEBACK_KEYS = 1024
+
+
+def get_traceback_key(etype, tb) -> int:
+    """
+    Gets a hash of the exception type and the (code, lineno) of the
+    frames, which is cheap compared to building the traceback text
+    """
+    key = [etype]
+    while tb is not None:
+        key.append((tb.tb_frame.f_code, tb.tb_lineno))
+        tb = tb.tb_next
+    return hash(tuple(key))
+
+
+def get_traceback_fields(etype, value, tb, limit=None) -> dict:
+    """
+    Gets the exception as data for a structured output (see the
+    ``fields`` of a log_func):
+      {'type': 'ValueError', 'message': 'bad value',
+       'frames': [{'file': 'run.py', 'line': 12, 'func': 'main'}, ...]}
+    The source lines aren't looked up.
+    """
+    frames = []
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        frames.append({'file': code.co_filename, 'line': tb.tb_lineno,
+                       'func': code.co_name})
+        tb = tb.tb_next
+    if limit is not None:
+        # same convention as the traceback module:
+        #   limit > 0: first frames
+        #   limit < 0: last frames
+        frames = frames[:limit] if limit >= 0 else frames[limit:]
+    return {'type': etype.__name__, 'message': str(value), 'frames': frames}
+
+
+def format_exception(etype, value, tb, limit=None, chain: bool=True) -> str:
+    """gets the traceback text"""
+    # traceback is slow to import and only needed for an exception
+    import traceback
+    return ''.join(traceback.TracebackException(
+        etype, value, tb, limit=limit).format(chain=chain))
+
+
+def truncate_middle(msg: str, max_chars: int) -> str:
+    """
+    Limits the length of a message by removing the middle, so the
+    start and the end of a traceback (the error) are kept
+    """
+    nchars = len(msg)
+    if nchars <= max_chars:
+        return msg
+    nhalf = max_chars // 2
+    return (f'{msg[:nhalf]}\n'
+            f'  ... {nchars - 2 * nhalf} characters truncated ...\n'
+            f'{msg[nchars-nhalf:]}')
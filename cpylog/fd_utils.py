@@ -0,0 +1,143 @@
+"""
+Writes the lines of a FileLogger directly to the file descriptor
+(see ``FileLogger(raw=True)``).
+
+defines:
+  - FdWriter(filename, mode='w', encoding='utf-8', max_lines=1000)
+
+The lines are kept as str until the file is flushed, so a batch (e.g.,
+``log.set_flush(100)``) is joined and encoded once and written with a
+single ``os.write`` instead of going through the TextIOWrapper and
+BufferedWriter layers.  The file is opened with O_APPEND, so each write
+goes to the end of the file, even if another process is appending to
+the same file:
+ - regular file: a batch is a single write, so the lines of two
+   processes aren't mixed within a line
+ - pipe/FIFO: a write is only atomic up to PIPE_BUF bytes, so the
+   batch is split into writes of whole lines of up to PIPE_BUF bytes
+
+The newlines aren't translated (e.g., to '\r\n' on Windows).
+"""
+from __future__ import annotations
+import os
+import stat
+
+try:
+    from select import PIPE_BUF
+except ImportError:  # pragma: no cover
+    # Windows; the POSIX minimum
+    PIPE_BUF = 512
+
+
+class FdWriter:
+    """a write-only text file that writes the encoded lines to a file descriptor"""
+    def __init__(self, filename: str, mode: str='w', encoding: str='utf-8',
+                 max_lines: int=1000) -> None:
+        """
+        Creates an FdWriter
+
+        Parameters
+        ----------
+        filename : str
+            the file to write
+        mode : str; default='w'
+            'w': truncate the file; 'a': append to the file
+        encoding : str; default='utf-8'
+            the unicode encoding method
+        max_lines : int; default=1000
+            the number of lines that are kept before they are written
+            (even if flush isn't called)
+
+        """
+        assert mode in {'w', 'a'}, f'mode={mode!r}'
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+        if mode == 'w':
+            flags |= os.O_TRUNC
+        self.name = filename
+        self.mode = mode
+        self.encoding = encoding
+        self.max_lines = max_lines
+        self._fd = os.open(filename, flags, 0o666)
+        self._is_regular_file = stat.S_ISREG(os.fstat(self._fd).st_mode)
+        self._lines: list[str] = []
+
+    @property
+    def closed(self) -> bool:
+        return self._fd < 0
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def write(self, line: str) -> None:
+        """keeps a line until the file is flushed"""
+        lines = self._lines
+        lines.append(line)
+        if len(lines) >= self.max_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        """encodes the lines once and writes them"""
+        lines = self._lines
+        if not lines:
+            return
+        if self._fd < 0:
+            raise ValueError(f'I/O operation on closed file {self.name!r}')
+        self._lines = []
+        data = ''.join(lines).encode(self.encoding)
+        if self._is_regular_file or len(data) <= PIPE_BUF:
+            self._write(data)
+            return
+        for chunk in _split_lines(lines, self.encoding):
+            self._write(chunk)
+
+    def _write(self, data: bytes) -> None:
+        """writes all the bytes (os.write may write part of them)"""
+        fd = self._fd
+        nbytes = os.write(fd, data)
+        while nbytes < len(data):
+            data = data[nbytes:]
+            nbytes = os.write(fd, data)
+
+    def close(self) -> None:
+        """writes the lines and closes the file"""
+        if self._fd < 0:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> FdWriter:
+        return self
+
+    def __exit__(self, unused_type, unused_value, unused_traceback) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if getattr(self, '_fd', -1) >= 0:
+            self.close()
+
+    def __repr__(self) -> str:
+        return f'FdWriter(filename={self.name!r}, mode={self.mode!r}, encoding={self.encoding!r})'
+
+
+def _split_lines(lines: list[str], encoding: str) -> list[bytes]:
+    """
+    Groups the lines into chunks of up to PIPE_BUF bytes, so a line
+    isn't split between writes (a longer line is its own chunk)
+    """
+    chunks = []
+    chunk: list[bytes] = []
+    nbytes = 0
+    for line in lines:
+        data = line.encode(encoding)
+        if chunk and nbytes + len(data) > PIPE_BUF:
+            chunks.append(b''.join(chunk))
+            chunk = []
+            nbytes = 0
+        chunk.append(data)
+        nbytes += len(data)
+    if chunk:
+        chunks.append(b''.join(chunk))
+    return chunks
@@ -0,0 +1,293 @@
+"""
+defines:
+  - LineFormatter(fmt)
+  - DEFAULT_FORMAT
+  - level_filename_fmt_to_template(level_filename_fmt)
+  - template_to_level_filename_fmt(fmt)
+
+The format is a ``str.format`` style template with the fields:
+  - level:    the message type (e.g., 'INFO')
+  - label:    the message type with a colon (e.g., 'INFO:')
+  - file:     the filename the message came from
+  - line:     the line number the message came from
+  - location: 'file:line'
+  - func:     the qualified name of the calling function
+  - time:     the local time; the format spec is a strftime format
+              (e.g., '{time:%Y-%m-%d %H:%M:%S}'); default='%H:%M:%S'
+  - pid:      the process id
+  - thread:   the thread name
+  - msg:      the message
+
+The default format is:
+    '{label:<8} {location:<28} {msg}'
+
+The old ``SimpleLogger._level_filename_fmt`` ('%' format of the
+filename:lineno and msg columns after the label) is converted to a
+template:
+    ' %-28s %s\\n' -> '{label:<8} {location:<28} {msg}'
+"""
+import os
+import re
+import time
+import threading
+from string import Formatter
+
+DEFAULT_FORMAT = '{label:<8} {location:<28} {msg}'
+# the label column of the old _level_filename_fmt
+LEGACY_LABEL = '{label:<8}'
+
+# fields that only depend on the call site and are cached
+STATIC_FIELDS = {'level', 'label', 'file', 'line', 'location', 'func'}
+# fields that change from message to message
+DYNAMIC_FIELDS = {'time', 'pid', 'thread'}
+
+# the number of call sites that are cached before the cache is reset
+MAX_CACHE_SIZE = 4096
+
+
+class LineFormatter:
+    """
+    Formats a log line using a template.
+
+    The template is compiled once into a specialized function.  The
+    parts of the template that only depend on the call site (e.g., the
+    level and the filename:lineno column) are cached per call site, so
+    a record is just a concatenation of cached pieces and the message.
+    A single formatter is shared by all the outputs (e.g., screen, file,
+    and HTML) of a logger.
+
+    """
+    def __init__(self, fmt: str=DEFAULT_FORMAT) -> None:
+        """
+        Creates a LineFormatter
+
+        Parameters
+        ----------
+        fmt : str; default=DEFAULT_FORMAT
+            the line template (see ``cpylog.format_utils``);
+            a newline is added to the end
+
+        """
+        self.fmt = fmt
+        self._cache: dict[tuple[str, str, int, str], tuple[str, ...]] = {}
+
+        # the template is split into static chunks that are separated
+        # by msg/dynamic fields
+        #   chunks  : list of templates for the cached parts
+        #   dynamic : list of fields in between the chunks
+        chunks = ['']
+        chunks_no_level = ['']
+        dynamic = []
+        for literal, field, spec, conversion in Formatter().parse(fmt + '\n'):
+            literal = literal.replace('{', '{{').replace('}', '}}')
+            chunks[-1] += literal
+            chunks_no_level[-1] += literal
+            if field is None:
+                continue
+            if field not in STATIC_FIELDS and field not in DYNAMIC_FIELDS and field != 'msg':
+                raise ValueError(f'invalid field {field!r} in fmt={fmt!r}; '
+                                 f'allowed={sorted(STATIC_FIELDS | DYNAMIC_FIELDS | {"msg"})}')
+            if spec and '{' in spec:
+                raise ValueError(f'nested fields are not supported; fmt={fmt!r}')
+
+            if field in STATIC_FIELDS:
+                chunks[-1] += _field_str(field, spec, conversion)
+
+                # the level fields aren't padded if there is no level
+                # (e.g., simple_msg) to match the unlabeled format
+                chunks_no_level[-1] += (
+                    _field_str(field, '', '') if field in {'level', 'label'}
+                    else _field_str(field, spec, conversion))
+            else:
+                dynamic.append(_dynamic_func(field, spec, conversion))
+                chunks.append('')
+                chunks_no_level.append('')
+        self._chunk_fmts = chunks
+        self._chunk_fmts_no_level = chunks_no_level
+        self._format = _compile(dynamic)
+
+    def get_chunks(self, typ: str, filename: str, lineno: int,
+                   func: str='') -> tuple[str, ...]:
+        """gets the cached parts of the line for the call site"""
+        if isinstance(lineno, list):
+            # nlevels>1 for simple_msg sends lists
+            location = '/'.join([f'{filenamei}:{linenoi}'
+                                 for filenamei, linenoi in zip(filename, lineno)])
+            filename = '/'.join(filename)
+            return self._render_chunks(typ, filename, lineno, location, func)
+
+        key = (typ, filename, lineno, func)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        cache = self._cache
+        if len(cache) > MAX_CACHE_SIZE:
+            cache.clear()
+        chunks = cache[key] = self._render_chunks(
+            typ, filename, lineno, f'{filename}:{lineno}', func)
+        return chunks
+
+    def _render_chunks(self, typ: str, filename: str, lineno: int,
+                       location: str, func: str) -> tuple[str, ...]:
+        chunk_fmts = self._chunk_fmts if typ else self._chunk_fmts_no_level
+        label = f'{typ}:' if typ else ''
+        return tuple(chunk.format(level=typ or '', label=label, file=filename,
+                                  line=lineno, location=location, func=func)
+                     for chunk in chunk_fmts)
+
+    def format(self, typ: str, filename: str, lineno: int,
+               msg: str, func: str='') -> str:
+        """
+        Formats a message
+
+        Parameters
+        ----------
+        typ : str
+            message type - ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+        filename : str
+            the active file
+        lineno : int
+            line number
+        msg : str
+            message to be displayed
+        func : str; default=''
+            the calling function
+
+        Returns
+        -------
+        line : str
+            the formatted line (with a newline)
+
+        """
+        try:
+            chunks = self._cache[(typ, filename, lineno, func)]
+        except (KeyError, TypeError):
+            chunks = self.get_chunks(typ, filename, lineno, func)
+        return self._format(chunks, msg)
+
+    def __reduce__(self):
+        # the compiled function can't be pickled, so it's rebuilt from fmt
+        return (LineFormatter, (self.fmt, ))
+
+    def __repr__(self) -> str:
+        return f'LineFormatter(fmt={self.fmt!r})'
+
+
+# ' %-28s %s\n' without the newline
+_LEGACY_FMT = re.compile(r'([^%{}]*)%(-?)(\d*)s([^%{}]*)%s([^%{}]*)')
+# '{label:<8} {location:<28} {msg}'
+_LEGACY_TEMPLATE = re.compile(
+    re.escape(LEGACY_LABEL) +
+    r'([^%{}]*)\{location(?::([<>])(\d+))?\}([^%{}]*)\{msg\}([^%{}]*)')
+
+
+def level_filename_fmt_to_template(level_filename_fmt: str) -> str:
+    """
+    Converts the old ``_level_filename_fmt`` (e.g., ' %-28s %s\\n'; the
+    filename:lineno and msg columns after the label) to a template
+    """
+    if level_filename_fmt.endswith('\n'):
+        # the formatter adds the newline
+        level_filename_fmt = level_filename_fmt[:-1]
+    match = _LEGACY_FMT.fullmatch(level_filename_fmt)
+    if match is None:
+        raise ValueError(f'_level_filename_fmt={level_filename_fmt!r} must be like '
+                         "' %-28s %s\\n'; use set_format(fmt) for other layouts")
+    before, left, width, between, after = match.groups()
+    if width:
+        location = '{location:%s%s}' % ('<' if left else '>', width)
+    else:
+        location = '{location}'
+    return f'{LEGACY_LABEL}{before}{location}{between}{{msg}}{after}'
+
+
+def template_to_level_filename_fmt(fmt: str) -> str:
+    """
+    Converts a template to the old ``_level_filename_fmt``
+    (e.g., '{label:<8} {location:<28} {msg}' -> ' %-28s %s\\n')
+    """
+    match = _LEGACY_TEMPLATE.fullmatch(fmt)
+    if match is None:
+        raise ValueError(f'fmt={fmt!r} has no _level_filename_fmt form; '
+                         'use the fmt of set_format(fmt)')
+    before, align, width, between, after = match.groups()
+    if width is None:
+        location = '%s'
+    else:
+        location = ('%-' if align == '<' else '%') + width + 's'
+    return f'{before}{location}{between}%s{after}\n'
+
+
+def _field_str(field: str, spec: str, conversion: str) -> str:
+    """rebuilds the field template (e.g., '{location:<28}')"""
+    conversion_str = f'!{conversion}' if conversion else ''
+    spec_str = f':{spec}' if spec else ''
+    return '{%s%s%s}' % (field, conversion_str, spec_str)
+
+
+def _dynamic_func(field: str, spec: str, conversion: str):
+    """
+    Gets a function that renders a field that isn't cached
+
+    Returns
+    -------
+    func : function / None
+        the function; None for an unformatted msg
+    takes_msg : bool
+        does the function take the message
+
+    """
+    if field == 'msg':
+        if not spec and not conversion:
+            return None, True
+        field_fmt = _field_str('msg', spec, conversion)
+        return (lambda msg: field_fmt.format(msg=msg)), True
+    if field == 'time':
+        return _TimeField(spec if spec else '%H:%M:%S'), False
+
+    field_fmt = _field_str('value', spec, conversion)
+    if field == 'pid':
+        getpid = os.getpid
+        return (lambda: field_fmt.format(value=getpid())), False
+    assert field == 'thread', field
+    current_thread = threading.current_thread
+    return (lambda: field_fmt.format(value=current_thread().name)), False
+
+
+def _compile(dynamic: list):
+    """
+    Compiles the format into a function of (chunks, msg), so the
+    default format is just:
+        f'{chunks[0]}{msg}{chunks[1]}'
+    """
+    namespace = {}
+    parts = ['{chunks[0]}']
+    for i, (func, takes_msg) in enumerate(dynamic):
+        if func is None:
+            parts.append('{msg}')
+        else:
+            name = f'_field{i}'
+            namespace[name] = func
+            parts.append('{%s(%s)}' % (name, 'msg' if takes_msg else ''))
+        parts.append('{chunks[%d]}' % (i + 1))
+    source = (
+        'def _format(chunks, msg):\n'
+        "    return f'%s'\n" % ''.join(parts))
+    exec(source, namespace)
+    return namespace['_format']
+
+
+class _TimeField:
+    """renders the time; cached for each second"""
+    def __init__(self, datefmt: str) -> None:
+        self.datefmt = datefmt
+        self._second = -1
+        self._time_str = ''
+
+    def __call__(self) -> str:
+        second = int(time.time())
+        if second != self._second:
+            self._time_str = time.strftime(self.datefmt, time.localtime(second))
+            self._second = second
+        return self._time_str
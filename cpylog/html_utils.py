@@ -1,9 +1,16 @@
 """
 defines:
-  - str_to_html(log_type, filename, lineno, msg)
+  - str_to_html(log_type, filename, lineno, msg, formatter=None)
+  - escape_html(msg, newlines=True)
+  - HTMLFileSink(filename, fmt=HTML_FORMAT, page_size=None)
 """
+from __future__ import annotations
+import os
 import datetime
 import html
+from typing import Optional
+
+from cpylog.format_utils import LineFormatter
 
 #message colors
 DARK_ORANGE = '#EB9100'
@@ -19,8 +26,36 @@ COLORS = {
     'CRITICAL' : 'Crimson',
 }
 
+def escape_html(msg: str, newlines: bool=True) -> str:
+    """
+    Escapes a message for the text of an HTML element
+
+    Parameters
+    ----------
+    msg : str
+        the message
+    newlines : bool; default=True
+        replace the newlines with <br>
+
+    Returns
+    -------
+    html_msg : str
+        the escaped message
+
+    The text of an element doesn't need the quotes escaped, so this is
+    4 passes of str.replace instead of the 5 of html.escape plus the
+    newlines.  str.replace doesn't copy a string without a match and is
+    faster than a str.translate table (see
+    dev/benchmarks/bench_html_escape.py).
+    """
+    msg = msg.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if newlines:
+        msg = msg.replace('\n', '<br>')
+    return msg
+
+
 def str_to_html(log_type: str, filename: str, lineno: int,
-                msg: str) -> str:
+                msg: str, formatter: Optional[LineFormatter]=None) -> str:
     """
     Converts the message to html
 
@@ -34,6 +69,9 @@ def str_to_html(log_type: str, filename: str, lineno: int,
         the line number the message came from
     msg : str
         the message
+    formatter : LineFormatter; default=None
+        the line template from the log (e.g., ``log._formatter``);
+        None: use the default HTML layout
 
     Returns
     -------
@@ -41,24 +79,29 @@ def str_to_html(log_type: str, filename: str, lineno: int,
         the HTML message
 
     """
+    if formatter is not None:
+        line = formatter.format(log_type, filename, lineno, msg)
+        return r'<font color="%s">%s</font><br>' % (
+            COLORS[log_type], escape_html(line[:-1]))
+
     tim = datetime.datetime.now().strftime('[%Y-%m-%d %H:%M:%S]')
     #print('log_type = %s' % log_type)
     #print('filename = %s' % filename)
     #print('lineno = %s' % lineno)
     #print('msg = %s' % msg)
     #assert isinstance(msg, str), msg
-    msg = html.escape(msg)
+    msg = escape_html(msg)
 
     #message colors
     color = COLORS[log_type]
 
     if filename.endswith('.pyc'):
         filename = filename[:-1]
-    html_msg = get_html_msg(color, tim, log_type, filename, lineno, msg)
+    html_msg = get_html_msg(color, tim, log_type, filename, lineno, msg, escaped=True)
     return html_msg
 
 def get_html_msg(color: str, tim: str, log_type: str,
-                filename: str, lineno: int, msg: str) -> str:
+                filename: str, lineno: int, msg: str, escaped: bool=False) -> str:
     """
     converts the message to html
 
@@ -76,13 +119,211 @@ def get_html_msg(color: str, tim: str, log_type: str,
         the line number the message came from
     msg : str
         the message
+    escaped : bool; default=False
+        the message is already escaped (see ``escape_html``), so the
+        newlines aren't replaced again
 
     Returns
     -------
     html_msg : str
         the HTML message
     """
+    if not escaped:
+        msg = msg.replace('\n', '<br>')
     # log_type, filename, lineno, msg
     html_msg = r'<font color="%s"> %s %s : %s:%i</font> %s <br>' % (
-        color, tim, log_type, filename, lineno, msg.replace('\n', '<br>'))
+        color, tim, log_type, filename, lineno, msg)
     return html_msg
+
+
+# the same layout as get_html_msg
+HTML_FORMAT = '{time:%Y-%m-%d %H:%M:%S} {label:<8} {location:<28} {msg}'
+
+# the levels with a filter checkbox
+FILTER_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ margin: 0; font-family: monospace; }}
+#controls {{ position: sticky; top: 0; padding: 4px 8px; background: #f0f0f0;
+             border-bottom: 1px solid #ccc; font-family: sans-serif; }}
+#log {{ padding: 4px 8px; white-space: pre-wrap; }}
+{hide_css}
+</style>
+<script>
+function setLevel(typ, show) {{
+  document.body.classList.toggle('hide-' + typ, !show);
+  try {{ localStorage.setItem('cpylog-hide-' + typ, show ? '' : '1'); }} catch (e) {{}}
+}}
+document.addEventListener('DOMContentLoaded', function () {{
+  document.querySelectorAll('#controls input').forEach(function (box) {{
+    var hide = false;
+    try {{ hide = localStorage.getItem('cpylog-hide-' + box.value) === '1'; }} catch (e) {{}}
+    box.checked = !hide;
+    setLevel(box.value, !hide);
+  }});
+}});
+</script>
+</head>
+<body>
+<div id="controls">{checkboxes} {nav}</div>
+<div id="log">
+"""
+HTML_FOOTER = """</div>
+<div id="footer">{nav}</div>
+</body>
+</html>
+"""
+
+
+def _get_prefixes() -> dict[str, str]:
+    """the <font> tag for each message type"""
+    return {typ: f'<font class="{typ}" color="{color}">' for typ, color in COLORS.items()}
+
+
+class HTMLFileSink:
+    """
+    Writes the messages to an HTML file (e.g., to share a run).
+
+    The header is written once and the escaped messages are written in
+    chunks of ``buffer_size`` messages.  The document is closed by
+    ``close`` (e.g., by ``FileLogger.__exit__``).  The page has
+    checkboxes that hide message types.
+
+    For a large run, ``page_size`` splits the log into pages
+    (run.html, run_2.html, ...) that link to each other, so a browser
+    doesn't load everything at once.
+
+    Example
+    -------
+    >>> with FileLogger(level='debug', filename='run.log') as log:
+    ...     log.add_sink(HTMLFileSink('run.html', page_size=100_000))
+    ...     log.info('written to run.log and run.html')
+    """
+    def __init__(self, filename: str, fmt: str=HTML_FORMAT,
+                 title: Optional[str]=None, page_size: Optional[int]=None,
+                 buffer_size: int=256, encoding: str='utf-8') -> None:
+        """
+        Creates an HTMLFileSink
+
+        Parameters
+        ----------
+        filename : str
+            the HTML file
+        fmt : str; default=HTML_FORMAT
+            the line template (see ``cpylog.format_utils``)
+        title : str; default=None -> the filename
+            the page title
+        page_size : int; default=None
+            the number of messages per page; None: a single page
+        buffer_size : int; default=256
+            the number of messages that are written at once
+        encoding : str; default='utf-8'
+            the file encoding
+
+        """
+        assert page_size is None or page_size >= 1, f'page_size={page_size!r}'
+        assert buffer_size >= 1, f'buffer_size={buffer_size!r}'
+        self.filename = filename
+        self.title = os.path.basename(filename) if title is None else title
+        self.page_size = page_size
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self._formatter = LineFormatter(fmt)
+        self._prefixes = _get_prefixes()
+        self._other_prefix = self._prefixes['ERROR']
+
+        self.filenames: list[str] = []
+        self._file = None
+        self._buffer: list[str] = []
+        self._nrecords_page = 0
+        self._open_page()
+
+    def _page_filename(self, ipage: int) -> str:
+        """run.html, run_2.html, ..."""
+        if ipage == 0:
+            return self.filename
+        base, ext = os.path.splitext(self.filename)
+        return f'{base}_{ipage + 1}{ext}'
+
+    def _nav(self, ipage: int, is_last: bool) -> str:
+        """the links to the other pages"""
+        if self.page_size is None:
+            return ''
+        links = [f'page {ipage + 1}']
+        if ipage > 0:
+            links.insert(0, f'<a href="{html.escape(os.path.basename(self._page_filename(ipage - 1)))}">previous</a>')
+        if not is_last:
+            links.append(f'<a href="{html.escape(os.path.basename(self._page_filename(ipage + 1)))}">next</a>')
+        return ' | '.join(links)
+
+    def _open_page(self) -> None:
+        ipage = len(self.filenames)
+        filename = self._page_filename(ipage)
+        self.filenames.append(filename)
+        self._file = open(filename, 'w', encoding=self.encoding)
+        hide_css = '\n'.join(f'body.hide-{typ} .{typ} {{ display: none; }}'
+                             for typ in FILTER_LEVELS)
+        checkboxes = ' '.join(
+            f'<label><input type="checkbox" value="{typ}" checked '
+            f'onchange="setLevel(this.value, this.checked)"> '
+            f'<font color="{COLORS[typ]}">{typ}</font></label>'
+            for typ in FILTER_LEVELS)
+        self._file.write(HTML_HEADER.format(
+            title=html.escape(self.title), hide_css=hide_css,
+            checkboxes=checkboxes, nav=self._nav(ipage, is_last=True)))
+        self._nrecords_page = 0
+
+    def _close_page(self, is_last: bool) -> None:
+        self.flush()
+        ipage = len(self.filenames) - 1
+        self._file.write(HTML_FOOTER.format(nav=self._nav(ipage, is_last)))
+        self._file.close()
+        self._file = None
+
+    def __call__(self, typ: str, filename: str, lineno: int, msg: str,
+                 func: str='') -> None:
+        """buffers a message; nothing is written after close"""
+        if self._file is None:
+            return
+        if self.page_size is not None:
+            # the next page is only opened for a message
+            if self._nrecords_page >= self.page_size:
+                self._close_page(is_last=False)
+                self._open_page()
+            self._nrecords_page += 1
+
+        line = self._formatter.format(typ, filename, lineno, msg, func)
+        prefix = self._prefixes.get(typ, self._other_prefix)
+        buffer = self._buffer
+        # the newlines are kept by the white-space: pre-wrap style
+        buffer.append(f'{prefix}{escape_html(line, newlines=False)}</font>')
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """writes the buffered messages; a no-op after close"""
+        if self._file is None:
+            return
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """writes the buffered messages and ends the document"""
+        if self._file is not None:
+            self._close_page(is_last=True)
+
+    def __enter__(self) -> HTMLFileSink:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f'HTMLFileSink(filename={self.filename!r}, page_size={self.page_size})'
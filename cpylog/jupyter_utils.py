@@ -1,5 +1,6 @@
 from IPython.display import display, HTML
 #from IPython.core.display import display, HTML  # old
+from cpylog.html_utils import escape_html
 
 WARNING_TO_COLOR_MAP = {
     'DEBUG' : 'blue',
@@ -18,4 +19,7 @@ def write_html(typ: str, name: str, msg: str,
      - https://stackoverflow.com/questions/25698448/how-to-embed-html-into-ipython-output
     """
     color = WARNING_TO_COLOR_MAP.get(typ, 'red')
-    display(HTML(f'<text style=color:{color}>{name + msg}</text>'))
+    # a message with '<' would otherwise be read as a tag;
+    # each display is already a new line
+    text = escape_html((name + msg).removesuffix('\n'))
+    display(HTML(f'<text style=color:{color}>{text}</text>'))
@@ -0,0 +1,259 @@
+"""
+Connects cpylog to the standard Python logging module.
+
+defines:
+  - CpylogHandler(log)
+      a logging.Handler that writes stdlib records to a cpylog log
+  - CpylogLogger(log, name='cpylog')
+      a logging.Logger that writes to a cpylog log
+  - route_stdlib_logging(log, name=None)
+      adds a CpylogHandler to a stdlib logger
+
+Example
+-------
+>>> import logging
+>>> from cpylog import SimpleLogger
+>>> from cpylog.logging_bridge import route_stdlib_logging, CpylogLogger
+>>> log = SimpleLogger(level='debug')
+
+# third-party libraries that use logging.getLogger(...) go to cpylog
+>>> route_stdlib_logging(log, name=None, level=logging.INFO)
+
+# code that expects a logging.Logger can use cpylog
+>>> logger = CpylogLogger(log, name='solver')
+>>> logger.info('x=%s', 3)
+INFO:    file.py:10                   x=3
+
+"""
+from __future__ import annotations
+import os
+import sys
+import logging
+from typing import Optional, TYPE_CHECKING
+
+from cpylog.utils import get_short_filename
+from cpylog.exception_utils import format_exception
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import SimpleLogger
+
+LEVEL_TO_TYPE = {
+    logging.DEBUG: 'DEBUG',
+    logging.INFO: 'INFO',
+    logging.WARNING: 'WARNING',
+    logging.ERROR: 'ERROR',
+    logging.CRITICAL: 'CRITICAL',
+}
+CPYLOG_LEVEL_TO_LEVEL = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+# the level of the null logger (see get_logger(level='off'));
+# nothing is written
+OFF_LEVEL = logging.CRITICAL + 10
+
+# the logging module's source file; frames from it are skipped
+_LOGGING_SRCFILE = os.path.normcase(logging.addLevelName.__code__.co_filename)
+
+
+def _get_type(levelno: int) -> str:
+    """gets the cpylog message type (e.g., 'INFO') for a logging level"""
+    try:
+        return LEVEL_TO_TYPE[levelno]
+    except KeyError:
+        return logging.getLevelName(levelno)
+
+
+def _get_level(cpylog_level: str) -> int:
+    """gets the logging level for a cpylog level (e.g., 'info')"""
+    if cpylog_level == 'off':
+        return OFF_LEVEL
+    return CPYLOG_LEVEL_TO_LEVEL[cpylog_level]
+
+
+def _get_cpylog_level(level: int) -> str:
+    """gets the cpylog level (e.g., 'info') for a logging level"""
+    for cpylog_level, levelno in CPYLOG_LEVEL_TO_LEVEL.items():
+        if level <= levelno:
+            return cpylog_level
+    return 'critical'
+
+
+class CpylogHandler(logging.Handler):
+    """
+    Writes standard logging records to the outputs of a cpylog log
+    (e.g., colorama screen and the FileLogger file).
+
+    The record already has the pathname/lineno/funcName, so the frame
+    isn't looked up again.  The messages go through ``log.msg_typ``, so
+    the context fields, sampling and escalation of the cpylog log apply.
+    The handler lock isn't used, because the cpylog outputs are called
+    without a lock (like a message from the cpylog log).
+    """
+    def __init__(self, log: SimpleLogger, level: int=logging.NOTSET) -> None:
+        """
+        Creates a CpylogHandler
+
+        Parameters
+        ----------
+        log : SimpleLogger
+            the log to write to; its level is also applied
+        level : int; default=logging.NOTSET
+            the handler level
+
+        """
+        logging.Handler.__init__(self, level=level)
+        self.log = log
+        self._dframe = log._nlevels - 1
+        # pathname -> short filename
+        self._filenames: dict[str, str] = {}
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """filters and writes a record (without the handler lock)"""
+        if self.filters:
+            filtered = self.filter(record)
+            if not filtered:
+                return False
+            if isinstance(filtered, logging.LogRecord):
+                # python 3.12+: a filter may replace the record
+                record = filtered
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """writes a record"""
+        log = self.log
+        typ = _get_type(record.levelno)
+        if not log.is_enabled_for(typ):
+            return
+        try:
+            msg = record.getMessage()
+            if record.exc_info:
+                msg += '\n' + format_exception(*record.exc_info).rstrip('\n')
+            if record.stack_info:
+                msg += '\n' + record.stack_info
+
+            pathname = record.pathname
+            try:
+                filename = self._filenames[pathname]
+            except KeyError:
+                filename = self._filenames[pathname] = get_short_filename(
+                    pathname, self._dframe)
+
+            log.msg_typ(typ, msg, location=(filename, record.lineno, record.funcName))
+            log._check_escalation(typ)
+        except Exception:
+            self.handleError(record)
+
+    def __repr__(self) -> str:
+        return f'CpylogHandler(log={self.log!r})'
+
+
+class CpylogLogger(logging.Logger):
+    """
+    A logging.Logger that writes directly to a cpylog log.
+
+    The level comes from the cpylog log and a LogRecord isn't created,
+    so a suppressed message only costs the level check.  Messages are
+    %-formatted with args like the stdlib and support exc_info and
+    stacklevel.  The messages go through ``log.msg_typ``, so the context
+    fields, sampling and escalation of the cpylog log apply.
+    """
+    def __init__(self, log: SimpleLogger, name: str='cpylog') -> None:
+        """
+        Creates a CpylogLogger
+
+        Parameters
+        ----------
+        log : SimpleLogger
+            the log to write to
+        name : str; default='cpylog'
+            the logger name
+
+        """
+        logging.Logger.__init__(self, name)
+        # not self.log, which would hide Logger.log(level, msg)
+        self.cpylog_log = log
+        self.propagate = False
+
+    def setLevel(self, level: int | str) -> None:
+        """sets the level of the cpylog log"""
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        self.cpylog_log.level = _get_cpylog_level(level)
+
+    def getEffectiveLevel(self) -> int:
+        """gets the level of the cpylog log"""
+        return _get_level(self.cpylog_log.level)
+
+    def isEnabledFor(self, level: int) -> bool:
+        """is a message of this level written?"""
+        return self.cpylog_log.is_enabled_for(_get_type(level))
+
+    def _log(self, level: int, msg, args, exc_info=None, extra=None,
+             stack_info: bool=False, stacklevel: int=1) -> None:
+        """writes a message; called by debug, info, etc."""
+        log = self.cpylog_log
+        typ = _get_type(level)
+        if not log.is_enabled_for(typ):
+            return
+
+        # skip the logging module frames (e.g., Logger.exception -> Logger.error);
+        # nframe counts the frames from the caller to this function
+        frame = sys._getframe(1)
+        nframe = 1
+        while os.path.normcase(frame.f_code.co_filename) == _LOGGING_SRCFILE:
+            frame = frame.f_back
+            nframe += 1
+        for unused_i in range(stacklevel - 1):
+            if frame.f_back is None:
+                break
+            frame = frame.f_back
+            nframe += 1
+
+        msg = str(msg)
+        if args:
+            msg = log._format_args(msg, args)
+        if exc_info:
+            if isinstance(exc_info, BaseException):
+                exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+            elif not isinstance(exc_info, tuple):
+                exc_info = sys.exc_info()
+            msg += '\n' + format_exception(*exc_info).rstrip('\n')
+
+        # 0: properties, 1: msg_typ, 2: _log, ..., nframe+2: caller
+        log.msg_typ(typ, msg, nframe=nframe + 2)
+        log._check_escalation(typ)
+
+    def __repr__(self) -> str:
+        return f'CpylogLogger(name={self.name!r}, log={self.cpylog_log!r})'
+
+
+def route_stdlib_logging(log: SimpleLogger, name: Optional[str]=None,
+                         level: Optional[int]=None) -> CpylogHandler:
+    """
+    Sends the messages from a standard logging logger to a cpylog log
+
+    Parameters
+    ----------
+    log : SimpleLogger
+        the log to write to
+    name : str; default=None
+        the logger name (e.g., 'matplotlib'); None: the root logger
+    level : int; default=None
+        sets the level of the logger;
+        None: use the level of the cpylog log
+
+    Returns
+    -------
+    handler : CpylogHandler
+        the handler (for logger.removeHandler(...))
+
+    """
+    logger = logging.getLogger(name)
+    handler = CpylogHandler(log)
+    logger.addHandler(handler)
+    logger.setLevel(_get_level(log.level) if level is None else level)
+    return handler
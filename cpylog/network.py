@@ -0,0 +1,358 @@
+"""
+Sends log messages over the network (e.g., from the nodes of a cluster)
+to a collector (``python -m cpylog collect``).
+
+defines:
+  - UDPSink(host, port)
+  - TCPSink(host, port)
+  - NetRecord
+  - pack_record(...)
+  - unpack_records(data)
+
+Example
+-------
+>>> from cpylog import FileLogger
+>>> from cpylog.network import TCPSink
+>>> with FileLogger(level='debug', filename='node1.log') as log:
+...     log.add_sink(TCPSink('head-node', 9020))
+...     log.info('sent to the file and the collector')
+
+The sinks use non-blocking sockets, so a slow or missing collector
+never blocks the log call.  Messages that can't be sent are counted
+in ``ndropped``.
+
+Framing
+-------
+Each message is a frame:
+    uint32 nbytes                     (the size of the rest of the frame)
+    float64 time                      (seconds since the epoch)
+    uint32 pid
+    uint32 lineno
+    uint16 nsource, ntyp, nfilename, nfunc
+    uint32 nmsg, nfields
+    source, typ, filename, func, msg  (utf-8)
+    fields                            (utf-8 JSON; empty if there are no fields)
+A UDP datagram has one frame and a TCP stream is a series of frames.
+
+The context fields (see ``log.bind``) are sent as fields, so the
+collector can write them as JSON.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import errno
+import select
+import socket
+import struct
+from collections import deque
+from typing import Any, NamedTuple, Optional
+
+FRAME_SIZE = struct.Struct('!I')
+HEADER = struct.Struct('!dIIHHHHII')
+
+# the largest message that's sent in a UDP datagram
+MAX_UDP_MSG = 60000
+
+# non-blocking connect is in progress
+_CONNECT_ERRNOS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+                   getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+
+class NetRecord(NamedTuple):
+    """a message from the network"""
+    time: float
+    source: str
+    pid: int
+    typ: str
+    filename: str
+    lineno: int
+    func: str
+    msg: str
+    fields: Optional[dict[str, Any]] = None
+
+
+def pack_record(time_s: float, source: str, pid: int, typ: str,
+                filename: str, lineno: int, func: str, msg: str,
+                fields: Optional[dict[str, Any]]=None) -> bytes:
+    """packs a message into a frame"""
+    source_bytes = source.encode('utf-8')
+    typ_bytes = typ.encode('utf-8')
+    filename_bytes = filename.encode('utf-8')
+    func_bytes = func.encode('utf-8')
+    msg_bytes = msg.encode('utf-8', errors='replace')
+    # a value that isn't JSON (e.g., a numpy float) is sent as str
+    fields_bytes = json.dumps(fields, default=str).encode('utf-8') if fields else b''
+    header = HEADER.pack(time_s, pid, lineno, len(source_bytes), len(typ_bytes),
+                         len(filename_bytes), len(func_bytes), len(msg_bytes),
+                         len(fields_bytes))
+    payload = b''.join((header, source_bytes, typ_bytes, filename_bytes,
+                        func_bytes, msg_bytes, fields_bytes))
+    return FRAME_SIZE.pack(len(payload)) + payload
+
+
+def unpack_records(data: bytes) -> tuple[list[NetRecord], bytes]:
+    """
+    Unpacks the complete frames
+
+    Parameters
+    ----------
+    data : bytes
+        the received data
+
+    Returns
+    -------
+    records : list[NetRecord]
+        the messages
+    data : bytes
+        the data from an incomplete frame
+
+    """
+    records = []
+    i = 0
+    ndata = len(data)
+    while ndata - i >= FRAME_SIZE.size:
+        nbytes, = FRAME_SIZE.unpack_from(data, i)
+        start = i + FRAME_SIZE.size
+        end = start + nbytes
+        if end > ndata:
+            break
+        (time_s, pid, lineno, nsource, ntyp, nfilename, nfunc,
+         nmsg, nfields) = HEADER.unpack_from(data, start)
+        j = start + HEADER.size
+        strings = []
+        for nstr in (nsource, ntyp, nfilename, nfunc, nmsg):
+            strings.append(data[j:j+nstr].decode('utf-8', errors='replace'))
+            j += nstr
+        source, typ, filename, func, msg = strings
+        fields = json.loads(data[j:j+nfields]) if nfields else None
+        records.append(NetRecord(time_s, source, pid, typ, filename, lineno, func, msg,
+                                 fields))
+        i = end
+    return records, data[i:]
+
+
+class _Sink:
+    """common parts of the network sinks"""
+    def __init__(self, host: str, port: int, source: Optional[str]) -> None:
+        self.address = (host, port)
+        self.source = socket.gethostname() if source is None else source
+        self.pid = os.getpid()
+        self.ndropped = 0
+
+    def _pack(self, typ: str, filename: str, lineno: int, msg: str,
+              func: str, fields: Optional[dict[str, Any]]) -> bytes:
+        return pack_record(time.time(), self.source, self.pid, typ or '',
+                           str(filename), lineno if isinstance(lineno, int) else 0,
+                           func, str(msg), fields)
+
+
+class UDPSink(_Sink):
+    """
+    Sends each message as a UDP datagram.  Messages are dropped (not
+    retried) if the socket buffer is full.
+    """
+    def __init__(self, host: str, port: int, source: Optional[str]=None) -> None:
+        """
+        Creates a UDPSink
+
+        Parameters
+        ----------
+        host : str
+            the collector host
+        port : int
+            the collector port
+        source : str; default=None -> socket.gethostname()
+            the name of this node
+
+        """
+        _Sink.__init__(self, host, port, source)
+        family = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0][0]
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def __call__(self, typ: str, filename: str, lineno: int, msg: str,
+                 func: str='', fields: Optional[dict[str, Any]]=None) -> None:
+        """sends a message"""
+        msg = str(msg)
+        if len(msg) > MAX_UDP_MSG:
+            msg = msg[:MAX_UDP_MSG] + '...'
+        try:
+            self._sock.sendto(self._pack(typ, filename, lineno, msg, func, fields),
+                              self.address)
+        except OSError:
+            self.ndropped += 1
+
+    def flush(self) -> None:
+        """UDP messages aren't buffered"""
+
+    def close(self) -> None:
+        """closes the socket"""
+        self._sock.close()
+
+    def __repr__(self) -> str:
+        return f'UDPSink(host={self.address[0]!r}, port={self.address[1]})'
+
+
+class TCPSink(_Sink):
+    """
+    Sends batches of messages over a TCP connection.
+
+    Messages are buffered and sent when ``batch_size`` bytes are
+    waiting, ``flush_interval`` seconds have passed, or an error
+    (or worse) is logged.  If the connection is lost, it's retried with
+    an exponential backoff and messages are buffered (up to
+    ``max_buffer`` bytes; the oldest are dropped).
+    """
+    def __init__(self, host: str, port: int, source: Optional[str]=None,
+                 batch_size: int=16384, flush_interval: float=0.5,
+                 max_buffer: int=16*1024*1024,
+                 min_backoff: float=0.1, max_backoff: float=30.0) -> None:
+        """
+        Creates a TCPSink
+
+        Parameters
+        ----------
+        host : str
+            the collector host
+        port : int
+            the collector port
+        source : str; default=None -> socket.gethostname()
+            the name of this node
+        batch_size : int; default=16384
+            send when this many bytes are waiting
+        flush_interval : float; default=0.5
+            send when this many seconds have passed since the last send
+        max_buffer : int; default=16 MB
+            the maximum number of bytes that are kept while disconnected
+        min_backoff / max_backoff : float; default=0.1 / 30.0
+            the range of the time between reconnects in seconds
+
+        """
+        _Sink.__init__(self, host, port, source)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self._frames: deque[bytes] = deque()
+        self._nbuffered = 0
+        # the unsent frames of a batch; the first frame may be partially sent
+        self._pending = b''
+        self._pending_sizes: deque[int] = deque()
+        self._head_sent = 0
+        self._last_flush = time.monotonic()
+
+        self._sock: Optional[socket.socket] = None
+        self._connected = False
+        self._backoff = min_backoff
+        self._next_connect = 0.
+
+    def __call__(self, typ: str, filename: str, lineno: int, msg: str,
+                 func: str='', fields: Optional[dict[str, Any]]=None) -> None:
+        """buffers a message and sends a batch if it's time"""
+        frame = self._pack(typ, filename, lineno, msg, func, fields)
+        self._frames.append(frame)
+        self._nbuffered += len(frame)
+        if self._nbuffered > self.max_buffer:
+            self._drop_oldest()
+        if (self._nbuffered >= self.batch_size or
+                typ in {'ERROR', 'EXCEPTION', 'CRITICAL'} or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _drop_oldest(self) -> None:
+        while self._nbuffered > self.max_buffer and self._frames:
+            self._nbuffered -= len(self._frames.popleft())
+            self.ndropped += 1
+
+    def _connect(self) -> bool:
+        """starts/checks a non-blocking connection"""
+        if self._connected:
+            return True
+        now = time.monotonic()
+        if self._sock is None:
+            if now < self._next_connect:
+                return False
+            family = socket.getaddrinfo(*self.address, type=socket.SOCK_STREAM)[0][0]
+            self._sock = socket.socket(family, socket.SOCK_STREAM)
+            self._sock.setblocking(False)
+            error = self._sock.connect_ex(self.address)
+            if error not in _CONNECT_ERRNOS:
+                self._disconnect()
+                return False
+
+        # is the connection done?
+        unused_readable, writable, unused_errors = select.select([], [self._sock], [], 0)
+        if not writable:
+            return False
+        error = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            self._disconnect()
+            return False
+        self._connected = True
+        self._backoff = self.min_backoff
+        return True
+
+    def _disconnect(self) -> None:
+        """closes the socket and schedules a reconnect"""
+        if self._sock is not None:
+            self._sock.close()
+        # the collector drops the partial frame of a closed connection,
+        # so the whole frame is resent after reconnecting
+        self._head_sent = 0
+        self._sock = None
+        self._connected = False
+        self._next_connect = time.monotonic() + self._backoff
+        self._backoff = min(2 * self._backoff, self.max_backoff)
+
+    def flush(self) -> None:
+        """sends as much of the buffer as the socket will take"""
+        self._last_flush = time.monotonic()
+        if not self._connect():
+            return
+        if not self._pending:
+            if not self._frames:
+                return
+            self._pending = b''.join(self._frames)
+            self._pending_sizes.extend(len(frame) for frame in self._frames)
+            self._frames.clear()
+            self._nbuffered = 0
+        try:
+            nsent = self._sock.send(memoryview(self._pending)[self._head_sent:])
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            # the unsent frames are resent after reconnecting
+            self._disconnect()
+            return
+
+        # only whole frames are removed
+        nsent += self._head_sent
+        ndone = 0
+        pending_sizes = self._pending_sizes
+        while pending_sizes and nsent - ndone >= pending_sizes[0]:
+            ndone += pending_sizes.popleft()
+        self._pending = self._pending[ndone:]
+        self._head_sent = nsent - ndone
+
+    def close(self, timeout: float=1.0) -> None:
+        """sends the buffer (waiting up to timeout seconds) and closes the socket"""
+        end = time.monotonic() + timeout
+        while (self._pending or self._frames) and time.monotonic() < end:
+            self.flush()
+            if self._pending or self._frames:
+                time.sleep(0.01)
+        self.ndropped += len(self._frames) + len(self._pending_sizes)
+        self._frames.clear()
+        self._pending = b''
+        self._pending_sizes.clear()
+        self._head_sent = 0
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._connected = False
+
+    def __repr__(self) -> str:
+        return f'TCPSink(host={self.address[0]!r}, port={self.address[1]})'
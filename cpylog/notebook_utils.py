@@ -0,0 +1,226 @@
+"""
+A log panel for the Jupyter notebook.
+
+defines:
+  - NotebookPanel(max_rows=1000, interval=0.2)
+  - show_log_panel(log, max_rows=1000, interval=0.2)
+
+Example
+-------
+>>> from cpylog import SimpleLogger
+>>> from cpylog.notebook_utils import show_log_panel
+>>> log = SimpleLogger(level='debug')
+>>> panel = show_log_panel(log, max_rows=1000)
+>>> for i in range(100_000):
+...     log.debug(f'i={i}')
+
+The messages of the log go to a single output (instead of one output
+per message) that's updated in batches.  The panel only has the last
+``max_rows`` messages, so a cell with 100k messages stays responsive
+and the saved notebook stays small.  The messages can be filtered by
+level and by file.
+"""
+from __future__ import annotations
+import os
+import html
+from collections import deque, Counter
+from itertools import count
+from typing import Optional, TYPE_CHECKING
+
+from cpylog.batch_utils import BatchedLogFunc
+from cpylog.html_utils import escape_html, COLORS
+from cpylog.format_utils import LineFormatter, DEFAULT_FORMAT
+from cpylog.record import LogRecord
+from cpylog.utils import ipython_info
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import SimpleLogger
+
+PANEL_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+# the maximum number of files in the file filter
+MAX_FILES = 200
+_PANEL_IDS = count()
+
+PANEL_STYLE = """<style>
+#{panel_id} .cpylog-controls {{ font-family: sans-serif; font-size: 12px; padding: 2px 0; }}
+#{panel_id} .cpylog-rows {{ max-height: {height}px; overflow-y: auto; font-family: monospace;
+                           white-space: pre-wrap; border: 1px solid #ddd; padding: 2px 4px; }}
+{hide_css}
+</style>
+"""
+
+# restores the filters after an update and scrolls to the end
+PANEL_SCRIPT = """<script>
+(function () {{
+  var panel = document.getElementById('{panel_id}');
+  if (!panel) {{ return; }}
+  var panels = window.cpylogPanels = window.cpylogPanels || {{}};
+  var state = panels['{panel_id}'] = panels['{panel_id}'] || {{hidden: {{}}, file: ''}};
+  var fileStyle = panel.querySelector('.cpylog-file-style');
+  function apply() {{
+    panel.querySelectorAll('input.cpylog-level').forEach(function (box) {{
+      box.checked = !state.hidden[box.value];
+      panel.classList.toggle('hide-' + box.value, !!state.hidden[box.value]);
+    }});
+    var select = panel.querySelector('select.cpylog-file');
+    select.value = state.file;
+    fileStyle.textContent = state.file ?
+      '#{panel_id} .cpylog-row:not([data-file="' + CSS.escape(state.file) + '"]) {{ display: none; }}' : '';
+  }}
+  panel.querySelectorAll('input.cpylog-level').forEach(function (box) {{
+    box.addEventListener('change', function () {{ state.hidden[box.value] = !box.checked; apply(); }});
+  }});
+  panel.querySelector('select.cpylog-file').addEventListener('change', function (event) {{
+    state.file = event.target.value; apply();
+  }});
+  apply();
+  var rows = panel.querySelector('.cpylog-rows');
+  rows.scrollTop = rows.scrollHeight;
+}})();
+</script>
+"""
+
+
+class NotebookPanel(BatchedLogFunc):
+    """
+    A log_func that shows the messages in a single notebook output.
+
+    The messages are collected by BatchedLogFunc and the output is
+    updated (``display_id``) at most every ``interval`` seconds and at
+    the end of a cell.  The rows are rendered once, only for the
+    messages that are kept.
+    """
+    def __init__(self, max_rows: int=1000, interval: float=0.2,
+                 fmt: str=DEFAULT_FORMAT, height: int=400,
+                 display: bool=True) -> None:
+        """
+        Creates a NotebookPanel
+
+        Parameters
+        ----------
+        max_rows : int; default=1000
+            the number of messages in the panel (the oldest are dropped)
+        interval : float; default=0.2
+            the minimum time between updates in seconds
+        fmt : str; default=DEFAULT_FORMAT
+            the line template (see ``cpylog.format_utils``)
+        height : int; default=400
+            the height of the panel in pixels
+        display : bool; default=True
+            show the panel (requires IPython)
+
+        """
+        assert max_rows >= 1, f'max_rows={max_rows!r}'
+        # the batch is limited, so a fast loop doesn't use a lot of memory
+        BatchedLogFunc.__init__(self, self._add_records, interval=interval,
+                                max_records=50 * max_rows)
+        self.max_rows = max_rows
+        self.height = height
+        self.panel_id = f'cpylog-panel-{os.getpid()}-{next(_PANEL_IDS)}'
+        self._formatter = LineFormatter(fmt)
+        self._rows: deque[str] = deque(maxlen=max_rows)
+        self._counts: Counter[str] = Counter()
+        self._files: dict[str, None] = {}
+        self._prefixes = {typ: f'<div class="cpylog-row {typ}" style="color:{color}" data-file="'
+                          for typ, color in COLORS.items()}
+
+        self._handle = None
+        if display:
+            from IPython.display import display as ipython_display, HTML
+            self._handle = ipython_display(HTML(self.render()), display_id=True)
+
+    def _add_records(self, records: list[LogRecord]) -> None:
+        """renders the kept messages and updates the output"""
+        for record in records:
+            typ = record.typ
+            self._counts[typ] += 1
+            if len(self._files) < MAX_FILES:
+                self._files[record.filename] = None
+
+        rows = self._rows
+        formatter = self._formatter
+        prefixes = self._prefixes
+        other_prefix = prefixes['ERROR']
+        for record in records[-self.max_rows:]:
+            typ = record.typ
+            line = formatter.format(typ, record.filename, record.lineno,
+                                    record.message, record.func)
+            prefix = prefixes.get(typ, other_prefix)
+            rows.append(f'{prefix}{html.escape(str(record.filename))}">'
+                        f'{escape_html(line[:-1], newlines=False)}</div>')
+
+        if self._handle is not None:
+            from IPython.display import HTML
+            self._handle.update(HTML(self.render()))
+
+    def _post_run_cell(self, unused_result=None) -> None:
+        """shows the messages from the end of a cell (an IPython event)"""
+        self.flush()
+
+    def render(self) -> str:
+        """gets the HTML of the panel"""
+        panel_id = self.panel_id
+        hide_css = '\n'.join(f'#{panel_id}.hide-{typ} .{typ} {{ display: none; }}'
+                             for typ in PANEL_LEVELS)
+        checkboxes = ' '.join(
+            f'<label><input type="checkbox" class="cpylog-level" value="{typ}" checked> '
+            f'<span style="color:{COLORS[typ]}">{typ} ({self._counts[typ]})</span></label>'
+            for typ in PANEL_LEVELS)
+        options = ''.join(f'<option value="{html.escape(str(filename))}">'
+                          f'{html.escape(str(filename))}</option>'
+                          for filename in sorted(self._files, key=str))
+        nmessages = sum(self._counts.values())
+        return ''.join([
+            f'<div id="{panel_id}" class="cpylog-panel">',
+            PANEL_STYLE.format(panel_id=panel_id, height=self.height, hide_css=hide_css),
+            '<style class="cpylog-file-style"></style>',
+            f'<div class="cpylog-controls">{checkboxes} ',
+            f'<select class="cpylog-file"><option value="">all files</option>{options}</select> ',
+            f'showing {len(self._rows)} of {nmessages}</div>',
+            '<div class="cpylog-rows">', ''.join(self._rows), '</div>',
+            PANEL_SCRIPT.format(panel_id=panel_id),
+            '</div>',
+        ])
+
+    def __repr__(self) -> str:
+        return f'NotebookPanel(max_rows={self.max_rows}, interval={self.interval})'
+
+
+def show_log_panel(log: SimpleLogger, max_rows: int=1000, interval: float=0.2,
+                   fmt: Optional[str]=None, height: int=400,
+                   display: bool=True) -> NotebookPanel:
+    """
+    Shows the messages of a log in a notebook panel instead of one
+    output per message
+
+    Parameters
+    ----------
+    log : SimpleLogger / FileLogger
+        the log; the panel replaces the screen output
+    max_rows : int; default=1000
+        the number of messages in the panel
+    interval : float; default=0.2
+        the minimum time between updates in seconds
+    fmt : str; default=None -> the format of the log
+        the line template (see ``cpylog.format_utils``)
+    height : int; default=400
+        the height of the panel in pixels
+    display : bool; default=True
+        show the panel (requires IPython)
+
+    Returns
+    -------
+    panel : NotebookPanel
+        the panel
+
+    """
+    panel = NotebookPanel(max_rows=max_rows, interval=interval,
+                          fmt=log._formatter.fmt if fmt is None else fmt,
+                          height=height, display=display)
+    log.log_func = panel
+
+    # the messages from the end of a cell are shown when the cell is done
+    ipython = ipython_info()
+    if ipython is not None:
+        ipython.events.register('post_run_cell', panel._post_run_cell)
+    return panel
+
@@ -0,0 +1,101 @@
+"""
+A compact log record for the queued/buffered outputs
+(e.g., ``cpylog.batch_utils.BatchedLogFunc``).
+
+defines:
+  - LogRecord(levelno, time_ns, filename, lineno, msg, func='')
+  - make_record(typ, filename, lineno, msg, func='', time_ns=None)
+  - get_level_code(typ)
+
+A LogRecord uses ``__slots__``, so it doesn't have a __dict__, and the
+output line isn't made until it's written.  The filename is shared with
+the frame cache (see ``cpylog.utils``).  The message args are formatted
+by the log (after the level check), so a record has the message.  A
+record is ~1/3 of the size of a stdlib logging.LogRecord (see
+dev/benchmarks/bench_record.py).
+"""
+from __future__ import annotations
+import time
+from typing import Any, Optional
+
+# the message type codes (stdlib logging levels for the standard types)
+LEVEL_CODES = {
+    'DEBUG': 10,
+    'INFO': 20,
+    'WARNING': 30,
+    'ERROR': 40,
+    'EXCEPTION': 45,
+    'CRITICAL': 50,
+}
+CODE_TO_TYPE = {code: typ for typ, code in LEVEL_CODES.items()}
+
+
+def get_level_code(typ: str) -> int:
+    """
+    Gets the code of a message type (e.g., 20 for 'INFO').  Other
+    types (e.g., from another logging module) get a new code.
+    """
+    try:
+        return LEVEL_CODES[typ]
+    except KeyError:
+        code = 100 + len(LEVEL_CODES)
+        LEVEL_CODES[typ] = code
+        CODE_TO_TYPE[code] = typ
+        return code
+
+
+class LogRecord:
+    """a message that's kept until it's written"""
+    __slots__ = ('levelno', 'time_ns', 'filename', 'lineno', 'msg', 'func')
+
+    def __init__(self, levelno: int, time_ns: int, filename: str, lineno: int,
+                 msg: Any, func: str='') -> None:
+        self.levelno = levelno
+        self.time_ns = time_ns
+        self.filename = filename
+        self.lineno = lineno
+        self.msg = msg
+        self.func = func
+
+    @property
+    def typ(self) -> str:
+        """the message type (e.g., 'INFO')"""
+        return CODE_TO_TYPE[self.levelno]
+
+    @property
+    def time(self) -> float:
+        """the time in seconds since the epoch"""
+        return self.time_ns * 1e-9
+
+    @property
+    def message(self) -> str:
+        """the message (``msg``; like a stdlib logging.LogRecord)"""
+        return self.msg
+
+    def log_args(self) -> tuple[str, str, int, Any]:
+        """gets the (typ, filename, lineno, msg) for a log_func"""
+        return CODE_TO_TYPE[self.levelno], self.filename, self.lineno, self.msg
+
+    def __repr__(self) -> str:
+        return (f'LogRecord(typ={self.typ!r}, filename={self.filename!r}, '
+                f'lineno={self.lineno}, msg={self.msg!r})')
+
+
+def make_record(typ: str, filename: str, lineno: int, msg: Any,
+                func: str='', time_ns: Optional[int]=None) -> LogRecord:
+    """
+    makes a LogRecord from the log_func arguments
+
+    Parameters
+    ----------
+    time_ns : int; default=None -> the current time
+        the time in nanoseconds since the epoch (e.g., from a log file)
+
+    """
+    try:
+        levelno = LEVEL_CODES[typ]
+    except KeyError:
+        levelno = get_level_code(typ)
+    if time_ns is None:
+        time_ns = time.time_ns()
+    return LogRecord(levelno, time_ns, filename, lineno, msg, func)
@@ -0,0 +1,126 @@
+"""
+Sampling of high frequency messages (e.g., debug messages in a loop).
+
+defines:
+  - Sampler(every=None, rate=None, seed=None)
+  - SampledLogger(log, sampler)
+
+The sampling rate is added to the message (e.g., '[sampled 1/100] '),
+so counts can be extrapolated.
+"""
+from __future__ import annotations
+import math
+import random
+from typing import Optional, TYPE_CHECKING
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import SimpleLogger
+
+
+class Sampler:
+    """
+    Decides if a message is kept: every Nth message or randomly with a
+    probability.
+
+    Both modes count down to the next kept message, so a skipped
+    message is just a decrement.  For random sampling, the gap to the
+    next kept message is drawn from a geometric distribution, so the
+    random number generator is only called for kept messages.
+    """
+    def __init__(self, every: Optional[int]=None, rate: Optional[float]=None,
+                 seed: Optional[int]=None) -> None:
+        """
+        Creates a Sampler
+
+        Parameters
+        ----------
+        every : int; default=None
+            keep every Nth message (the first message is kept)
+        rate : float; default=None
+            the probability of keeping a message (0 < rate <= 1)
+        seed : int; default=None
+            the random seed for rate
+
+        """
+        assert (every is None) != (rate is None), f'every={every} or rate={rate} must be set'
+        self.every = every
+        self.rate = rate
+        self.nkept = 0
+        if every is not None:
+            assert isinstance(every, int) and every >= 1, f'every={every!r}'
+            self.label = f'[sampled 1/{every}] '
+            self._log_1mp = 0.
+        else:
+            assert 0. < rate <= 1., f'rate={rate!r}'
+            self.label = f'[sampled p={rate:g}] '
+            self._log_1mp = math.log1p(-rate) if rate < 1. else 0.
+        self._random = random.Random(seed).random
+        self._countdown = 1
+
+    def _next_gap(self) -> int:
+        """the number of messages until the next kept message"""
+        if self.every is not None:
+            return self.every
+        if self._log_1mp == 0.:
+            return 1
+        # 1 - random() is in (0, 1], so the log is finite
+        return 1 + int(math.log(1. - self._random()) / self._log_1mp)
+
+    def __call__(self) -> bool:
+        """is the message kept?"""
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+        self._countdown = self._next_gap()
+        self.nkept += 1
+        return True
+
+    def __repr__(self) -> str:
+        if self.every is not None:
+            return f'Sampler(every={self.every})'
+        return f'Sampler(rate={self.rate})'
+
+
+class SampledLogger:
+    """
+    Samples the messages from a single call site.
+
+    The sampler is checked after the level check and before the frame
+    lookup and formatting.
+
+    Example
+    -------
+    >>> sample = log.sample(every=1000)
+    >>> for i in range(1_000_000):
+    ...     sample.debug(f'i={i}')
+    DEBUG:   file.py:3                    [sampled 1/1000] i=0
+    DEBUG:   file.py:3                    [sampled 1/1000] i=1000
+    """
+    def __init__(self, log: SimpleLogger, sampler: Sampler) -> None:
+        self.log = log
+        self.sampler = sampler
+
+    def _msg_typ(self, typ: str, msg: str, args: tuple) -> None:
+        """
+        nframe=4:
+          0: properties, 1: msg_typ, 2: _msg_typ, 3: debug, 4: caller
+        """
+        if not self.log.is_enabled_for(typ) or not self.sampler():
+            return
+        if args:
+            msg = self.log._format_args(msg, args)
+        self.log.msg_typ(typ, f'{self.sampler.label}{msg}', nframe=4)
+
+    def debug(self, msg: str, *args) -> None:
+        """Log a sampled DEBUG message"""
+        self._msg_typ('DEBUG', msg, args)
+
+    def info(self, msg: str, *args) -> None:
+        """Log a sampled INFO message"""
+        self._msg_typ('INFO', msg, args)
+
+    def warning(self, msg: str, *args) -> None:
+        """Log a sampled WARNING message"""
+        self._msg_typ('WARNING', msg, args)
+
+    def __repr__(self) -> str:
+        return f'SampledLogger(log={self.log!r}, sampler={self.sampler!r})'
@@ -0,0 +1,176 @@
+"""
+Counts the messages of a run, so a summary can be written at the end
+(see ``FileLogger.add_summary``).
+
+defines:
+  - LogSummary(types=('WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL'),
+               max_sites=1000, max_messages=1000)
+
+Example
+-------
+>>> with FileLogger(level='debug', filename='run.log') as log:
+...     log.add_summary()
+...     run()
+INFO:    __init__.py:1234   summary: 10532 messages (DEBUG=10000, INFO=500, WARNING=30, ERROR=2)
+  call sites:
+    WARNING  solver.py:120     x25
+    ...
+  distinct messages (first occurrence):
+    WARNING  solver.py:120     x25  12:00:01  matrix is nearly singular
+    ...
+
+A message is counted with a few dict updates, so the log doesn't have
+to be searched (e.g., grep) at the end of a run.  The call sites and
+the distinct messages are only kept for the ``types`` and the tables
+are limited, so memory doesn't grow with the length of a run.
+"""
+from __future__ import annotations
+import sys
+import time
+from typing import Any, TYPE_CHECKING
+
+from cpylog.utils import accepts_kwarg, properties_from_frame
+if TYPE_CHECKING:  # pragma: no cover
+    from cpylog import SimpleLogger
+
+SUMMARY_TYPES = ('WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+LEVEL_ORDER = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+
+# the number of characters of a message that are used to find the
+# distinct messages (e.g., the first line of a traceback)
+MAX_KEY_CHARS = 200
+
+
+class LogSummary:
+    """
+    A sink that counts the messages per type and the warnings/errors
+    per call site and keeps the first occurrence of each distinct
+    warning/error message
+    """
+    def __init__(self, types: tuple[str, ...]=SUMMARY_TYPES,
+                 max_sites: int=1000, max_messages: int=1000) -> None:
+        """
+        Creates a LogSummary
+
+        Parameters
+        ----------
+        types : tuple[str]; default=('WARNING', 'ERROR', 'EXCEPTION', 'CRITICAL')
+            the message types that are counted per call site/message
+        max_sites : int; default=1000
+            the number of call sites that are counted
+        max_messages : int; default=1000
+            the number of distinct messages that are kept
+
+        """
+        assert max_sites >= 1, f'max_sites={max_sites!r}'
+        assert max_messages >= 1, f'max_messages={max_messages!r}'
+        self.types = frozenset(types)
+        self.max_sites = max_sites
+        self.max_messages = max_messages
+        self.reset()
+
+    def reset(self) -> None:
+        """clears the counts"""
+        # typ -> count
+        self.counts: dict[str, int] = {}
+        # (typ, filename, lineno) -> count
+        self.sites: dict[tuple[str, str, int], int] = {}
+        # (typ, message) -> [count, filename, lineno, time]
+        self.messages: dict[tuple[str, str], list[Any]] = {}
+        # the messages after a table was full
+        self.nsites_dropped = 0
+        self.nmessages_dropped = 0
+
+    def __call__(self, typ: str, filename: str, lineno: int, msg: str) -> None:
+        """counts a message"""
+        counts = self.counts
+        counts[typ] = counts.get(typ, 0) + 1
+        if typ not in self.types:
+            return
+
+        sites = self.sites
+        site = (typ, filename, lineno)
+        nsite = sites.get(site)
+        if nsite is not None:
+            sites[site] = nsite + 1
+        elif len(sites) < self.max_sites:
+            sites[site] = 1
+        else:
+            self.nsites_dropped += 1
+
+        key = (typ, str(msg)[:MAX_KEY_CHARS])
+        first = self.messages.get(key)
+        if first is not None:
+            first[0] += 1
+        elif len(self.messages) < self.max_messages:
+            self.messages[key] = [1, filename, lineno, time.time()]
+        else:
+            self.nmessages_dropped += 1
+
+    def format(self, ntop: int=10) -> str:
+        """
+        Gets the summary
+
+        Parameters
+        ----------
+        ntop : int; default=10
+            the number of call sites and messages that are shown
+            (the most common first)
+
+        """
+        counts = self.counts
+        ntotal = sum(counts.values())
+        typs = [typ for typ in LEVEL_ORDER if typ in counts]
+        # simple_msg has typ=None
+        typs.extend(sorted((typ for typ in counts if typ not in LEVEL_ORDER),
+                           key=lambda typ: typ or ''))
+        count_str = ', '.join(f'{typ or "-"}={counts[typ]}' for typ in typs)
+        lines = [f'summary: {ntotal} messages ({count_str})']
+
+        if self.sites:
+            lines.append('  call sites:')
+            sites = sorted(self.sites.items(), key=lambda item: -item[1])
+            for (typ, filename, lineno), count in sites[:ntop]:
+                lines.append(f'    {typ:<9} {f"{filename}:{lineno}":<28} x{count}')
+            _add_more(lines, len(sites) - ntop, self.nsites_dropped, 'call sites')
+
+        if self.messages:
+            lines.append('  distinct messages (first occurrence):')
+            messages = sorted(self.messages.items(), key=lambda item: -item[1][0])
+            for (typ, msg), (count, filename, lineno, time_s) in messages[:ntop]:
+                time_str = time.strftime('%H:%M:%S', time.localtime(time_s))
+                first_line = msg.strip().split('\n', 1)[0]
+                lines.append(f'    {typ:<9} {f"{filename}:{lineno}":<28} x{count:<5} '
+                             f'{time_str}  {first_line}')
+            _add_more(lines, len(messages) - ntop, self.nmessages_dropped, 'messages')
+        return '\n'.join(lines)
+
+    def write(self, log: SimpleLogger, ntop: int=10) -> None:
+        """
+        Writes the summary as an INFO message (at any level) to the
+        other outputs of the log.  The message doesn't go through
+        ``msg_typ``, so it isn't counted, sampled or escalated.
+        """
+        if not log._active:
+            return
+        lineno, filename, func = properties_from_frame(sys._getframe(1), log._nlevels - 1)
+        msg = self.format(ntop=ntop)
+        for log_func in log.loggers:
+            if log_func is self:
+                continue
+            if accepts_kwarg(log_func, 'func'):
+                log_func('INFO', filename, lineno, msg, func=func)
+            else:
+                log_func('INFO', filename, lineno, msg)
+
+    def __repr__(self) -> str:
+        return (f'LogSummary(types={tuple(sorted(self.types))}, max_sites={self.max_sites}, '
+                f'max_messages={self.max_messages})')
+
+
+def _add_more(lines: list[str], nmore: int, ndropped: int, name: str) -> None:
+    """notes the rows that aren't shown"""
+    if nmore > 0:
+        lines.append(f'    ... {nmore} more {name}')
+    if ndropped:
+        lines.append(f'    ... {ndropped} messages after the table of {name} was full')
@@ -0,0 +1,304 @@
+"""
+Reads the messages of a log file while it's written (``tail -f``).
+
+defines:
+  - follow(path, fmt=DEFAULT_FORMAT, file_format='auto', from_start=True,
+           interval=0.25, timeout=None, encoding='utf-8')
+  - make_line_regex(fmt)
+
+Example
+-------
+>>> import cpylog
+>>> for record in cpylog.follow('run.log'):
+...     if record.typ == 'ERROR':
+...         print(record.filename, record.lineno, record.message)
+
+The file is read in blocks from the last position, so memory doesn't
+grow with the size of the log.  The file is checked for rotation
+(a new file with the same name) and truncation when there's nothing to
+read, so the polling doesn't use inotify.  The formats are:
+ - text:   lines written with a format template (see ``cpylog.format_utils``);
+           a line that doesn't match (e.g., a traceback) is added to the
+           previous message
+ - json:   a JSON object per line (e.g., ``python -m cpylog collect --format json``)
+ - binary: the frames of ``cpylog.network``
+"""
+from __future__ import annotations
+import os
+import re
+import time
+from string import Formatter
+from typing import Iterator, Optional
+
+from cpylog.format_utils import DEFAULT_FORMAT
+from cpylog.record import LogRecord, make_record
+from cpylog.context import render_prefix
+
+FILE_FORMATS = {'auto', 'text', 'json', 'binary'}
+BLOCK_SIZE = 65536
+
+# the regex of each field of a format template
+FIELD_PATTERNS = {
+    'level': r'(?P<level>[A-Z]+)',
+    'label': r'(?P<level>[A-Z]+):',
+    'file': r'(?P<file>\S+?)',
+    'line': r'(?P<line>\d+)',
+    'location': r'(?P<file>\S+):(?P<line>\d+)',
+    'func': r'(?P<func>\S+)',
+    'time': r'(?P<time>.+?)',
+    'pid': r'(?P<pid>\d+)',
+    'thread': r'(?P<thread>.+?)',
+    'msg': r'(?P<msg>.*)',
+}
+
+
+def make_line_regex(fmt: str=DEFAULT_FORMAT) -> re.Pattern:
+    """
+    Makes the regex of a line from a format template, which has the
+    groups: level, file, line, msg (and func, time, pid, thread if they
+    are in the template)
+    """
+    parts = []
+    used = set()
+    for literal, field, unused_spec, unused_conversion in Formatter().parse(fmt):
+        for text in re.split(r'(\s+)', literal):
+            if text:
+                parts.append(r'\s*' if text.isspace() else re.escape(text))
+        if field is None:
+            continue
+        pattern = FIELD_PATTERNS[field]
+        for group in re.findall(r'\?P<(\w+)>', pattern):
+            if group in used:
+                # e.g., {level} and {label} in the same template
+                pattern = pattern.replace(f'?P<{group}>', '?:')
+            used.add(group)
+        # the padding of a field
+        parts.append(r' *' + pattern + r' *')
+    return re.compile(''.join(parts) + '$')
+
+
+class _TextParser:
+    """parses the lines of a text log; a message may have several lines"""
+    def __init__(self, fmt: str, encoding: str) -> None:
+        self.regex = make_line_regex(fmt)
+        self.encoding = encoding
+        self._partial = b''
+        self._pending: Optional[LogRecord] = None
+        self._pending_lines: list[str] = []
+
+    def feed(self, data: bytes) -> list[LogRecord]:
+        """gets the messages that are done"""
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        records = []
+        match = self.regex.match
+        for line_bytes in lines:
+            line = line_bytes.decode(self.encoding, errors='replace').rstrip('\r')
+            groups = match(line)
+            if groups is None:
+                # a continuation line (e.g., a traceback)
+                self._pending_lines.append(line)
+                continue
+            record = self._pop_pending()
+            if record is not None:
+                records.append(record)
+            fields = groups.groupdict()
+            # the time isn't parsed from a text line
+            self._pending = make_record(
+                fields.get('level') or '', fields.get('file') or '',
+                int(fields.get('line') or 0), fields.get('msg') or '',
+                func=fields.get('func') or '', time_ns=0)
+        return records
+
+    def _pop_pending(self) -> Optional[LogRecord]:
+        record = self._pending
+        lines = self._pending_lines
+        if lines:
+            if record is None:
+                record = make_record('', '', 0, '\n'.join(lines), time_ns=0)
+            else:
+                record.msg = '\n'.join([record.msg] + lines)
+            self._pending_lines = []
+        self._pending = None
+        return record
+
+    def flush(self) -> list[LogRecord]:
+        """gets the last message (the file is idle)"""
+        record = self._pop_pending()
+        return [] if record is None else [record]
+
+    def reset(self) -> list[LogRecord]:
+        """a new file; gets the last message of the old file"""
+        records = self.flush()
+        self._partial = b''
+        return records
+
+
+class _JsonParser:
+    """parses a JSON object per line"""
+    def __init__(self, encoding: str) -> None:
+        import json
+        self._loads = json.loads
+        self.encoding = encoding
+        self._partial = b''
+
+    def feed(self, data: bytes) -> list[LogRecord]:
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                obj = self._loads(line.decode(self.encoding, errors='replace'))
+            except ValueError:
+                continue
+            records.append(make_record(
+                obj.get('typ', obj.get('level', '')),
+                obj.get('filename', obj.get('file', '')),
+                int(obj.get('lineno', obj.get('line', 0))),
+                render_prefix(obj.get('fields')) + obj.get('msg', obj.get('message', '')),
+                func=obj.get('func', ''),
+                time_ns=int(float(obj.get('time', 0.)) * 1e9)))
+        return records
+
+    def flush(self) -> list[LogRecord]:
+        return []
+
+    def reset(self) -> list[LogRecord]:
+        self._partial = b''
+        return []
+
+
+class _BinaryParser:
+    """parses the frames of ``cpylog.network``"""
+    def __init__(self) -> None:
+        from cpylog.network import unpack_records
+        self._unpack_records = unpack_records
+        self._partial = b''
+
+    def feed(self, data: bytes) -> list[LogRecord]:
+        net_records, self._partial = self._unpack_records(self._partial + data)
+        return [make_record(record.typ, record.filename, record.lineno,
+                            render_prefix(record.fields) + record.msg, func=record.func, time_ns=int(record.time * 1e9))
+                for record in net_records]
+
+    def flush(self) -> list[LogRecord]:
+        return []
+
+    def reset(self) -> list[LogRecord]:
+        self._partial = b''
+        return []
+
+
+def _get_file_format(path: str, data: bytes) -> str:
+    """guesses the format from the extension or the first bytes"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in {'.json', '.jsonl'}:
+        return 'json'
+    if ext in {'.bin', '.cpylog'}:
+        return 'binary'
+    if data[:1] == b'{':
+        return 'json'
+    if data[:1] == b'\x00':
+        # the frame size is big endian
+        return 'binary'
+    return 'text'
+
+
+def _make_parser(file_format: str, fmt: str, encoding: str):
+    if file_format == 'json':
+        return _JsonParser(encoding)
+    if file_format == 'binary':
+        return _BinaryParser()
+    return _TextParser(fmt, encoding)
+
+
+def follow(path: str, fmt: str=DEFAULT_FORMAT, file_format: str='auto',
+           from_start: bool=True, interval: float=0.25,
+           timeout: Optional[float]=None, encoding: str='utf-8') -> Iterator[LogRecord]:
+    """
+    Gets the messages of a log file as they are written
+
+    Parameters
+    ----------
+    path : str
+        the log file (it may not exist yet)
+    fmt : str; default=DEFAULT_FORMAT
+        the line template of a text log (see ``cpylog.format_utils``)
+    file_format : str; default='auto'
+        'text', 'json', 'binary' or 'auto' (the extension or the first bytes)
+    from_start : bool; default=True
+        True: read the existing messages
+        False: only the new messages
+    interval : float; default=0.25
+        the time between checks for new messages in seconds
+    timeout : float; default=None
+        stop after timeout seconds without a new message; None: never stop
+    encoding : str; default='utf-8'
+        the unicode encoding method
+
+    Yields
+    ------
+    record : LogRecord
+        the message (typ, filename, lineno, message, func; time for json/binary)
+
+    """
+    assert file_format in FILE_FORMATS, f'file_format={file_format!r} must be in {sorted(FILE_FORMATS)}'
+    parser = None
+    file_obj = None
+    last_data_time = time.monotonic()
+    is_first_file = True
+    try:
+        while True:
+            if file_obj is None:
+                try:
+                    file_obj = open(path, 'rb')
+                except FileNotFoundError:
+                    file_obj = None
+                else:
+                    if is_first_file and not from_start:
+                        file_obj.seek(0, os.SEEK_END)
+                    is_first_file = False
+
+            data = file_obj.read(BLOCK_SIZE) if file_obj is not None else b''
+            if data:
+                if parser is None:
+                    parser = _make_parser(
+                        _get_file_format(path, data) if file_format == 'auto' else file_format,
+                        fmt, encoding)
+                last_data_time = time.monotonic()
+                yield from parser.feed(data)
+                continue
+
+            # nothing to read
+            if parser is not None:
+                yield from parser.flush()
+            if file_obj is not None and _is_replaced(path, file_obj):
+                if parser is not None:
+                    yield from parser.reset()
+                file_obj.close()
+                file_obj = None
+                continue
+            if timeout is not None and time.monotonic() - last_data_time > timeout:
+                return
+            time.sleep(interval)
+    finally:
+        if file_obj is not None:
+            file_obj.close()
+
+
+def _is_replaced(path: str, file_obj) -> bool:
+    """was the file rotated (a new file) or truncated?"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        # rotated; the new file isn't there yet
+        return False
+    old_stat = os.fstat(file_obj.fileno())
+    if (stat.st_ino, stat.st_dev) != (old_stat.st_ino, old_stat.st_dev):
+        return True
+    if stat.st_size < file_obj.tell():
+        # truncated (e.g., FileLogger(mode='w') with the same name)
+        return True
+    return False
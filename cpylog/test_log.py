@@ -1,12 +1,23 @@
 """tests log.py"""
+import io
 import os
+import sys
+import copy
+import json
+import time
+import pickle
+import signal
+import faulthandler
+import socket
+import threading
+import logging
 import warnings
 import unittest
 
 import cpylog
 from cpylog import (
     SimpleLogger, FileLogger, get_logger, get_logger2, log_exc,
-    WarningRedirector, USE_HTML)
+    NullLogger, NULL_LOGGER, WarningRedirector, USE_HTML)
 from cpylog.utils import get_default_session
 
 from cpylog.screen_utils import write_screen
@@ -17,7 +28,23 @@ except ImportError as exception:
     warnings.warn(exception)
     IS_COLORAMA = False
 
-from cpylog.html_utils import str_to_html
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from cpylog.html_utils import str_to_html, escape_html, HTMLFileSink
+from cpylog.format_utils import LineFormatter
+from cpylog.logging_bridge import CpylogLogger, route_stdlib_logging
+from cpylog.config import apply_config, ConfigWatcher, install_reload_signal
+from cpylog.network import UDPSink, TCPSink, NetRecord, pack_record, unpack_records
+from cpylog.collector import Collector, format_record
+from cpylog.context import contextualize, get_context
+from cpylog.batch_utils import BatchedLogFunc
+from cpylog.record import make_record
+from cpylog.fd_utils import FdWriter, PIPE_BUF, _split_lines
+from cpylog.summary_utils import LogSummary
+from cpylog.notebook_utils import show_log_panel
 try:
     from cpylog.jupyter_utils import write_html
     HTML_PASSED = True
@@ -130,6 +157,90 @@ class TestLog(unittest.TestCase):
         test_log3.debug('no file')
         del test_log3
 
+    def test_file_logger_nlevels(self):
+        """tests the screen and file get the same nlevels filename"""
+        filename = os.path.join(dirname, 'file_logger_nlevels.log')
+        _remove_file(filename)
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, filename, lineno, msg))
+        with FileLogger(level='debug', filename=filename, include_stream=True,
+                        nlevels=2, log_func=log_func) as test_log:
+            test_log.info('cat')
+            with self.assertWarns(DeprecationWarning):
+                test_log.msg_typ_file('INFO', 'dog', nframe=2)
+        with open(filename, 'r') as file_obj:
+            lines = file_obj.readlines()
+        os.remove(filename)
+
+        typ, filename, lineno, msg = records[0]
+        assert filename == 'cpylog/test_log.py', records
+        assert lines[0] == f'INFO:    %-28s cat\n' % f'{filename}:{lineno}', lines
+        assert records[1][1:] == (filename, lineno + 2, 'dog'), records
+        assert len(lines) == 2, lines
+
+    def test_file_logger_raw(self):
+        """lines are encoded once per batch and appended to the file descriptor"""
+        filename = os.path.join(dirname, 'file_logger_raw.log')
+        _remove_file(filename)
+        with FileLogger(level='debug', filename=filename, include_stream=False,
+                        encoding='latin-1', raw=True) as log1:
+            assert isinstance(log1._file, FdWriter), log1._file
+            log1.set_flush(2)
+            log1.info('caf\xe9 1')
+            assert os.path.getsize(filename) == 0
+            with FileLogger(level='debug', filename=filename, mode='a',
+                            include_stream=False, encoding='latin-1', raw=True) as log2:
+                log2.info('other 1')
+                log1.info('caf\xe9 2')
+                log2.info('other 2')
+                log1.info('caf\xe9 3')
+            log1.flush()
+            with open(filename, 'rb') as file_obj:
+                lines = file_obj.read().decode('latin-1').splitlines()
+        os.remove(filename)
+        msgs = [line.split()[-2] + ' ' + line.split()[-1] for line in lines]
+        assert msgs == ['other 1', 'caf\xe9 1', 'caf\xe9 2', 'other 2', 'caf\xe9 3'], lines
+
+        lines = [f'{i:05d}' + 'x' * (i * 500) + '\n' for i in range(12)]
+        chunks = _split_lines(lines, 'utf-8')
+        assert b''.join(chunks) == ''.join(lines).encode('utf-8')
+        for chunk in chunks:
+            assert len(chunk) <= PIPE_BUF or chunk.count(b'\n') == 1, len(chunk)
+
+    def test_file_logger_routes(self):
+        """a range of levels is written to other files with the same line"""
+        debug_filename = os.path.join(dirname, 'file_logger_debug.log')
+        errors_filename = os.path.join(dirname, 'file_logger_errors.log')
+        warnings_filename = os.path.join(dirname, 'file_logger_warnings.log')
+        with FileLogger(level='debug', filename=debug_filename, include_stream=False) as log:
+            log.add_file(errors_filename, min_level='error')
+            log.add_file(warnings_filename, min_level='info', max_level='warning', raw=True)
+            log.set_flush(10)
+            log.debug('debug')
+            log.info('info')
+            log.warning('warning')
+            log.error('error')
+            log.critical('critical')
+            log.flush()
+            with open(errors_filename, 'r') as file_obj:
+                errors = file_obj.readlines()
+        with open(debug_filename, 'r') as file_obj:
+            lines = file_obj.readlines()
+        with open(warnings_filename, 'r') as file_obj:
+            warnings_lines = file_obj.readlines()
+        for filename in (debug_filename, errors_filename, warnings_filename):
+            os.remove(filename)
+
+        assert len(lines) == 5, lines
+        assert errors == lines[3:], errors
+        assert warnings_lines == lines[1:3], warnings_lines
+
+        # the closed files aren't written after __exit__
+        log.error('after exit')
+        log.flush()
+        assert log.loggers == [], log.loggers
+
     def test_enable_disable(self):
         """tests enabling/disabling log message"""
         log = SimpleLogger(level='info')
@@ -143,6 +254,48 @@ class TestLog(unittest.TestCase):
         log.set_enabled(True)
         log.info('info_enabled 2')
 
+    def test_disable_swaps_methods(self):
+        """a disabled log has no-op level methods; enable restores them"""
+        records = []
+        log = SimpleLogger(level='info', log_func=lambda *args: records.append(args))
+        log.set_escalation(trigger='error', level='debug', nrecords=2)
+        log.disable()
+        for method_name in ('debug', 'info', 'warning', 'error', 'exception', 'critical'):
+            assert log.__dict__[method_name] is cpylog._noop, method_name
+            getattr(log, method_name)('disabled')
+        assert records == [], records
+        assert not log.is_enabled_for('INFO')
+
+        log.enable()
+        assert 'info' not in log.__dict__
+        assert log.__dict__['exception'] is not cpylog._noop  # a trigger
+        assert log.__dict__['debug'] is cpylog._noop
+        log.error('enabled')  # the trigger is restored
+        log.debug('escalated')
+        assert [record[3] for record in records] == ['enabled', 'escalated'], records
+
+    def test_null_logger(self):
+        """NullLogger doesn't write anything"""
+        log = get_logger(log=None, level='off')
+        assert log is NULL_LOGGER
+        assert isinstance(log, NullLogger)
+        log.debug('x=%s', 1)
+        log.info('info')
+        log.warning('warning')
+        log.error('error')
+        log.exception('exception')
+        log.critical('critical')
+        log.bind(case='A').info('bound')
+        log.get_child('solver').info('child')
+        with log.contextualize(worker=2):
+            log.info('context')
+        assert not log.is_enabled_for('CRITICAL')
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            log_exc(log)
+        assert str(log) == 'NullLogger()'
+
     def test_simple_logger(self):
         """tests all the logging levels"""
         log = SimpleLogger(level='critical')
@@ -164,6 +317,184 @@ class TestLog(unittest.TestCase):
         log = SimpleLogger(level='info', log_func=log_func)
         log.info('info_log_func')
 
+        # the log_func replaces the screen output and is kept by add_sink
+        records = []
+        sink_records = []
+        log = SimpleLogger(level='info')
+        log.log_func = lambda typ, filename, lineno, msg: records.append(msg)
+        log.add_sink(lambda typ, filename, lineno, msg: sink_records.append(msg))
+        log.info('both')
+        assert records == ['both'] and sink_records == ['both'], (records, sink_records)
+
+    def test_escape_html(self):
+        """tests escaping the HTML messages"""
+        msg = 'Traceback:\n  x = a < b & "c" > d'
+        html_msg = escape_html(msg)
+        assert html_msg == 'Traceback:<br>  x = a &lt; b &amp; "c" &gt; d', html_msg
+        assert escape_html(msg, newlines=False) == html_msg.replace('<br>', '\n')
+        html_msg = str_to_html('ERROR', 'file.py', 10, 'a<b\nc')
+        assert html_msg.endswith(' ERROR : file.py:10</font> a&lt;b<br>c <br>'), html_msg
+
+    def test_line_formatter(self):
+        """tests the cached level/filename:lineno columns"""
+        formatter = LineFormatter()
+        line = formatter.format('INFO', 'file.py', 10, 'cat')
+        assert line == 'INFO:    %-28s %s\n' % ('file.py:10', 'cat'), repr(line)
+        line = formatter.format('INFO', 'file.py', 10, 'dog')
+        assert line == 'INFO:    %-28s %s\n' % ('file.py:10', 'dog'), repr(line)
+        line = formatter.format('EXCEPTION', 'file.py', 10, 'dog')
+        assert line == 'EXCEPTION: %-28s %s\n' % ('file.py:10', 'dog'), repr(line)
+
+        # simple_msg without a level and with nlevels
+        line = formatter.format('', ['a.py', 'b.py'], [1, 2], 'cat')
+        assert line == ' %-28s %s\n' % ('a.py:1/b.py:2', 'cat'), repr(line)
+
+    def test_format_template(self):
+        """tests user defined formats"""
+        formatter = LineFormatter('{level:<5}|{file}|{line:>4}|{msg!r}|{{braces}}')
+        line = formatter.format('INFO', 'file.py', 10, 'cat')
+        assert line == "INFO |file.py|  10|'cat'|{braces}\n", repr(line)
+
+        formatter = LineFormatter('[{time:%Y}] {pid} {thread} {location} {msg}')
+        line = formatter.format('DEBUG', 'file.py', 10, 'cat')
+        assert line.endswith(f'] {os.getpid()} MainThread file.py:10 cat\n'), repr(line)
+
+        with self.assertRaises(ValueError):
+            LineFormatter('{cat} {msg}')
+
+        log = SimpleLogger(level='debug', fmt='{level} {location}: {msg}')
+        line = log._formatter.format('DEBUG', 'file.py', 10, 'cat')
+        assert line == 'DEBUG file.py:10: cat\n', repr(line)
+        log.debug('new format')
+        html_msg = str_to_html('DEBUG', 'file.py', 10, 'a<b', formatter=log._formatter)
+        assert html_msg == '<font color="#EB9100">DEBUG file.py:10: a&lt;b</font><br>', html_msg
+
+        log.set_format()
+        log.debug('default format')
+
+        # the old format of the filename:lineno and msg columns
+        assert log._level_filename_fmt == ' %-28s %s\n', repr(log._level_filename_fmt)
+        log._level_filename_fmt = ' %-20s | %s\n'
+        assert log._formatter.fmt == '{label:<8} {location:<20} | {msg}', log._formatter.fmt
+        line = log._formatter.format('INFO', 'file.py', 10, 'cat')
+        assert line == 'INFO:    %-20s | %s\n' % ('file.py:10', 'cat'), repr(line)
+        with self.assertRaises(ValueError):
+            log._level_filename_fmt = '%(msg)s'
+        log.set_format('{msg}')
+        with self.assertRaises(ValueError):
+            log._level_filename_fmt
+
+    def test_pickle(self):
+        """a log with children/escalation can be pickled and copied"""
+        log = SimpleLogger(level='info', fmt='{level} {msg}')
+        linear = log.get_child('solver.linear')
+        log.set_escalation(trigger='error', level='debug', nrecords=2)
+        for obj in (log, linear, copy.deepcopy(log)):
+            log2 = pickle.loads(pickle.dumps(obj))._root
+            linear2 = log2.get_child('solver.linear')
+            assert log2.debug is cpylog._noop and linear2.debug is cpylog._noop
+            assert 'error' in log2.__dict__ and 'error' in linear2.__dict__
+            assert log2._formatter.format('INFO', 'file.py', 1, 'cat') == 'INFO cat\n'
+
+    def test_log_func_func(self):
+        """tests passing the calling function to a log_func"""
+        records = []
+        def log_func(typ, filename, lineno, msg, func=''):
+            records.append((typ, filename, msg, func))
+        log = SimpleLogger(level='debug', log_func=log_func)
+        log.debug('cat')
+        assert records[-1] == ('DEBUG', 'test_log.py', 'cat', 'TestLog.test_log_func_func'), records
+
+        # the old 4 argument form doesn't get the function
+        def log_func4(typ, filename, lineno, msg):
+            records.append((typ, filename, msg))
+        log.log_func = log_func4
+        log.info('dog')
+        assert records[-1] == ('INFO', 'test_log.py', 'dog'), records
+
+        log = SimpleLogger(level='debug', fmt='{level} {file} {func}: {msg}')
+        line = log._formatter.format('INFO', 'file.py', 10, 'cat', func='main')
+        assert line == 'INFO file.py main: cat\n', repr(line)
+        log.debug('function name')
+
+    def test_sampling(self):
+        """tests sampling messages"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, filename, msg))
+        log = SimpleLogger(level='debug', log_func=log_func)
+        log.set_sampling(every=10)
+        for i in range(25):
+            log.debug(f'i={i}')
+            log.info(f'i={i}')
+        debug = [msg for typ, filename, msg in records if typ == 'DEBUG']
+        assert debug == ['[sampled 1/10] i=0', '[sampled 1/10] i=10', '[sampled 1/10] i=20'], debug
+        assert len(records) == 28, len(records)
+        assert records[0][1] == 'test_log.py', records[0]
+
+        records.clear()
+        log.set_sampling(rate=0.1, seed=1)
+        for i in range(10000):
+            log.debug('rate')
+        assert 800 < len(records) < 1200, len(records)
+        assert records[0] == ('DEBUG', 'test_log.py', '[sampled p=0.1] rate'), records[0]
+
+        records.clear()
+        log.set_sampling()
+        sample = log.sample(every=100)
+        for i in range(1000):
+            sample.debug(f'i={i}')
+        assert len(records) == 10, len(records)
+        assert records[1] == ('DEBUG', 'test_log.py', '[sampled 1/100] i=100'), records[1]
+
+    def test_child_logger(self):
+        """tests named child loggers"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, msg))
+        log = SimpleLogger(level='info', log_func=log_func)
+        solver = log.get_child('solver')
+        linear = log.getChild('solver.linear')
+        assert solver.get_child('linear') is linear
+        assert log.get_child('solver') is solver
+        assert linear.name == 'solver.linear', linear.name
+        assert str(linear) == "SimpleLogger(name='solver.linear', level='info', encoding='utf-8')", str(linear)
+
+        solver.debug('suppressed')
+        solver.info('solver info')
+        assert records == [('INFO', 'solver info')], records
+
+        # quiet one subsystem
+        records.clear()
+        solver.set_level('warning')
+        solver.info('suppressed')
+        linear.info('suppressed')
+        log.info('root info')
+        assert records == [('INFO', 'root info')], records
+
+        # the inherited level is updated
+        records.clear()
+        solver.set_level(None)
+        log.level = 'debug'
+        assert linear.level == 'debug', linear.level
+        linear.debug('linear debug')
+        assert records == [('DEBUG', 'linear debug')], records
+        linear.set_level('error')
+        log.set_level('info')
+        assert linear.level == 'error', linear.level
+        assert solver.level == 'info', solver.level
+
+        # the outputs are shared
+        records2 = []
+        def log_func2(typ, filename, lineno, msg):
+            records2.append((typ, msg))
+        log.log_func = log_func2
+        solver.info('new output')
+        assert records2 == [('INFO', 'new output')], records2
+
+        with self.assertRaises(AssertionError):
+            log.set_level(None)
+
     def test_get_logger(self):
         """tests the get_logger function"""
         log1 = get_logger(level='debug')
@@ -213,12 +544,138 @@ class TestLog(unittest.TestCase):
             except TypeError:
                 log_exc(log, limit=None, chain=True)
                 raise
+
+    def test_log_exc_options(self):
+        """tests the ``log_exc`` dedupe/max_chars options"""
+        messages = []
+        def log_func(typ, filename, lineno, msg):
+            messages.append(msg)
+        log = SimpleLogger(level='info', log_func=log_func)
+
+        for unused_i in range(3):
+            try:
+                1 + 'cat'
+            except TypeError:
+                log_exc(log, dedupe=True)
+        assert len(messages) == 3, messages
+        assert 'Traceback (most recent call last)' in messages[0], messages[0]
+        assert 'repeated 3 times' in messages[2], messages[2]
+
+        try:
+            1 + 'cat'
+        except TypeError:
+            log_exc(log, max_chars=40)
+            # a BoundLogger doesn't have a level
+            log_exc(log.bind(case=1))
+        assert 'characters truncated' in messages[3], messages[3]
+        assert len(messages[3]) < 100, messages[3]
+        assert messages[4].startswith('[case=1] \nTraceback'), messages[4]
+
+        # the level is checked before building the traceback
+        log = SimpleLogger(level='critical', log_func=log_func)
+        try:
+            1 + 'cat'
+        except TypeError:
+            log_exc(log)
+            log_exc(log.bind(case=1))
+        assert len(messages) == 5, messages
+
+    def test_log_exc_structured(self):
+        """the structured outputs get the frames; the text outputs get the text"""
+        struct_records = []
+        messages = []
+        def struct_func(typ, filename, lineno, msg, func='', fields=None):
+            struct_records.append((msg, fields))
+        def log_func(typ, filename, lineno, msg):
+            messages.append(msg)
+        log = SimpleLogger(level='info', log_func=log_func)
+        log.add_sink(struct_func)
+
+        try:
+            1 + 'cat'
+        except TypeError:
+            log_exc(log, structured=True)
+            log_exc(log.bind(case=1), structured=True)
+        assert messages[0].startswith('\nTraceback'), messages[0]
+        assert messages[1].startswith('[case=1] \nTraceback'), messages[1]
+
+        msg, fields = struct_records[0]
+        assert msg.startswith('\nTraceback'), msg
+        exception = fields['exception']
+        assert exception['type'] == 'TypeError', exception
+        assert 'str' in exception['message'], exception
+        frame = exception['frames'][-1]
+        assert frame['func'] == 'test_log_exc_structured', frame
+        assert frame['file'] == __file__, frame
+        msg, fields = struct_records[1]
+        assert fields['case'] == 1, fields
+        assert fields['exception']['type'] == 'TypeError', fields
+
     def test_default_session(self):
         """tests ``get_default_session``"""
         shell = get_default_session()
         #assert shell in ('cmd.exe', 'powershell.exe', 'sh', 'WindowsTerminal.exe'), 'shell=%r' % shell
         print('shell', shell)
 
+    def test_html_file_sink(self):
+        """tests the paged HTML file"""
+        html_filename = os.path.join(dirname, 'html_sink.html')
+        log_filename = os.path.join(dirname, 'html_sink.log')
+        with FileLogger(level='debug', filename=log_filename, include_stream=False) as log:
+            sink = HTMLFileSink(html_filename, fmt='{label} {msg}', page_size=2, buffer_size=1)
+            log.add_sink(sink)
+            log.debug('x < 1 & y > 2')
+            log.info('info')
+            log.warning('warning')
+        assert sink.filenames == [html_filename, os.path.join(dirname, 'html_sink_2.html')], sink.filenames
+
+        pages = []
+        for filename in sink.filenames:
+            with open(filename, 'r', encoding='utf-8') as html_file:
+                pages.append(html_file.read())
+            os.remove(filename)
+        os.remove(log_filename)
+        page1, page2 = pages
+        assert page1.startswith('<!DOCTYPE html>') and page1.endswith('</html>\n'), page1
+        assert '<font class="DEBUG" color="#EB9100">DEBUG: x &lt; 1 &amp; y &gt; 2\n</font>' in page1, page1
+        assert 'href="html_sink_2.html">next' in page1 and 'warning' not in page1, page1
+        assert 'href="html_sink.html">previous' in page2, page2
+        assert '<font class="WARNING" color="purple">WARNING: warning\n</font>' in page2, page2
+        assert page2.endswith('</html>\n') and 'next</a>' not in page2, page2
+
+        # exactly page_size messages is a single page
+        sink = HTMLFileSink(html_filename, page_size=2)
+        sink('INFO', 'file.py', 1, 'message 1')
+        sink('INFO', 'file.py', 2, 'message 2')
+        sink.close()
+        sink.flush()
+        sink.close()
+        sink('INFO', 'file.py', 3, 'not written')
+        assert sink.filenames == [html_filename], sink.filenames
+        with open(html_filename, 'r', encoding='utf-8') as html_file:
+            page = html_file.read()
+        os.remove(html_filename)
+        assert 'message 2' in page and 'next</a>' not in page, page
+        assert 'not written' not in page, page
+
+    def test_notebook_panel(self):
+        """tests the bounded notebook panel without IPython"""
+        log = SimpleLogger(level='debug')
+        panel = show_log_panel(log, max_rows=3, interval=3600., display=False)
+        assert log.log_func is panel
+        for i in range(10):
+            log.debug(f'i={i}')
+        log.warning('a<b')
+        assert panel.render().count('<div class="cpylog-row ') == 0
+        panel.flush()
+        html_msg = panel.render()
+        assert html_msg.count('<div class="cpylog-row ') == 3, html_msg
+        assert 'i=7' not in html_msg and 'i=9' in html_msg, html_msg
+        assert 'a&lt;b' in html_msg and 'data-file="test_log.py"' in html_msg, html_msg
+        assert 'DEBUG (10)' in html_msg and 'WARNING (1)' in html_msg, html_msg
+        assert 'showing 3 of 11' in html_msg, html_msg
+
+
 class TestWarningRedirector(unittest.TestCase):
     """Test for ``WarningRedirector``."""
 
@@ -257,6 +714,810 @@ class TestWarningRedirector(unittest.TestCase):
         warnings.warn('default warn')
         self.assertIs(warnings.showwarning, warning_function)
 
+class TestLoggingBridge(unittest.TestCase):
+    """Test for ``cpylog.logging_bridge``."""
+
+    def test_handler(self):
+        """tests stdlib logging -> cpylog"""
+        records = []
+        def log_func(typ, filename, lineno, msg, func=''):
+            records.append((typ, filename, msg, func))
+        log = SimpleLogger(level='info', log_func=log_func)
+        handler = route_stdlib_logging(log, name='cpylog_test')
+        logger = logging.getLogger('cpylog_test')
+        try:
+            logger.debug('debug')
+            logger.info('x=%s', 3)
+            try:
+                1 + 'cat'
+            except TypeError:
+                logger.exception('bad add')
+            # the context fields of the cpylog log apply
+            with log.contextualize(case=1):
+                logger.warning('warning')
+        finally:
+            logger.removeHandler(handler)
+        assert len(records) == 3, records
+        assert records[0] == ('INFO', 'test_log.py', 'x=3', 'test_handler'), records
+        typ, filename, msg, func = records[1]
+        assert typ == 'ERROR', records
+        assert msg.startswith('bad add\nTraceback'), msg
+        assert records[2] == ('WARNING', 'test_log.py', '[case=1] warning',
+                              'test_handler'), records
+
+    def test_logger(self):
+        """tests a cpylog log as a stdlib logging.Logger"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, filename, msg))
+        log = SimpleLogger(level='info', log_func=log_func)
+        logger = CpylogLogger(log, name='solver')
+        assert isinstance(logger, logging.Logger)
+        assert not logger.isEnabledFor(logging.DEBUG)
+        logger.debug('debug')
+        logger.info('x=%s y=%r', 3, 'cat')
+        logger.log(logging.WARNING, 'warning')
+        try:
+            1 + 'cat'
+        except TypeError:
+            logger.exception('bad add')
+        assert records[0] == ('INFO', 'test_log.py', "x=3 y='cat'"), records
+        assert records[1] == ('WARNING', 'test_log.py', 'warning'), records
+        assert records[2][0] == 'ERROR', records
+        assert records[2][1] == 'test_log.py', records
+        assert 'TypeError' in records[2][2], records
+
+        logger.setLevel(logging.DEBUG)
+        assert log.level == 'debug', log.level
+        assert logger.getEffectiveLevel() == logging.DEBUG
+        logger.debug('debug')
+        assert records[-1] == ('DEBUG', 'test_log.py', 'debug'), records
+
+        null_logger = CpylogLogger(get_logger(level='off'))
+        assert null_logger.getEffectiveLevel() > logging.CRITICAL
+        null_logger.critical('nothing is written')
+
+    def test_logger_msg_typ(self):
+        """tests that a CpylogLogger uses the context, sampling and escalation"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, filename, msg))
+        log = SimpleLogger(level='debug', log_func=log_func)
+        logger = CpylogLogger(log, name='solver')
+        with log.contextualize(case=1):
+            logger.info('started')
+        assert records[-1] == ('INFO', 'test_log.py', '[case=1] started'), records
+
+        log.set_sampling(every=2)
+        for i in range(4):
+            logger.debug('i=%d', i)
+        assert [msg for typ, filename, msg in records if typ == 'DEBUG'] == [
+            '[sampled 1/2] i=0', '[sampled 1/2] i=2'], records
+        log.set_sampling()
+
+        del records[:]
+        log.level = 'info'
+        log.set_escalation(trigger='error', level='debug', nrecords=1)
+        logger.debug('suppressed')
+        logger.error('failed')
+        logger.debug('escalated')
+        logger.debug('suppressed again')
+        assert records == [('ERROR', 'test_log.py', 'failed'),
+                           ('DEBUG', 'test_log.py', 'escalated')], records
+
+
+class TestConfig(unittest.TestCase):
+    """Test for ``cpylog.config``."""
+
+    def test_apply_config(self):
+        """tests applying a config to a live log"""
+        log_filename = os.path.join(dirname, 'file_logger_config.log')
+        with FileLogger(level='info', filename=log_filename, include_stream=True) as log:
+            solver = log.get_child('solver')
+            apply_config(log, {
+                'level': 'warning',
+                'include_stream': False,
+                'flush': 10,
+                'loggers': {'solver': {'level': 'debug'}},
+            })
+            assert log.level == 'warning', log.level
+            assert solver.level == 'debug', solver.level
+            assert log.loggers == [log.file_logging], log.loggers
+            solver.debug('solver debug')
+            log.info('suppressed')
+
+            apply_config(log, {'loggers': {'solver': {'level': 'inherit'}}})
+            assert solver.level == 'warning', solver.level
+            with self.assertRaises(ValueError):
+                apply_config(log, {'level': 'cat'})
+            with self.assertRaises(ValueError):
+                apply_config(log, {'levels': 'debug'})
+            with self.assertRaises(ValueError):
+                apply_config(log, {'level': 'debug', 'loggers': ['solver']})
+            with self.assertRaises(ValueError):
+                apply_config(log, {'level': 'debug', 'fmt': '{cat} {msg}'})
+            assert log.level == 'warning', log.level
+
+        with open(log_filename, 'r') as log_file:
+            lines = log_file.readlines()
+        os.remove(log_filename)
+        assert len(lines) == 1 and 'solver debug' in lines[0], lines
+
+        log = SimpleLogger(level='info')
+        with self.assertRaises(ValueError):
+            apply_config(log, {'flush': True})
+
+        # nothing is applied if a part of the config doesn't fit the log
+        with FileLogger(level='info', filename=None, include_stream=True) as log:
+            with self.assertRaises(ValueError):
+                apply_config(log, {'level': 'debug', 'fmt': '{msg}',
+                                   'include_stream': False})
+            assert log.level == 'info', log.level
+            assert log._formatter.fmt != '{msg}', log._formatter
+
+    def test_config_watcher(self):
+        """tests reloading a config file"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, msg))
+        log = SimpleLogger(level='info', log_func=log_func)
+
+        config_filename = os.path.join(dirname, 'cpylog_config.json')
+        with open(config_filename, 'w') as config_file:
+            json.dump({'level': 'debug'}, config_file)
+        watcher = ConfigWatcher(config_filename, log, interval=0.01)
+        assert watcher.check()
+        assert not watcher.check()
+        assert log.level == 'debug', log.level
+
+        # the bad config isn't hidden by the level
+        log.level = 'critical'
+        with watcher:
+            with open(config_filename, 'w') as config_file:
+                json.dump({'level': 'cat'}, config_file)
+            os.utime(config_filename, ns=(0, 1))
+            for unused_i in range(200):
+                if records and records[-1][0] == 'CRITICAL':
+                    break
+                time.sleep(0.01)
+        os.remove(config_filename)
+        assert log.level == 'critical', log.level
+        assert records[-1][0] == 'CRITICAL', records
+        assert 'failed to reload' in records[-1][1], records
+
+    @unittest.skipIf(not hasattr(signal, 'SIGUSR1'), 'SIGUSR1 is not supported')
+    def test_reload_signal(self):
+        """tests reloading a config file on SIGUSR1"""
+        log = SimpleLogger(level='info')
+        config_filename = os.path.join(dirname, 'cpylog_config_signal.json')
+        with open(config_filename, 'w') as config_file:
+            json.dump({'level': 'error'}, config_file)
+        old_handler = install_reload_signal(config_filename, log)
+        try:
+            os.kill(os.getpid(), signal.SIGUSR1)
+            # the config is reloaded outside the signal handler
+            for unused_i in range(200):
+                if log.level == 'error':
+                    break
+                time.sleep(0.01)
+        finally:
+            signal.signal(signal.SIGUSR1, old_handler)
+            os.remove(config_filename)
+        assert log.level == 'error', log.level
+
+
+class TestNetwork(unittest.TestCase):
+    """tests the network sinks and collector"""
+    def test_framing(self):
+        """tests packing/unpacking partial frames"""
+        data = (pack_record(2.0, 'node1', 12, 'INFO', 'file.py', 3, 'func', 'b\u00e9ta') +
+                pack_record(1.0, 'node2', 13, 'DEBUG', 'file.py', 4, '', 'alpha',
+                            {'case': 'A12', 'iter': 3}))
+        records, remaining = unpack_records(data[:-3])
+        assert len(records) == 1 and len(remaining) > 0, (records, remaining)
+        assert records[0].msg == 'b\u00e9ta' and records[0].func == 'func', records
+        assert records[0].fields is None, records
+        records, remaining = unpack_records(remaining + data[-3:])
+        assert remaining == b'', remaining
+        assert records[0].source == 'node2' and records[0].lineno == 4, records
+        assert records[0].fields == {'case': 'A12', 'iter': 3}, records
+        line = format_record(records[0])
+        assert line.endswith(' [case=A12 iter=3] alpha\n'), line
+
+    def test_loopback_collector(self):
+        """tests UDP/TCP sinks with a local collector"""
+        stream = io.StringIO()
+        with Collector(host='127.0.0.1', port=0, delay=0., output_format='json',
+                       stream=stream) as collector:
+            udp_sink = UDPSink('127.0.0.1', collector.udp_port, source='node1')
+            tcp_sink = TCPSink('127.0.0.1', collector.tcp_port, source='node2',
+                               flush_interval=0.)
+            log = SimpleLogger(level='debug', log_func=udp_sink)
+            log.info('udp message')
+            log2 = SimpleLogger(level='debug', log_func=tcp_sink)
+            log2.debug('tcp message 1')
+            log2.bind(case='A12').error('tcp message 2')
+            for unused_i in range(200):
+                tcp_sink.flush()
+                collector.poll(0.01)
+                if collector.nrecords == 3:
+                    break
+            tcp_sink.close()
+            udp_sink.close()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert len(records) == 3, records
+        assert [record['time'] for record in records] == sorted(
+            record['time'] for record in records), records
+        msgs = {record['source']: [] for record in records}
+        for record in records:
+            msgs[record['source']].append(record['msg'])
+        assert msgs == {'node1': ['udp message'],
+                        'node2': ['tcp message 1', 'tcp message 2']}, msgs
+        assert records[0]['filename'] == 'test_log.py', records
+        assert records[-1]['fields'] == {'case': 'A12'}, records
+
+    def test_tcp_sink_partial_send(self):
+        """a partially sent frame is resent whole after a reconnect"""
+        class PartialSocket:
+            """takes 10 bytes and then fails"""
+            def __init__(self):
+                self.nsends = 0
+            def send(self, data):
+                self.nsends += 1
+                if self.nsends == 1:
+                    return 10
+                raise OSError('connection reset')
+            def close(self):
+                pass
+
+        stream = io.StringIO()
+        with Collector(host='127.0.0.1', port=0, delay=0., output_format='json',
+                       stream=stream) as collector:
+            tcp_sink = TCPSink('127.0.0.1', collector.tcp_port, source='node1',
+                               flush_interval=3600., min_backoff=0.)
+            tcp_sink._sock = PartialSocket()
+            tcp_sink._connected = True
+            log = SimpleLogger(level='debug', log_func=tcp_sink)
+            log.info('message 1')
+            log.info('message 2')
+            tcp_sink.flush()  # partial send
+            tcp_sink.flush()  # lost connection
+            log.info('message 3')
+            for unused_i in range(200):
+                tcp_sink.flush()
+                collector.poll(0.01)
+                if collector.nrecords == 3:
+                    break
+            tcp_sink.close()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [record['msg'] for record in records] == [
+            'message 1', 'message 2', 'message 3'], records
+        assert tcp_sink.ndropped == 0, tcp_sink.ndropped
+
+    def test_tcp_sink_no_collector(self):
+        """messages are buffered/dropped when the collector is down"""
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        tcp_sink = TCPSink('127.0.0.1', port, max_buffer=200)
+        log = SimpleLogger(level='debug', log_func=tcp_sink)
+        for i in range(10):
+            log.info(f'message {i}')
+        tcp_sink.close(timeout=0.)
+        assert tcp_sink.ndropped == 10, tcp_sink.ndropped
+
+
+class TestContext(unittest.TestCase):
+    """tests the context fields (log.bind / log.contextualize)"""
+    def test_bind(self):
+        """text outputs get the prefix; structured outputs get the fields"""
+        text_records = []
+        def text_func(typ, filename, lineno, msg):
+            text_records.append((filename, msg))
+        log = SimpleLogger(level='info', log_func=text_func)
+        blog = log.bind(case='A12', iter=3)
+        blog.info('converged')
+        blog.debug('suppressed')
+        blog.bind(iter=4).warning('next')
+        assert text_records == [
+            ('test_log.py', '[case=A12 iter=3] converged'),
+            ('test_log.py', '[case=A12 iter=4] next')], text_records
+
+        struct_records = []
+        def struct_func(typ, filename, lineno, msg, func='', fields=None):
+            struct_records.append((msg, func, fields))
+        log.add_sink(struct_func)
+        blog.error('failed')
+        assert text_records[-1] == ('test_log.py', '[case=A12 iter=3] failed'), text_records
+        assert struct_records == [
+            ('failed', 'TestContext.test_bind', {'case': 'A12', 'iter': 3})], struct_records
+
+        # a child shares the outputs of the parent
+        log.get_child('solver').bind(case='B1').info('child')
+        assert struct_records[-1][0] == 'child', struct_records
+        assert text_records[-1] == ('test_log.py', '[case=B1] child'), text_records
+
+        # the sampling/escalation of the log apply to bound messages
+        del text_records[:]
+        log = SimpleLogger(level='info', log_func=text_func)
+        blog = log.bind(case=1)
+        log.set_sampling(every=2, types=('INFO', ))
+        for i in range(4):
+            blog.info('i=%d', i)
+        log.set_sampling()
+        log.set_escalation(trigger='error', level='debug', nrecords=1)
+        blog.error('failed')
+        blog.debug('escalated')
+        blog.debug('suppressed')
+        assert [msg for filename, msg in text_records] == [
+            '[case=1] [sampled 1/2] i=0', '[case=1] [sampled 1/2] i=2',
+            '[case=1] failed', '[case=1] escalated'], text_records
+
+    def test_contextualize(self):
+        """the fields are added to all the messages in the block"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((lineno, msg))
+        log = SimpleLogger(level='debug', log_func=log_func)
+        with log.contextualize(worker=2):
+            log.info('started')
+            log.bind(case='A12').info('bound')
+        log.info('done')
+        assert [msg for unused_lineno, msg in records] == [
+            '[worker=2] started', '[worker=2 case=A12] bound', 'done'], records
+        assert records[0][0] + 1 == records[1][0], records
+        assert get_context() == {}, get_context()
+
+        def worker(case):
+            with contextualize(case=case):
+                time.sleep(0.01)
+                log.info('thread')
+        threads = [threading.Thread(target=worker, args=(case, )) for case in 'AB']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(msg for unused_lineno, msg in records[-2:]) == [
+            '[case=A] thread', '[case=B] thread'], records
+
+
+class TestBatch(unittest.TestCase):
+    """tests the batched log_func"""
+    def test_count_and_interval(self):
+        """the callback gets lists of records"""
+        batches = []
+        batch = BatchedLogFunc(batches.append, interval=3600., max_records=3)
+        log = SimpleLogger(level='debug', log_func=batch)
+        for i in range(7):
+            log.info(f'message {i}')
+        assert [len(records) for records in batches] == [3, 3], batches
+        assert len(batch) == 1, batch
+        record = batches[0][0]
+        assert (record.typ, record.filename, record.message, record.func) == (
+            'INFO', 'test_log.py', 'message 0', 'TestBatch.test_count_and_interval'), batches[0]
+        batch.flush()
+        assert batches[-1][0].msg == 'message 6', batches
+        assert batch.deliver() == 0
+
+        batches.clear()
+        batch = BatchedLogFunc(batches.append, interval=0., max_records=100)
+        log.log_func = batch
+        log.info('now')
+        assert len(batches) == 1, batches
+
+    def test_record(self):
+        """tests the compact record"""
+        record = make_record('INFO', 'file.py', 3, 'x=a y=2', func='func')
+        assert record.typ == 'INFO' and record.levelno == 20, record
+        assert record.message == 'x=a y=2', record
+        assert record.log_args() == ('INFO', 'file.py', 3, 'x=a y=2'), record.log_args()
+        assert abs(record.time - time.time()) < 60., record.time
+        assert not hasattr(record, '__dict__')
+        assert make_record('INFO', 'file.py', 3, '', time_ns=2_000_000_000).time == 2.
+
+        record2 = make_record('CUSTOM', 'file.py', 4, 'custom')
+        assert record2.typ == 'CUSTOM' and record2.levelno > 50, record2
+        assert make_record('CUSTOM', 'file.py', 5, '').levelno == record2.levelno
+
+    def test_notify(self):
+        """deliver is scheduled once per batch"""
+        batches = []
+        delays = []
+        batch = BatchedLogFunc(batches.append, interval=3600., max_records=5,
+                               notify=delays.append)
+        log = SimpleLogger(level='debug', log_func=batch)
+        for i in range(4):
+            log.debug(f'message {i}')
+        assert len(delays) == 1 and delays[0] > 3000., delays
+        assert batches == [], batches
+        log.debug('message 4')
+        assert delays[-1] == 0., delays
+
+        # deliver on the "GUI thread"
+        assert batch.deliver() == 5
+        assert [record.msg for record in batches[0]] == [
+            f'message {i}' for i in range(5)], batches
+
+    def test_threads(self):
+        """messages from several threads are delivered once"""
+        batches = []
+        batch = BatchedLogFunc(batches.append, interval=0.001, max_records=50)
+        log = SimpleLogger(level='debug', log_func=batch)
+        def worker():
+            for i in range(500):
+                log.debug(f'message {i}')
+        threads = [threading.Thread(target=worker) for unused_i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batch.flush()
+        assert sum(len(records) for records in batches) == 2000, len(batches)
+
+
+class TestArrayFormat(unittest.TestCase):
+    """tests the lazy message args and array summaries"""
+    def test_args(self):
+        """args are only formatted for a written message"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append(msg)
+        class Unprintable:
+            def __str__(self):
+                raise RuntimeError('formatted a suppressed message')
+        log = SimpleLogger(level='info', log_func=log_func)
+        log.debug('x = %s', Unprintable())
+        log.info('x = %s; y = %d', 'a', 3)
+        log.bind(case=1).warning('z = %.1f', 2.)
+        log.set_array_format(threshold=10)
+        log.error('x = %s', [1, 2])
+        assert records == ['x = a; y = 3', '[case=1] z = 2.0', 'x = [1, 2]'], records
+
+        # a single dict is used for the names like the logging module
+        log.info('%(a)s and %(b)d', {'a': 'cat', 'b': 2})
+        log.info('x = %s', {'a': 1})
+        assert records[-2:] == ['cat and 2', "x = {'a': 1}"], records
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_arrays(self):
+        """large arrays are summarized"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append(msg)
+        log = SimpleLogger(level='debug', log_func=log_func)
+        x = np.arange(1000, dtype='float64')
+        x[3] = np.nan
+        log.set_array_format(threshold=100)
+        log.debug('x = %s', x)
+        log.debug('ix = %s', np.arange(1000, dtype='int64').reshape(10, 100))
+        log.debug('small = %s', np.arange(3))
+        log.debug('empty = %s', np.full(200, np.nan))
+        log.set_array_format(threshold=100, mode='truncate', edgeitems=2)
+        log.debug('x = %s', np.arange(1000))
+        log.set_array_format(threshold=100)
+        log.debug('%(x)s', {'x': np.zeros(1000)})
+        log.set_array_format(None)
+        log.debug('x = %s', np.arange(3))
+        # numpy 2.2 adds the shape to a summarized repr
+        assert records[4].startswith('x = array([  0,   1, ..., 998, 999]'), records
+        del records[4]
+        assert records == [
+            'x = array(shape=(1000,), dtype=float64, min=0, max=999, nan=1)',
+            'ix = array(shape=(10, 100), dtype=int64, min=0, max=999)',
+            'small = [0 1 2]',
+            'empty = array(shape=(200,), dtype=float64, nan=200)',
+            'array(shape=(1000,), dtype=float64, min=0, max=0, nan=0)',
+            'x = [0 1 2]'], records
+
+
+class TestEscalation(unittest.TestCase):
+    """tests lowering the level after an error"""
+    def test_nrecords(self):
+        """the next N messages are written at the escalated level"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append((typ, lineno, msg))
+        log = SimpleLogger(level='info', log_func=log_func)
+        log.set_escalation(trigger='error', level='debug', nrecords=2)
+        assert log.debug is cpylog._noop
+        assert 'msg_typ' not in log.__dict__
+        log.debug('hidden 1')
+        log.error('error 1')
+        assert log.level == 'debug', log.level
+        log.debug('debug 1')
+        log.debug('debug 2')
+        log.debug('hidden 2')
+        assert log.level == 'info', log.level
+        assert log.debug is cpylog._noop
+        assert 'msg_typ' not in log.__dict__
+        log.exception('exception 1')
+        log.debug('debug 3')
+        assert [msg for unused_typ, unused_lineno, msg in records] == [
+            'error 1', 'debug 1', 'debug 2', 'exception 1', 'debug 3'], records
+        assert records[1][1] + 1 == records[2][1], records
+        assert log._escalation.nescalations == 2, log._escalation
+
+        log.set_escalation(None)
+        assert log.level == 'info', log.level
+        assert 'error' not in log.__dict__
+        log.error('error 2')
+        log.debug('hidden 3')
+        assert records[-1][2] == 'error 2', records
+
+    def test_child(self):
+        """the children share the trigger and the count of the root"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append(msg)
+        log = SimpleLogger(level='info', log_func=log_func)
+        solver = log.get_child('solver')
+        log.set_escalation(trigger='error', level='debug', nrecords=2)
+        log.error('error 1')
+        solver.debug('debug 1')
+        solver.debug('debug 2')
+        solver.debug('hidden 1')
+        solver.debug('hidden 2')
+        assert solver.level == 'info', solver.level
+
+        # a child error escalates the tree
+        solver.error('error 2')
+        assert log.level == 'debug', log.level
+        linear = solver.get_child('linear')
+        linear.debug('debug 3')
+        log.debug('debug 4')
+        linear.debug('hidden 3')
+        assert linear.level == 'info' and log.level == 'info', (linear.level, log.level)
+        assert records == ['error 1', 'debug 1', 'debug 2',
+                           'error 2', 'debug 3', 'debug 4'], records
+        assert log._escalation.nescalations == 2, log._escalation
+
+    def test_duration(self):
+        """the level is restored after the duration"""
+        records = []
+        def log_func(typ, filename, lineno, msg):
+            records.append(msg)
+        log = SimpleLogger(level='warning', log_func=log_func)
+        log.set_escalation(trigger='warning', level='info', duration=0.05)
+        log.warning('warning 1')
+        log.info('info 1')
+        log.debug('hidden 1')
+        time.sleep(0.1)
+        log.info('hidden 2')
+        assert log.level == 'warning', log.level
+        assert records == ['warning 1', 'info 1'], records
+
+        log.set_sampling(every=2, types=('INFO', ))
+        log.warning('warning 2')
+        log.info('info 2')
+        log.info('hidden 3')
+        assert records[-2:] == ['warning 2', '[sampled 1/2] info 2'], records
+
+
+class TestCrashHandler(unittest.TestCase):
+    """tests flushing a buffered log on a crash"""
+    def test_excepthook(self):
+        """an unhandled exception is logged and the file is flushed"""
+        filename = os.path.join(dirname, 'crash_excepthook.log')
+        with FileLogger(level='info', filename=filename, include_stream=True) as log:
+            log.set_flush(False)
+            handler = log.install_crash_handler(signals=())
+            assert sys.excepthook == handler._excepthook
+            assert faulthandler.is_enabled()
+            log.info('buffered')
+            try:
+                raise RuntimeError('bad value')
+            except RuntimeError:
+                sys.excepthook(*sys.exc_info())
+            with open(filename, 'r') as file_obj:
+                lines = file_obj.read()
+
+            thread = threading.Thread(target=_raise_value_error, name='worker')
+            thread.start()
+            thread.join()
+            with open(filename, 'r') as file_obj:
+                thread_lines = file_obj.read()
+        assert sys.excepthook != handler._excepthook
+        assert threading.excepthook != handler._threading_excepthook
+        os.remove(filename)
+
+        assert 'buffered' in lines, lines
+        assert 'unhandled exception: RuntimeError: bad value' in lines, lines
+        assert 'Traceback (most recent call last)' in lines, lines
+        assert "unhandled exception in thread 'worker'" in thread_lines, thread_lines
+        assert 'ValueError: thread failed' in thread_lines, thread_lines
+
+    def test_excepthook_level(self):
+        """the traceback isn't hidden by level='critical' or a disabled log"""
+        filename = os.path.join(dirname, 'crash_excepthook_level.log')
+        old_hook_calls = []
+        old_excepthook = sys.excepthook
+        sys.excepthook = lambda *exc_info: old_hook_calls.append(exc_info[0])
+        try:
+            with FileLogger(level='critical', filename=filename, include_stream=True) as log:
+                log.install_crash_handler(signals=(), fault_handler=False)
+                try:
+                    raise RuntimeError('bad value')
+                except RuntimeError:
+                    sys.excepthook(*sys.exc_info())
+                assert old_hook_calls == [], old_hook_calls
+
+                # nothing is written, so the previous hook gets the exception
+                log.disable()
+                try:
+                    raise TypeError('bad type')
+                except TypeError:
+                    sys.excepthook(*sys.exc_info())
+                assert old_hook_calls == [TypeError], old_hook_calls
+        finally:
+            sys.excepthook = old_excepthook
+        with open(filename, 'r') as file_obj:
+            lines = file_obj.read()
+        os.remove(filename)
+        assert 'Traceback (most recent call last)' in lines, lines
+        assert 'RuntimeError: bad value' in lines, lines
+        assert 'TypeError' not in lines, lines
+
+    @unittest.skipIf(not hasattr(signal, 'SIGUSR2'), 'SIGUSR2 is not supported')
+    def test_signal(self):
+        """the log is flushed and the previous handler gets the signal"""
+        filename = os.path.join(dirname, 'crash_signal.log')
+        signals = []
+        old_handler = signal.signal(signal.SIGUSR2, lambda signum, frame: signals.append(signum))
+        try:
+            with FileLogger(level='info', filename=filename, include_stream=False) as log:
+                log.set_flush(False)
+                log.install_crash_handler(excepthook=False, threads=False,
+                                          signals=(signal.SIGUSR2, ), fault_handler=False)
+                log.info('buffered')
+                os.kill(os.getpid(), signal.SIGUSR2)
+                for unused_i in range(100):
+                    if signals:
+                        break
+                    time.sleep(0.01)
+                with open(filename, 'r') as file_obj:
+                    lines = file_obj.read()
+        finally:
+            signal.signal(signal.SIGUSR2, old_handler)
+        os.remove(filename)
+        assert signals == [signal.SIGUSR2], signals
+        assert 'buffered' in lines, lines
+        assert 'received signal SIGUSR2' in lines, lines
+
+
+class TestFollow(unittest.TestCase):
+    """tests reading a log while it's written"""
+    def test_text(self):
+        """the messages of a text log are parsed and a rotated file is followed"""
+        filename = os.path.join(dirname, 'follow.log')
+        with FileLogger(level='debug', filename=filename, include_stream=False) as log:
+            log.debug('debug 1')
+            log.info('line 1\nline 2')
+            records = cpylog.follow(filename, interval=0.01, timeout=1.0)
+            record = next(records)
+            assert (record.typ, record.filename, record.message) == (
+                'DEBUG', 'test_log.py', 'debug 1'), record
+            assert next(records).message == 'line 1\nline 2'
+            log.warning('warning 1')
+            assert next(records).message == 'warning 1'
+
+        # rotation
+        os.replace(filename, filename + '.1')
+        with FileLogger(level='debug', filename=filename, include_stream=False) as log:
+            log.error('new file')
+        record = next(records)
+        assert (record.typ, record.message) == ('ERROR', 'new file'), record
+        records.close()
+        os.remove(filename + '.1')
+
+        fmt = '{time} {level} {location} {msg}'
+        with FileLogger(level='debug', filename=filename, include_stream=False, fmt=fmt) as log:
+            log.info('custom format')
+        records = list(cpylog.follow(filename, fmt=fmt, timeout=0.05, interval=0.01))
+        os.remove(filename)
+        assert [(record.typ, record.message) for record in records] == [
+            ('INFO', 'custom format')], records
+
+    def test_json_binary(self):
+        """json lines and network frames are parsed"""
+        json_filename = os.path.join(dirname, 'follow.jsonl')
+        binary_filename = os.path.join(dirname, 'follow.bin')
+        net_records = [
+            NetRecord(1.5, 'node1', 10, 'INFO', 'a.py', 3, 'run', 'message 1'),
+            NetRecord(2.5, 'node2', 11, 'ERROR', 'b.py', 4, '', 'message 2'),
+        ]
+        with open(json_filename, 'w') as file_obj:
+            for net_record in net_records:
+                file_obj.write(format_record(net_record, 'json'))
+        with open(binary_filename, 'wb') as file_obj:
+            for net_record in net_records:
+                file_obj.write(pack_record(*net_record))
+
+        for filename in (json_filename, binary_filename):
+            records = list(cpylog.follow(filename, timeout=0.05, interval=0.01))
+            os.remove(filename)
+            assert [(record.typ, record.filename, record.lineno, record.message, record.time)
+                    for record in records] == [
+                        ('INFO', 'a.py', 3, 'message 1', 1.5),
+                        ('ERROR', 'b.py', 4, 'message 2', 2.5)], records
+
+
+class TestSummary(unittest.TestCase):
+    """tests the end of run summary"""
+    def test_file_logger_summary(self):
+        """the summary is written by __exit__"""
+        filename = os.path.join(dirname, 'summary.log')
+        with FileLogger(level='info', filename=filename, include_stream=False) as log:
+            summary = log.add_summary(max_messages=2)
+            for i in range(3):
+                log.warning('nearly singular')
+                log.info(f'i={i}')
+            log.error('bad value')
+            log.error('other value')
+            log.debug('hidden')
+            assert summary.counts == {'WARNING': 3, 'INFO': 3, 'ERROR': 2}, summary.counts
+            assert summary.nmessages_dropped == 1, summary.nmessages_dropped
+        with open(filename, 'r') as file_obj:
+            text = file_obj.read()
+        os.remove(filename)
+
+        lines = text.split('summary: ', 1)[1].splitlines()
+        assert lines[0] == '8 messages (INFO=3, WARNING=3, ERROR=2)', lines
+        assert lines[1] == '  call sites:', lines
+        assert lines[2].split() == ['WARNING', lines[2].split()[1], 'x3'], lines
+        assert lines[2].split()[1].startswith('test_log.py:'), lines
+        assert 'nearly singular' in lines[6] and 'x3' in lines[6], lines
+        assert lines[-1] == '    ... 1 messages after the table of messages was full', lines
+
+    def test_sink(self):
+        """a summary may be added to any log and written on demand"""
+        records = []
+        log = SimpleLogger(level='debug', log_func=lambda *args: records.append(args))
+        summary = LogSummary(types=('ERROR', ))
+        log.add_sink(summary)
+        log.warning('warning')
+        log.error('error 1')
+        log.set_sampling(every=2, types=('INFO', ))
+        log.info('sampled')
+        summary.write(log, ntop=1)
+        assert summary.counts == {'WARNING': 1, 'INFO': 1, 'ERROR': 1}, summary.counts
+        assert records[-1][:3] == ('INFO', 'test_log.py', records[-1][2]), records
+        msg = records[-1][3]
+        assert msg.startswith('summary: 3 messages (INFO=1, WARNING=1, ERROR=1)'), msg
+        assert 'warning' not in msg and 'error 1' in msg, msg
+
+        # simple_msg (typ=None) and a custom type
+        summary = LogSummary()
+        summary(None, 'file.py', 1, 'raw')
+        summary('COMMAND', 'file.py', 2, 'command')
+        summary('INFO', 'file.py', 3, 'info')
+        line = summary.format().splitlines()[0]
+        assert line == 'summary: 3 messages (INFO=1, -=1, COMMAND=1)', line
+
+    def test_summary_sink_error(self):
+        """the file is closed even if a sink fails on the summary"""
+        filename = os.path.join(dirname, 'summary_error.log')
+        def bad_sink(typ, filename, lineno, msg):
+            if msg.startswith('summary:'):
+                raise RuntimeError('sink failed')
+        with self.assertRaises(RuntimeError):
+            with FileLogger(level='info', filename=filename, include_stream=False) as log:
+                log.add_summary()
+                log.add_sink(bad_sink)
+                log.info('message')
+                file_obj = log._file
+        os.remove(filename)
+        assert file_obj.closed
+        assert log._file is None and log._summary is None
+
+
+def _raise_value_error():
+    raise ValueError('thread failed')
+
+
 def _remove_file(filename):
     if os.path.exists(filename):
         os.remove(filename)
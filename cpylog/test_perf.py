@@ -0,0 +1,308 @@
+"""
+Performance regression tests for cpylog.
+
+measures:
+  - the time to ``import cpylog`` (in a new interpreter) and the
+    number of modules it imports
+  - the cost of a suppressed message
+  - the cost of a written message for the screen, colorama and file outputs
+  - the memory used by suppressed/written messages (tracemalloc)
+
+The message times are divided by the time of an empty function call
+that's measured at the same time, so the baseline (perf_baseline.json)
+mostly doesn't depend on the machine.  A metric fails if it's more than
+``value * (1 + tolerance) + slack``.
+
+The tests are slow and are skipped unless CPYLOG_PERF=1:
+
+CPYLOG_PERF=1 python -m pytest cpylog/test_perf.py
+python cpylog/test_perf.py                    # same
+python cpylog/test_perf.py --update-baseline  # after an intended change
+"""
+import os
+import sys
+import json
+import timeit
+import tempfile
+import tracemalloc
+import subprocess
+import unittest
+from typing import Callable, Optional
+
+import cpylog
+from cpylog import SimpleLogger, FileLogger, NULL_LOGGER
+
+BASELINE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'perf_baseline.json')
+RUN_PERF = os.environ.get('CPYLOG_PERF', '0') not in {'', '0'}
+
+# the tolerances of new metrics (see --update-baseline)
+DEFAULT_TOLERANCES = {
+    'import_ms': (1.0, 10.),
+    'import_nmodules': (0.1, 2),
+    'peak_bytes': (0.5, 256),
+    'retained_blocks': (0., 5),
+    'ratio': (0.5, 0.5),
+}
+
+IMPORT_CODE = """
+import sys, time
+modules = set(sys.modules)
+t0 = time.perf_counter()
+import cpylog
+dt = time.perf_counter() - t0
+print(dt * 1000., len(set(sys.modules) - modules))
+"""
+
+
+def _empty(msg: str) -> None:
+    """the reference call"""
+
+
+def null_log_func(typ: str, filename: str, lineno: int, msg: str) -> None:
+    """skips the output, so only the cost of the log is measured"""
+
+
+def time_call(func: Callable[[], None], number: int=20000, repeat: int=7) -> float:
+    """gets the time per call in ns"""
+    times = timeit.repeat(func, number=number, repeat=repeat)
+    return min(times) / number * 1e9
+
+
+def measure_import(nruns: int=5) -> dict[str, float]:
+    """gets the time to import cpylog (fastest run) and the number of new modules"""
+    env = dict(os.environ)
+    dirname = os.path.dirname(os.path.dirname(os.path.abspath(cpylog.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([dirname, env.get('PYTHONPATH', '')])
+    times = []
+    nmodules = 0
+    for unused_i in range(nruns):
+        out = subprocess.run([sys.executable, '-c', IMPORT_CODE], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        time_ms, nmodules_str = out.split()
+        times.append(float(time_ms))
+        nmodules = int(nmodules_str)
+    return {'import_ms': min(times), 'import_nmodules': nmodules}
+
+
+def measure_calls() -> dict[str, float]:
+    """
+    Gets the cost of the messages relative to an empty function call
+    (e.g., suppressed_ratio=1.5 is 1.5x the cost of ``_empty('message')``)
+    """
+    quiet_log = SimpleLogger(level='info', log_func=null_log_func)
+    disabled_log = SimpleLogger(level='debug', log_func=null_log_func)
+    disabled_log.disable()
+    null_log = SimpleLogger(level='debug', log_func=null_log_func)
+
+    empty = time_call(lambda: _empty('message'))
+    results = {
+        'suppressed_ratio': time_call(lambda: quiet_log.debug('message')),
+        'suppressed_args_ratio': time_call(lambda: quiet_log.debug('x=%s', 1)),
+        'disabled_ratio': time_call(lambda: disabled_log.info('message')),
+        'null_logger_ratio': time_call(lambda: NULL_LOGGER.info('message')),
+        'null_output_ratio': time_call(lambda: null_log.info('message')),
+    }
+    results.update(_measure_outputs())
+    return {name: value / empty for name, value in results.items()}
+
+
+def _measure_outputs() -> dict[str, float]:
+    """gets the cost of a written message for the screen/colorama/file outputs"""
+    results = {}
+    dirname = tempfile.mkdtemp()
+    filename = os.path.join(dirname, 'perf.log')
+    stdout = sys.stdout
+    write = cpylog._write
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            cpylog._write = _get_screen_writer()
+            log = SimpleLogger(level='debug')
+            results['screen_ratio'] = time_call(lambda: log.info('message'))
+
+            colorama_write = _get_colorama_writer()
+            if colorama_write is not None:
+                cpylog._write = colorama_write
+                results['colorama_ratio'] = time_call(lambda: log.info('message'))
+
+            with FileLogger(level='debug', filename=filename, include_stream=False) as log:
+                results['file_ratio'] = time_call(lambda: log.info('message'))
+        finally:
+            sys.stdout = stdout
+            cpylog._write = write
+    os.remove(filename)
+    os.rmdir(dirname)
+    return results
+
+
+def _get_screen_writer():
+    from cpylog.screen_utils import write_screen
+    return write_screen
+
+
+def _get_colorama_writer():
+    try:
+        from cpylog.colorama_utils import write_colorama
+    except ImportError:
+        return None
+    return write_colorama
+
+
+def measure_memory(nmessages: int=1000) -> dict[str, float]:
+    """
+    Gets the peak memory (bytes) of the suppressed/written messages and
+    the number of blocks that are still allocated after the messages
+    (e.g., a cache that grows)
+    """
+    quiet_log = SimpleLogger(level='info', log_func=null_log_func)
+    log = SimpleLogger(level='debug', log_func=null_log_func)
+    dirname = tempfile.mkdtemp()
+    filename = os.path.join(dirname, 'perf.log')
+
+    # the memory of the measurement (e.g., the snapshots)
+    peak_bytes0, nblocks0 = _measure_memory(lambda: _empty('message'), nmessages)
+
+    results = {}
+    with FileLogger(level='debug', filename=filename, include_stream=False) as file_log:
+        for name, func in [
+                ('suppressed', lambda: quiet_log.debug('message')),
+                ('suppressed_args', lambda: quiet_log.debug('x=%s', 1)),
+                ('null_output', lambda: log.info('message')),
+                ('file', lambda: file_log.info('message'))]:
+            peak_bytes, nblocks = _measure_memory(func, nmessages)
+            results[f'{name}_peak_bytes'] = max(peak_bytes - peak_bytes0, 0)
+            results[f'{name}_retained_blocks'] = max(nblocks - nblocks0, 0)
+    os.remove(filename)
+    os.rmdir(dirname)
+    return results
+
+
+def _measure_memory(func: Callable[[], None], nmessages: int) -> tuple[int, int]:
+    """gets the peak memory and the retained blocks of a message"""
+    # fill the frame/format caches
+    func()
+    func()
+    tracemalloc.start()
+    try:
+        snapshot1 = tracemalloc.take_snapshot()
+        current, unused_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for unused_i in range(nmessages):
+            func()
+        unused_current, peak = tracemalloc.get_traced_memory()
+        snapshot2 = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = snapshot2.filter_traces(filters).compare_to(
+        snapshot1.filter_traces(filters), 'lineno')
+    nblocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    return peak - current, nblocks
+
+
+def measure_all() -> dict[str, float]:
+    """gets all the metrics"""
+    results = measure_import()
+    results.update(measure_calls())
+    results.update(measure_memory())
+    return results
+
+
+def load_baseline(filename: str=BASELINE_FILENAME) -> dict[str, dict[str, float]]:
+    """gets the metrics of the baseline"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as baseline_file:
+        return json.load(baseline_file)['metrics']
+
+
+def get_limit(metric: dict[str, float]) -> float:
+    """the largest value of a metric that passes"""
+    return metric['value'] * (1. + metric['tolerance']) + metric['slack']
+
+
+def _get_default_tolerance(name: str) -> tuple[float, float]:
+    for suffix in ('peak_bytes', 'retained_blocks', 'ratio'):
+        if name.endswith(suffix):
+            return DEFAULT_TOLERANCES[suffix]
+    return DEFAULT_TOLERANCES[name]
+
+
+def update_baseline(results: dict[str, float], filename: str=BASELINE_FILENAME) -> None:
+    """writes the baseline (keeping the tolerances of the existing metrics)"""
+    old_metrics = load_baseline(filename)
+    metrics = {}
+    for name, value in sorted(results.items()):
+        old_metric = old_metrics.get(name)
+        tolerance, slack = ((old_metric['tolerance'], old_metric['slack'])
+                            if old_metric else _get_default_tolerance(name))
+        metrics[name] = {'value': round(value, 3), 'tolerance': tolerance, 'slack': slack}
+    # a metric that wasn't measured (e.g., colorama isn't installed) is kept
+    for name, metric in old_metrics.items():
+        metrics.setdefault(name, metric)
+
+    baseline = {
+        'python': f'{sys.version_info.major}.{sys.version_info.minor}',
+        'platform': sys.platform,
+        'metrics': metrics,
+    }
+    with open(filename, 'w') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+class TestPerf(unittest.TestCase):
+    """checks the metrics against perf_baseline.json"""
+    @classmethod
+    def setUpClass(cls) -> None:
+        if not RUN_PERF:
+            raise unittest.SkipTest('set CPYLOG_PERF=1 to run the performance tests')
+        cls.baseline = load_baseline()
+        if not cls.baseline:
+            raise unittest.SkipTest(f'{BASELINE_FILENAME} does not exist')
+
+    def check(self, results: dict[str, float]) -> None:
+        failed = []
+        for name, value in sorted(results.items()):
+            metric: Optional[dict[str, float]] = self.baseline.get(name)
+            if metric is None:
+                continue
+            limit = get_limit(metric)
+            if value > limit:
+                failed.append(f'{name}={value:.3f} > {limit:.3f} '
+                              f'(baseline={metric["value"]})')
+        assert not failed, 'performance regression:\n  ' + '\n  '.join(failed)
+
+    def test_import(self):
+        """import cpylog is fast and doesn't import many modules"""
+        self.check(measure_import())
+
+    def test_calls(self):
+        """suppressed and written messages are cheap"""
+        self.check(measure_calls())
+
+    def test_memory(self):
+        """messages don't allocate much memory and don't leak"""
+        self.check(measure_memory())
+
+
+def main(argv: Optional[list[str]]=None) -> None:  # pragma: no cover
+    """runs the performance tests or updates the baseline"""
+    argv = sys.argv[1:] if argv is None else argv
+    if '--update-baseline' in argv:
+        results = measure_all()
+        update_baseline(results)
+        for name, value in sorted(results.items()):
+            print(f'{name:<32s} {value:12.3f}')
+        print(f'wrote {BASELINE_FILENAME}')
+        return
+    global RUN_PERF
+    RUN_PERF = True
+    unittest.main(argv=[sys.argv[0]] + argv,
+                  defaultTest='TestPerf')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -2,7 +2,12 @@
 import sys
 import os
 from typing import Optional
-from pathlib import Path
+
+# (code object, dframe) -> (short filename, qualified function name)
+#   the filename only depends on the code object, so we can skip
+#   the abspath/basename calls after the first message from a call site
+_CODE_CACHE: dict = {}
+MAX_CODE_CACHE_SIZE = 4096
 
 def ipython_info() -> Optional[str]:
     """determines if iPython/Jupyter notebook is running"""
@@ -116,6 +121,8 @@ def properties2(nframe: int=3, dframe: int=0) -> tuple[int, str]:
         0 = current
         2 = calling from an embedded function (e.g., log_msg)
         3 = calling from an embedded class (e.g., SimpleLogger)
+    dframe : int; default=0
+        the number of parent directories to include in the filename
 
     Returns
     -------
@@ -125,9 +132,79 @@ def properties2(nframe: int=3, dframe: int=0) -> tuple[int, str]:
         the filen ame of the nth frame
 
     """
-    fnamesi = []
     frame = sys._getframe(nframe)
+    try:
+        return frame.f_lineno, _CODE_CACHE[(frame.f_code, dframe)][0]
+    except KeyError:
+        return frame.f_lineno, _cache_code(frame, dframe)[0]
+
+
+def properties3(nframe: int=3, dframe: int=0) -> tuple[int, str, str]:
+    """
+    Gets frame information including the calling function.
+    The function name comes from the same frame lookup as the
+    filename and is cached per code object.
+
+    Parameters
+    ----------
+    nframe : int; default=3
+        the number of frames to jump back
+        0 = current
+        2 = calling from an embedded function (e.g., log_msg)
+        3 = calling from an embedded class (e.g., SimpleLogger)
+    dframe : int; default=0
+        the number of parent directories to include in the filename
+
+    Returns
+    -------
+    line number : int
+        the line number of the nth frame
+    filename : str
+        the filename of the nth frame
+    func : str
+        the qualified name of the function of the nth frame
+        (e.g., 'SimpleLogger.debug'; '<module>' for a script)
+
+    """
+    frame = sys._getframe(nframe)
+    try:
+        filename, func = _CODE_CACHE[(frame.f_code, dframe)]
+    except KeyError:
+        filename, func = _cache_code(frame, dframe)
+    return frame.f_lineno, filename, func
+
+
+def properties_from_frame(frame, dframe: int=0) -> tuple[int, str, str]:
+    """
+    Gets the (lineno, filename, func) for a frame that was already found
+    (e.g., by walking past the logging module); see ``properties3``
+    """
+    try:
+        filename, func = _CODE_CACHE[(frame.f_code, dframe)]
+    except KeyError:
+        filename, func = _cache_code(frame, dframe)
+    return frame.f_lineno, filename, func
+
+
+def _cache_code(frame, dframe: int) -> tuple[str, str]:
+    """caches the filename/function name for the code object of a frame"""
+    code = frame.f_code
     frame_file = get_frame_file_from_frame(frame)
+    filename = get_short_filename(frame_file, dframe)
+    # co_qualname is new in Python 3.11
+    func = getattr(code, 'co_qualname', code.co_name)
+    if len(_CODE_CACHE) > MAX_CODE_CACHE_SIZE:
+        _CODE_CACHE.clear()
+    value = _CODE_CACHE[(code, dframe)] = (filename, func)
+    return value
+
+
+def get_short_filename(frame_file: str, dframe: int=0) -> str:
+    """
+    Gets the filename with dframe parent directories
+    (e.g., 'cpylog/utils.py' for dframe=1)
+    """
+    fnamesi = []
     active_file = os.path.abspath(frame_file)
     base_file = os.path.basename(active_file)
     dirname = os.path.dirname(active_file)
@@ -137,11 +214,31 @@ def properties2(nframe: int=3, dframe: int=0) -> tuple[int, str]:
     elif dframe == 1:
         fnamesi.append(os.path.basename(dirname))
     else:
+        # the filename is cached, so pathlib is only imported for nlevels > 2
+        from pathlib import Path
         parts = Path(dirname).parts[-dframe:]
         fnamesi.extend(parts)
     fnamesi.append(base_file[:-1] if base_file.endswith('.pyc')
                    else base_file)
-    return frame.f_lineno, '/'.join(fnamesi)
+    return '/'.join(fnamesi)
+
+
+def accepts_kwarg(func, name: str) -> bool:
+    """
+    Does a function (e.g., a log_func) take a keyword argument?
+    True for an explicit argument or **kwargs.
+    """
+    # inspect is slow to import and only needed when configuring a log
+    import inspect
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+    if name in parameters:
+        return parameters[name].kind in {inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                                         inspect.Parameter.KEYWORD_ONLY}
+    return any(param.kind == inspect.Parameter.VAR_KEYWORD
+               for param in parameters.values())
 
 
 def get_frame_file_from_frame(frame) -> str:
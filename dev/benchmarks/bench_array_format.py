@@ -0,0 +1,63 @@
+"""
+Compares the cost of logging a 1,000,000 element array:
+ - f-string (the repr is always made, even for a suppressed message)
+ - args (the repr is only made for a written message)
+ - args + set_array_format (summary / truncate)
+
+numpy.set_printoptions(threshold=sys.maxsize) is used for the full repr
+case, which is what a user gets who wants to see the values.  The full
+repr scales worse than linearly (~6 s for 100,000 values), so that case
+uses the first 100,000 values.
+
+python dev/benchmarks/bench_array_format.py
+"""
+import sys
+import timeit
+
+import numpy as np
+from cpylog import SimpleLogger
+
+
+def time_call(func, number: int=5, repeat: int=3) -> float:
+    """gets the time per call in ms"""
+    times = timeit.repeat(func, number=number, repeat=repeat)
+    return min(times) / number * 1e3
+
+
+def null_log_func(typ: str, filename: str, lineno: int, msg: str) -> None:
+    """skips the screen, so only the message cost is measured"""
+
+
+def main() -> None:
+    x = np.random.default_rng(0).standard_normal(1_000_000)
+    x[::1000] = np.nan
+    log = SimpleLogger(level='debug', log_func=null_log_func)
+    quiet_log = SimpleLogger(level='info', log_func=null_log_func)
+
+    x_all = x
+    for label, options in [('default printoptions', {}),
+                           ('full repr; 100,000 values', {'threshold': sys.maxsize})]:
+        # the full repr takes seconds
+        number, repeat = (1, 1) if options else (5, 3)
+        x = x_all[:100_000] if options else x_all
+        with np.printoptions(**options):
+            show(f'f-string ({label})',
+                 time_call(lambda: log.debug(f'x = {x}'), number, repeat))
+            show(f'f-string suppressed ({label})',
+                 time_call(lambda: quiet_log.debug(f'x = {x}'), number, repeat))
+            show(f'args suppressed ({label})',
+                 time_call(lambda: quiet_log.debug('x = %s', x)))
+
+    x = x_all
+    log.set_array_format(threshold=100, mode='summary')
+    show('args + summary', time_call(lambda: log.debug('x = %s', x)))
+    log.set_array_format(threshold=100, mode='truncate')
+    show('args + truncate', time_call(lambda: log.debug('x = %s', x)))
+
+
+def show(label: str, time_ms: float) -> None:
+    print(f'{label:<48s} {time_ms:10.3f} ms/msg', flush=True)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
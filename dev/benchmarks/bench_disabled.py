@@ -0,0 +1,54 @@
+"""
+Compares the cost of a message that isn't written to an empty function call:
+ - SimpleLogger.disable() (the level methods are no-ops)
+ - SimpleLogger at 'info' level (a suppressed debug message)
+ - NULL_LOGGER
+ - an if-check on a flag (what a user would write by hand)
+
+python dev/benchmarks/bench_disabled.py
+"""
+import timeit
+
+from cpylog import SimpleLogger, NULL_LOGGER
+
+
+def time_call(func, number: int=200000, repeat: int=7) -> float:
+    """gets the time per call in ns"""
+    times = timeit.repeat(func, number=number, repeat=repeat)
+    return min(times) / number * 1e9
+
+
+def empty(msg: str) -> None:
+    """the reference call"""
+
+
+def null_log_func(typ: str, filename: str, lineno: int, msg: str) -> None:
+    """skips the screen"""
+
+
+def main() -> None:
+    disabled_log = SimpleLogger(level='debug', log_func=null_log_func)
+    disabled_log.disable()
+    quiet_log = SimpleLogger(level='info', log_func=null_log_func)
+    active = False
+
+    def if_check():
+        if active:
+            empty('message')
+
+    # warm up
+    time_call(lambda: empty('message'))
+    empty_ns = time_call(lambda: empty('message'))
+    for label, func in [
+            ('empty function', lambda: empty('message')),
+            ('if-check on a flag', if_check),
+            ('SimpleLogger.disable(); info', lambda: disabled_log.info('message')),
+            ('SimpleLogger(level=info); debug', lambda: quiet_log.debug('message')),
+            ('NULL_LOGGER.info', lambda: NULL_LOGGER.info('message')),
+            ('NULL_LOGGER.info with args', lambda: NULL_LOGGER.info('x=%s', 1))]:
+        time_ns = time_call(func)
+        print(f'{label:<36s} {time_ns:6.1f} ns/msg  ({time_ns / empty_ns:4.2f}x)')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
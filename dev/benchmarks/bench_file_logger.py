@@ -0,0 +1,65 @@
+"""
+Compares the cost of a message for:
+ - SimpleLogger (screen)
+ - FileLogger(include_stream=False) (file)
+ - FileLogger(include_stream=True) (screen + file)
+ - FileLogger(raw=False/True) with set_flush(1/100) (text file vs os.write)
+
+The screen + file logger should cost about the same as the
+screen logger plus the file write (one frame lookup).
+
+python dev/benchmarks/bench_file_logger.py
+"""
+import os
+import sys
+import timeit
+import tempfile
+
+from cpylog import SimpleLogger, FileLogger
+
+
+def time_log(log, number: int=20000, repeat: int=5) -> float:
+    """gets the time per message in ns"""
+    times = timeit.repeat(lambda: log.info('message'), number=number, repeat=repeat)
+    return min(times) / number * 1e9
+
+
+def main() -> None:
+    dirname = tempfile.mkdtemp()
+    filename1 = os.path.join(dirname, 'file.log')
+    filename2 = os.path.join(dirname, 'file_stream.log')
+
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            screen = time_log(SimpleLogger(level='debug'))
+            with FileLogger(level='debug', filename=filename1, include_stream=False) as log:
+                file = time_log(log)
+            with FileLogger(level='debug', filename=filename2, include_stream=True) as log:
+                both = time_log(log)
+        finally:
+            sys.stdout = stdout
+        flush_times = {}
+        for raw in [False, True]:
+            for flush in [1, 100]:
+                filename = os.path.join(dirname, f'file_raw_{raw}_{flush}.log')
+                with FileLogger(level='debug', filename=filename, include_stream=False,
+                                raw=raw) as log:
+                    log.set_flush(flush)
+                    flush_times[(raw, flush)] = time_log(log)
+                os.remove(filename)
+    os.remove(filename1)
+    os.remove(filename2)
+    os.rmdir(dirname)
+
+    print(f'SimpleLogger:                       {screen:6.0f} ns/msg')
+    print(f'FileLogger(include_stream=False):   {file:6.0f} ns/msg')
+    print(f'FileLogger(include_stream=True):    {both:6.0f} ns/msg')
+    print(f'SimpleLogger + file write:          {screen + file:6.0f} ns/msg')
+    for (raw, flush), time_ns in flush_times.items():
+        print(f'FileLogger(raw={raw!s:<5}); flush={flush:<3}    {time_ns:6.0f} ns/msg')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares the cost of a message for:
+ - stdlib logging with a StreamHandler
+ - stdlib logging with a CpylogHandler (stdlib -> cpylog)
+ - CpylogLogger (stdlib API -> cpylog)
+ - SimpleLogger
+
+All the output goes to os.devnull.
+
+python dev/benchmarks/bench_logging_bridge.py
+"""
+import os
+import sys
+import timeit
+import logging
+
+from cpylog import SimpleLogger
+from cpylog.logging_bridge import CpylogHandler, CpylogLogger
+
+
+def time_call(func, number: int=20000, repeat: int=5) -> float:
+    """gets the time per call in ns"""
+    times = timeit.repeat(func, number=number, repeat=repeat)
+    return min(times) / number * 1e9
+
+
+def main() -> None:
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            stdlib_logger = logging.getLogger('bench_stdlib')
+            stdlib_logger.propagate = False
+            stdlib_logger.setLevel(logging.INFO)
+            handler = logging.StreamHandler(devnull)
+            handler.setFormatter(logging.Formatter(
+                '%(levelname)-8s %(filename)s:%(lineno)-4s %(message)s'))
+            stdlib_logger.addHandler(handler)
+
+            log = SimpleLogger(level='info')
+            bridge_logger = logging.getLogger('bench_bridge')
+            bridge_logger.propagate = False
+            bridge_logger.setLevel(logging.INFO)
+            bridge_logger.addHandler(CpylogHandler(log))
+            cpylog_logger = CpylogLogger(log)
+
+            results = []
+            for name, logger in [('stdlib logging + StreamHandler', stdlib_logger),
+                                 ('stdlib logging + CpylogHandler', bridge_logger),
+                                 ('CpylogLogger', cpylog_logger)]:
+                emitted = time_call(lambda: logger.info('x=%s', 3))
+                suppressed = time_call(lambda: logger.debug('x=%s', 3))
+                results.append((name, emitted, suppressed))
+            results.append(('SimpleLogger', time_call(lambda: log.info('x=3')),
+                            time_call(lambda: log.debug('x=3'))))
+        finally:
+            sys.stdout = stdout
+
+    print(f'{"":32s} {"emitted":>10s} {"suppressed":>12s}')
+    for name, emitted, suppressed in results:
+        print(f'{name:32s} {emitted:7.0f} ns {suppressed:9.0f} ns')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
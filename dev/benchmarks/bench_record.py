@@ -0,0 +1,64 @@
+"""
+Compares the memory and allocations to keep 100,000 messages as:
+ - the formatted lines (what stdout_logging/file_logging make)
+ - stdlib logging.LogRecord
+ - dicts
+ - cpylog.record.LogRecord
+
+The message strings are made before the logging call, so they're
+shared by all the cases and aren't counted.
+
+python dev/benchmarks/bench_record.py
+The cpylog LogRecord is a little larger than a formatted line for a
+short message, but it's ~1/3 of the size of the alternatives that keep
+the fields (a dict or a stdlib LogRecord), it costs about the same to
+make as the line, and the line is only formatted if the record is written.
+"""
+import time
+import timeit
+import logging
+import tracemalloc
+
+from cpylog.format_utils import LineFormatter, DEFAULT_FORMAT
+from cpylog.record import LogRecord, make_record
+
+NRECORDS = 100_000
+
+
+def measure(label: str, make, msgs: list[str]) -> None:
+    """prints the bytes/record and allocations/record"""
+    tracemalloc.start()
+    start_size, unused_peak = tracemalloc.get_traced_memory()
+    snapshot1 = tracemalloc.take_snapshot()
+    records = [make(msg) for msg in msgs]
+    size, unused_peak = tracemalloc.get_traced_memory()
+    snapshot2 = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    nallocs = sum(stat.count_diff for stat in snapshot2.compare_to(snapshot1, 'filename'))
+    nbytes = size - start_size
+
+    msg = msgs[0]
+    time_ns = min(timeit.repeat(lambda: make(msg), number=100_000, repeat=5)) / 100_000 * 1e9
+    print(f'{label:<28s} {nbytes / len(records):8.1f} bytes/msg '
+          f'{nallocs / len(records):6.2f} allocs/msg {time_ns:6.0f} ns/msg')
+
+
+def main() -> None:
+    msgs = [f'iteration {i} converged' for i in range(NRECORDS)]
+    formatter = LineFormatter(DEFAULT_FORMAT)
+    func = 'Solver.solve'
+
+    measure('formatted line', lambda msg: formatter.format('INFO', 'solver.py', 120, msg, func), msgs)
+    measure('logging.LogRecord', lambda msg: logging.LogRecord(
+        'cpylog', logging.INFO, 'solver.py', 120, msg, None, None, func), msgs)
+    measure('dict', lambda msg: {
+        'typ': 'INFO', 'time_ns': time.time_ns(), 'filename': 'solver.py',
+        'lineno': 120, 'msg': msg, 'func': func}, msgs)
+    measure('tuple', lambda msg: ('INFO', time.time_ns(), 'solver.py', 120, msg, func), msgs)
+    measure('cpylog LogRecord', lambda msg: make_record('INFO', 'solver.py', 120, msg, func), msgs)
+    measure('cpylog LogRecord (direct)', lambda msg: LogRecord(
+        20, time.time_ns(), 'solver.py', 120, msg, func), msgs)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
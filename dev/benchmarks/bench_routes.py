@@ -0,0 +1,53 @@
+"""
+Compares writing a debug.log and an errors.log with:
+ - two FileLoggers (two frame lookups and two formats per message)
+ - one FileLogger with add_file (one frame lookup and one format)
+
+python dev/benchmarks/bench_routes.py
+"""
+import os
+import timeit
+import tempfile
+
+from cpylog import FileLogger
+
+
+def time_call(func, number: int=20000, repeat: int=5) -> float:
+    """gets the time per call in ns"""
+    times = timeit.repeat(func, number=number, repeat=repeat)
+    return min(times) / number * 1e9
+
+
+def main() -> None:
+    dirname = tempfile.mkdtemp()
+    debug_filename = os.path.join(dirname, 'debug.log')
+    errors_filename = os.path.join(dirname, 'errors.log')
+
+    with FileLogger(level='debug', filename=debug_filename, include_stream=False) as debug_log, \
+         FileLogger(level='error', filename=errors_filename, include_stream=False) as errors_log:
+        debug_log.set_flush(100)
+        errors_log.set_flush(100)
+        def two_logs():
+            debug_log.info('message')
+            errors_log.info('message')
+            debug_log.critical('failed')
+            errors_log.critical('failed')
+        two = time_call(two_logs) / 2
+
+    with FileLogger(level='debug', filename=debug_filename, include_stream=False) as log:
+        log.add_file(errors_filename, min_level='error')
+        log.set_flush(100)
+        def one_log():
+            log.info('message')
+            log.critical('failed')
+        one = time_call(one_log) / 2
+
+    os.remove(debug_filename)
+    os.remove(errors_filename)
+    os.rmdir(dirname)
+    print(f'two FileLoggers:            {two:6.0f} ns/msg')
+    print(f'one FileLogger + add_file:  {one:6.0f} ns/msg')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()